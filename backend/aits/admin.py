@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Department, Lecturer, Student, AcademicRegistrar, Issue, Notification
+from .models import User, Department, Lecturer, Student, AcademicRegistrar, Issue, Notification, Job
 # Register your models here
 
 
@@ -8,4 +8,5 @@ admin.site.register(Lecturer)
 admin.site.register(Student)
 admin.site.register(AcademicRegistrar)
 admin.site.register(Issue)
-admin.site.register(Notification)
\ No newline at end of file
+admin.site.register(Notification)
+admin.site.register(Job)
\ No newline at end of file
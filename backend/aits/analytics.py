@@ -0,0 +1,191 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Department, Issue, IssueStatistic, Student
+
+# Column or lookup each dimension is grouped by
+DIMENSION_FIELDS = {
+    'status': 'status',
+    'category': 'category',
+    'priority': 'priority',
+    'department': 'student__department_id',
+    'courseUnit': 'courseUnit',
+}
+
+# Issue attribute behind each dimension that lives on the issue row itself
+ROW_DIMENSIONS = {
+    'status': 'status',
+    'category': 'category',
+    'priority': 'priority',
+    'courseUnit': 'courseUnit',
+}
+
+
+def bucket_value(value):
+    return '' if value is None else str(value)
+
+
+def get_department_id(student_id):
+    """Department of a student, locking their row so a department move and their issue writes take turns"""
+    return Student.objects.select_for_update().filter(pk=student_id).values_list('department_id', flat=True).first()
+
+
+def stored_values(issue):
+    """The issue's committed buckets, locking its row so concurrent saves move its counts in turn"""
+    return (
+        Issue.objects.select_for_update(of=('self',)).filter(pk=issue.pk)
+        .values(*ROW_DIMENSIONS.values(), 'student_id', department=F('student__department_id'))
+        .first()
+    )
+
+
+def row_buckets(values):
+    return {dimension: bucket_value(values.get(field)) for dimension, field in ROW_DIMENSIONS.items()}
+
+
+def bump(dimension, value, delta):
+    """Atomically add delta to one bucket, creating it if needed"""
+    buckets = IssueStatistic.objects.filter(dimension=dimension, value=value)
+    if buckets.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            IssueStatistic.objects.create(dimension=dimension, value=value, count=delta)
+    except IntegrityError:
+        # Another request created the bucket first
+        buckets.update(count=F('count') + delta)
+
+
+def apply_changes(changes):
+    for (dimension, value), delta in changes.items():
+        if delta:
+            bump(dimension, value, delta)
+
+
+def current_values(issue):
+    return {name: getattr(issue, name) for name in Issue.TRACKED_FIELDS}
+
+
+def issue_saving(issue, update_fields=None):
+    """Remember what an existing issue's row holds before the save overwrites it"""
+    issue._stored_values = None
+    if issue.pk is None or (update_fields is not None and not set(update_fields) & Issue.TRACKED_UPDATE_FIELDS):
+        return
+    issue._stored_values = stored_values(issue)
+
+
+def issue_saved(issue, created):
+    """Move an issue's counts from the buckets its row was in to its current ones"""
+    values = current_values(issue)
+    stored = getattr(issue, '_stored_values', None)
+    changes = Counter()
+
+    if created:
+        for dimension, value in row_buckets(values).items():
+            changes[(dimension, value)] += 1
+        changes[('department', bucket_value(get_department_id(issue.student_id)))] += 1
+    elif stored is not None:
+        for dimension, value in row_buckets(stored).items():
+            changes[(dimension, value)] -= 1
+        for dimension, value in row_buckets(values).items():
+            changes[(dimension, value)] += 1
+        if stored['student_id'] != values['student_id']:
+            changes[('department', bucket_value(stored['department']))] -= 1
+            changes[('department', bucket_value(get_department_id(issue.student_id)))] += 1
+
+    apply_changes(changes)
+
+
+def issue_deleted(stored):
+    if stored is None:
+        return
+    changes = Counter()
+    for dimension, value in row_buckets(stored).items():
+        changes[(dimension, value)] -= 1
+    changes[('department', bucket_value(stored['department']))] -= 1
+    apply_changes(changes)
+
+
+def student_saving(student, update_fields=None):
+    """Remember an existing student's stored department, locking their row until the save commits"""
+    student.__dict__.pop('_stored_department_id', None)
+    if student.pk is None or (update_fields is not None and not set(update_fields) & {'department', 'department_id'}):
+        return
+    student._stored_department_id = get_department_id(student.pk)
+
+
+def student_saved(student, created):
+    """Move a student's issues to the bucket of their new department"""
+    if created or not hasattr(student, '_stored_department_id'):
+        return
+    old_department = student.__dict__.pop('_stored_department_id')
+    if old_department == student.department_id:
+        return
+    count = Issue.objects.filter(student=student).count()
+    apply_changes(Counter({
+        ('department', bucket_value(old_department)): -count,
+        ('department', bucket_value(student.department_id)): count,
+    }))
+
+
+def department_deleted(department_id):
+    """Move a deleted department's issues to the unspecified bucket, as SET_NULL updates students without signals"""
+    buckets = IssueStatistic.objects.select_for_update().filter(dimension='department', value=str(department_id))
+    count = sum(buckets.values_list('count', flat=True))
+    buckets.delete()
+    apply_changes(Counter({('department', ''): count}))
+
+
+def issues_updated(issues, field, value):
+    """Record a bulk change of one row field on already-loaded issues"""
+    dimension = next((d for d, f in ROW_DIMENSIONS.items() if f == field), None)
+    if dimension is None:
+        return
+    changes = Counter()
+    for issue in issues:
+        changes[(dimension, bucket_value(getattr(issue, field)))] -= 1
+        changes[(dimension, bucket_value(value))] += 1
+    apply_changes(changes)
+
+
+def rebuild():
+    """Recount every bucket from the issue table, as after queryset updates that skip signals"""
+    statistics = []
+    for dimension, field in DIMENSION_FIELDS.items():
+        rows = Issue.objects.values(field).annotate(count=Count('pk')).order_by()
+        statistics.extend(
+            IssueStatistic(dimension=dimension, value=bucket_value(row[field]), count=row['count'])
+            for row in rows
+        )
+
+    with transaction.atomic():
+        IssueStatistic.objects.all().delete()
+        IssueStatistic.objects.bulk_create(statistics)
+    return statistics
+
+
+def get_summary():
+    """Issue counts grouped by every dimension, read from the summary table"""
+    labels = {
+        'status': dict(Issue.STATUSES),
+        'category': dict(Issue.CATEGORIES),
+        'priority': dict(Issue.PRIORITIES),
+        'courseUnit': dict(Issue.COURSE_UNITS),
+    }
+    summary = {dimension: [] for dimension, _ in IssueStatistic.DIMENSIONS}
+    statistics = list(IssueStatistic.objects.filter(count__gt=0).order_by('dimension', '-count', 'value'))
+
+    department_ids = [s.value for s in statistics if s.dimension == 'department' and s.value]
+    labels['department'] = {
+        str(pk): name for pk, name in Department.objects.filter(pk__in=department_ids).values_list('pk', 'name')
+    }
+
+    for statistic in statistics:
+        summary[statistic.dimension].append({
+            'value': statistic.value or None,
+            'label': labels[statistic.dimension].get(statistic.value, statistic.value or 'Unspecified'),
+            'count': statistic.count,
+        })
+    return summary
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class AitsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'aits'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa: F401
+
+        from django.conf import settings
+        if settings.METRICS_ENABLED:
+            from django.db.backends.signals import connection_created
+            from . import metrics
+            connection_created.connect(metrics.instrument_connection)
+            metrics.instrument_serializers()
@@ -0,0 +1,140 @@
+"""
+Async versions of the read-heavy endpoints, used when the API is served
+through core/asgi.py (settings.ASYNC_READ_VIEWS).
+
+Each endpoint answers GET on the async ORM and hands every other method to
+its synchronous DRF view, so a URL keeps a single route either way.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import notification_counts
+from .authentication import JWTAuthentication
+from .conditional import (
+    aall_issues_validator,
+    aissue_validator,
+    anotification_validator,
+    etag_matches,
+    make_etag,
+    with_etag,
+)
+from .pagination import KeysetPagination
+from .serializers import CompactNotificationSerializer, IssueSerializer, NotificationSerializer
+from . import views
+
+PERMISSION_DENIED = 'You do not have permission to perform this action.'
+
+
+def render(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def error_response(detail, status):
+    response = render({'detail': detail}, status=status)
+    if status == 401:
+        response['WWW-Authenticate'] = 'Bearer'
+    return response
+
+
+async def authenticate(request, role=None):
+    """Return the request's user, or the error response DRF would have sent"""
+    auth_parts = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if not auth_parts:
+        return None, error_response('Authentication credentials were not provided.', 401)
+    if len(auth_parts) != 2 or auth_parts[0].lower() != 'bearer':
+        return None, error_response('Invalid authorization header format. Use: Bearer <token>', 401)
+
+    try:
+        user, _ = await JWTAuthentication().aauthenticate_token(auth_parts[1])
+    except AuthenticationFailed as e:
+        return None, error_response(str(e.detail), 401)
+
+    if role is not None and user.role != role:
+        return None, error_response(PERMISSION_DENIED, 403)
+    return user, None
+
+
+async def conditional_list(request, user, validator, queryset, serializer_class, wrap=None):
+    """Serve a list with the same ETag and keyset pagination as the sync views"""
+    etag = make_etag(request, user.pk, validator)
+    if etag_matches(request, etag):
+        return with_etag(HttpResponse(status=304), etag)
+
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(queryset, Request(request))
+    if page is not None:
+        data = {'next': paginator.get_next_link(), 'results': serializer_class(page, many=True).data}
+    else:
+        data = serializer_class([row async for row in queryset], many=True).data
+        if wrap:
+            data = {wrap: data}
+    return with_etag(render(data), etag)
+
+
+async def student_issues(request):
+    user, error = await authenticate(request, 'student')
+    if error:
+        return error
+    issues = views.get_issue_queryset().filter(student__user=user).order_by('-created_at')
+    return await conditional_list(request, user, await aissue_validator(issues), issues, IssueSerializer, wrap='issues')
+
+
+async def lecturer_issues(request):
+    user, error = await authenticate(request, 'lecturer')
+    if error:
+        return error
+    issues = views.get_issue_queryset().filter(assigned_to__user=user)
+    return await conditional_list(request, user, await aissue_validator(issues), issues, IssueSerializer)
+
+
+async def registrar_issues(request):
+    user, error = await authenticate(request, 'registrar')
+    if error:
+        return error
+    issues = views.get_issue_queryset()
+    return await conditional_list(request, user, await aall_issues_validator(), issues, IssueSerializer)
+
+
+async def notifications(request):
+    user, error = await authenticate(request)
+    if error:
+        return error
+    expand = request.GET.get('expand') == 'true'
+    queryset = views.get_notification_queryset(user, expand)
+    serializer_class = NotificationSerializer if expand else CompactNotificationSerializer
+    return await conditional_list(request, user, await anotification_validator(user), queryset, serializer_class)
+
+
+async def unread_count(request):
+    user, error = await authenticate(request)
+    if error:
+        return error
+    return render({'count': await notification_counts.aget_unread_count(user.pk)})
+
+
+def read_async(read_view, view):
+    """Route GET to an async view and every other method to the sync view"""
+    sync_view = sync_to_async(view)
+
+    @csrf_exempt
+    async def dispatch(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_view(request, *args, **kwargs)
+        try:
+            return await read_view(request, *args, **kwargs)
+        except APIException as e:
+            return error_response(e.detail, e.status_code)
+
+    return dispatch
+
+
+student_issues_view = read_async(student_issues, views.StudentIssueCreateView.as_view())
+lecturer_issues_view = read_async(lecturer_issues, views.LecturerIssueListView.as_view())
+registrar_issues_view = read_async(registrar_issues, views.AcademicRegistrarIssueListView.as_view())
+notifications_view = read_async(notifications, views.get_notifications)
+unread_count_view = read_async(unread_count, views.get_unread_count)
@@ -1,8 +1,177 @@
+import copy
+import datetime
+import hashlib
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
 import jwt
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import authentication
 from rest_framework.exceptions import AuthenticationFailed
-from .models import User
+from .models import RefreshToken, User
+
+# Profile relation for each role, used for the profile_id claim
+PROFILE_RELATIONS = {
+    'student': 'student_profile',
+    'lecturer': 'lecturer_profile',
+    'registrar': 'registrar_profile',
+}
+
+
+class UserCache:
+    """Bounded in-process cache of users keyed by pk, with a per-entry TTL"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pk):
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self._entries[pk]
+                return None
+            self._entries.move_to_end(pk)
+        # Hand out a copy so per-request state never leaks between requests
+        return copy.copy(user)
+
+    def set(self, user):
+        # Keep only the user's own fields, not related objects cached on it
+        user = copy.copy(user)
+        user._state.fields_cache = {}
+        with self._lock:
+            self._entries[user.pk] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.pk)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, pk):
+        with self._lock:
+            self._entries.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL)
+
+
+def get_profile_id(user):
+    """Return the pk of the role profile linked to a user, if any"""
+    try:
+        return getattr(user, PROFILE_RELATIONS[user.role]).pk
+    except (KeyError, ObjectDoesNotExist):
+        return None
+
+
+def get_request_profile_id(request):
+    """Profile pk of the request's user, from the token's profile_id claim when it carries one"""
+    payload = request.auth if isinstance(request.auth, dict) else {}
+    if payload.get('profile_id') is not None:
+        return payload['profile_id']
+    return get_profile_id(request.user)
+
+
+def create_access_token(user):
+    """Issue a JWT carrying the claims needed to authenticate without a lookup"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    exp = now + datetime.timedelta(seconds=settings.JWT_ACCESS_TOKEN_LIFETIME)
+    return jwt.encode(
+        {
+            'user_id': user.username,
+            'uid': user.pk,
+            'role': user.role,
+            'profile_id': get_profile_id(user),
+            'ver': user.token_version,
+            'exp': int(exp.timestamp())
+        },
+        settings.JWT_SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM
+    )
+
+
+def hash_refresh_token(token):
+    # Refresh tokens are 256 random bits, so a fast digest is as safe as a password hash
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_refresh_token(user, family=None):
+    """Store a new refresh token for the user and return the raw token"""
+    now = timezone.now()
+    if family is None:
+        # A fresh login, so drop the user's expired tokens while we are here
+        RefreshToken.objects.filter(user=user, expires_at__lte=now).delete()
+        family = uuid.uuid4().hex
+
+    token = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        token_hash=hash_refresh_token(token),
+        family=family,
+        token_version=user.token_version,
+        expires_at=now + datetime.timedelta(seconds=settings.JWT_REFRESH_TOKEN_LIFETIME)
+    )
+    return token
+
+
+def rotate_refresh_token(token):
+    """Exchange a refresh token for a new (access token, refresh token) pair
+
+    Each refresh token works once. Presenting one that was already rotated
+    means it leaked, so every token descended from the same login is revoked.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        try:
+            stored = RefreshToken.objects.select_for_update(of=('self',)).select_related('user').get(
+                token_hash=hash_refresh_token(token)
+            )
+        except RefreshToken.DoesNotExist:
+            raise AuthenticationFailed('Invalid refresh token')
+
+        user = stored.user
+        if stored.used_at is not None:
+            RefreshToken.objects.filter(family=stored.family).delete()
+            error = 'Refresh token has already been used'
+        elif stored.expires_at <= now:
+            error = 'Refresh token has expired'
+        elif stored.token_version != user.token_version or not user.is_active:
+            error = 'Refresh token has been revoked'
+        else:
+            stored.used_at = now
+            stored.save(update_fields=['used_at'])
+            return create_access_token(user), create_refresh_token(user, stored.family)
+
+    # Raised outside the block so a revoked family stays deleted
+    raise AuthenticationFailed(error)
+
+
+@contextmanager
+def token_errors():
+    """Report any failure while checking a token as AuthenticationFailed"""
+    try:
+        yield
+    except (IndexError, KeyError):
+        raise AuthenticationFailed('Invalid token format')
+    except AuthenticationFailed:
+        raise
+    except Exception as e:
+        raise AuthenticationFailed(str(e))
+
 
 class JWTAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request):
@@ -10,42 +179,75 @@ class JWTAuthentication(authentication.BaseAuthentication):
         if not auth_header:
             return None
 
+        # Check for Bearer token
+        auth_parts = auth_header.split()
+        if len(auth_parts) != 2 or auth_parts[0].lower() != 'bearer':
+            raise AuthenticationFailed('Invalid authorization header format. Use: Bearer <token>')
+
+        return self.authenticate_token(auth_parts[1])
+
+    def authenticate_token(self, token):
+        """Validate a raw JWT and return (user, payload)"""
+        with token_errors():
+            payload = self.decode_token(token)
+            return (self.check_user(self.get_user(payload), payload), payload)
+
+    async def aauthenticate_token(self, token):
+        """authenticate_token for async views, only leaving the event loop on a cache miss"""
+        with token_errors():
+            payload = self.decode_token(token)
+            user = self.get_cached_user(payload)
+            if user is None:
+                user = await sync_to_async(self.get_user)(payload)
+            return (self.check_user(user, payload), payload)
+
+    def decode_token(self, token):
         try:
-            # Check for Bearer token
-            auth_parts = auth_header.split()
-            if len(auth_parts) != 2 or auth_parts[0].lower() != 'bearer':
-                raise AuthenticationFailed('Invalid authorization header format. Use: Bearer <token>')
-
-            token = auth_parts[1]
-            
-            # Decode the token
-            try:
-                payload = jwt.decode(
-                    token, 
-                    settings.JWT_SECRET_KEY,
-                    algorithms=[settings.JWT_ALGORITHM]
-                )
-            except jwt.ExpiredSignatureError:
-                raise AuthenticationFailed('Token has expired')
-            except jwt.InvalidTokenError:
-                raise AuthenticationFailed('Invalid token')
-            
-            # Get user from payload
+            return jwt.decode(
+                token,
+                settings.JWT_SECRET_KEY,
+                algorithms=[settings.JWT_ALGORITHM]
+            )
+        except jwt.ExpiredSignatureError:
+            raise AuthenticationFailed('Token has expired')
+        except jwt.InvalidTokenError:
+            raise AuthenticationFailed('Invalid token')
+
+    def check_user(self, user, payload):
+        # Ensure user role and token version match the token
+        if user.role != payload.get('role'):
+            raise AuthenticationFailed('Invalid user role')
+        if 'ver' in payload and user.token_version != payload['ver']:
+            raise AuthenticationFailed('Token has been revoked')
+        return user
+
+    def get_cached_user(self, payload):
+        if 'uid' not in payload:
+            return None
+        user = user_cache.get(payload['uid'])
+        if user is not None and user.token_version == payload.get('ver'):
+            return user
+        return None
+
+    def get_user(self, payload):
+        # Tokens issued before the uid claim existed are looked up by username
+        if 'uid' not in payload:
             try:
-                user = User.objects.get(username=payload['user_id'])
+                return User.objects.get(username=payload['user_id'])
             except User.DoesNotExist:
                 raise AuthenticationFailed('No user found for token')
-            
-            # Ensure user role matches the token
-            if user.role != payload.get('role'):
-                raise AuthenticationFailed('Invalid user role')
-                
-            return (user, None)
-            
-        except (IndexError, KeyError):
-            raise AuthenticationFailed('Invalid token format')
-        except Exception as e:
-            raise AuthenticationFailed(str(e))
+
+        user = self.get_cached_user(payload)
+        if user is not None:
+            return user
+
+        try:
+            user = User.objects.get(pk=payload['uid'])
+        except User.DoesNotExist:
+            user_cache.evict(payload['uid'])
+            raise AuthenticationFailed('No user found for token')
+        user_cache.set(user)
+        return user
 
     def authenticate_header(self, request):
-        return 'Bearer'
\ No newline at end of file
+        return 'Bearer'
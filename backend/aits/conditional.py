@@ -0,0 +1,112 @@
+import hashlib
+
+from django.db.models import Count, Max, Q, Sum
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import directory, reference
+from .models import Issue, IssueStatistic, Notification
+
+
+def make_etag(request, user_pk, validator):
+    """Weak ETag for one user's view of a list at a given validator"""
+    # Callers pass the JWT user, as the async views' plain request.user is not it
+    key = f'{user_pk}|{request.get_full_path()}|{validator}'
+    return 'W/"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    tag = etag[2:]
+    return any(candidate.removeprefix('W/') == tag for candidate in parse_etags(if_none_match))
+
+
+def not_modified(etag):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    response['ETag'] = etag
+    # Make browsers revalidate instead of reusing a stale copy
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def issue_aggregates():
+    return {'count': Count('pk'), 'updated': Max('updated_at')}
+
+
+def notification_aggregates():
+    return {
+        'count': Count('pk'),
+        'newest': Max('pk'),
+        'unread': Count('pk', filter=Q(is_read=False)),
+        'issue_updated': Max('issue__updated_at'),
+    }
+
+
+def format_validator(values, keys, markers):
+    return '|'.join([str(values[key]) for key in keys] + [markers])
+
+
+def related_markers():
+    """Versions of the people and departments that list rows embed"""
+    return f'{directory.get_generation()}|{reference.get_version()}'
+
+
+async def arelated_markers():
+    return f'{await directory.aget_generation()}|{await reference.aget_version()}'
+
+
+def issue_validator(queryset):
+    """Latest change and size of a filtered set of issues"""
+    values = queryset.order_by().aggregate(**issue_aggregates())
+    return format_validator(values, ('count', 'updated'), related_markers())
+
+
+def all_issues_validator():
+    """Latest change and size of the whole issue table without a COUNT(*) scan"""
+    values = Issue.objects.aggregate(updated=Max('updated_at'))
+    values.update(IssueStatistic.objects.filter(dimension='status').aggregate(count=Sum('count')))
+    return format_validator(values, ('count', 'updated'), related_markers())
+
+
+def notification_validator(user):
+    """Size, newest row, unread count and latest issue change of a user's notifications"""
+    values = Notification.objects.filter(recipient=user).order_by().aggregate(**notification_aggregates())
+    return format_validator(values, ('count', 'newest', 'unread', 'issue_updated'), related_markers())
+
+
+async def aissue_validator(queryset):
+    values = await queryset.order_by().aaggregate(**issue_aggregates())
+    return format_validator(values, ('count', 'updated'), await arelated_markers())
+
+
+async def aall_issues_validator():
+    values = await Issue.objects.aaggregate(updated=Max('updated_at'))
+    values.update(await IssueStatistic.objects.filter(dimension='status').aaggregate(count=Sum('count')))
+    return format_validator(values, ('count', 'updated'), await arelated_markers())
+
+
+async def anotification_validator(user):
+    values = await Notification.objects.filter(recipient=user).order_by().aaggregate(**notification_aggregates())
+    return format_validator(values, ('count', 'newest', 'unread', 'issue_updated'), await arelated_markers())
+
+
+class ConditionalListMixin:
+    """Answer a list GET with 304 Not Modified while its validator is unchanged"""
+
+    def get_validator(self):
+        return issue_validator(self.get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        etag = make_etag(request, request.user.pk, self.get_validator())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return with_etag(super().list(request, *args, **kwargs), etag)
@@ -0,0 +1,60 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+GENERATION_KEY = 'aits:directory:generation'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock so a lost counter never reuses an old generation
+        cache.add(GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+async def aget_generation():
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, int(time.time() * 1000), None)
+        generation = await cache.aget(GENERATION_KEY)
+    return generation
+
+
+def directory_key(name, request):
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(params.encode()).hexdigest()
+    return f'aits:directory:{get_generation()}:{name}:{digest}'
+
+
+def invalidate():
+    """Orphan every cached directory page once the current transaction commits"""
+    def apply():
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            # No generation yet, so nothing has been cached
+            pass
+
+    transaction.on_commit(apply)
+
+
+class CachedDirectoryMixin:
+    """Serve a list view's rendered JSON from the cache until the directory changes"""
+    directory_name = None
+
+    def list(self, request, *args, **kwargs):
+        key = directory_key(self.directory_name, request)
+        content = cache.get(key)
+        if content is None:
+            response = super().list(request, *args, **kwargs)
+            content = JSONRenderer().render(response.data)
+            cache.set(key, content, settings.DIRECTORY_CACHE_TIMEOUT)
+        return HttpResponse(content, content_type='application/json')
@@ -0,0 +1,107 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_etags
+
+from .storage import ContentAddressedStorage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def get_etag(file):
+    """Strong ETag for a stored file, free for content-addressed names"""
+    name = os.path.basename(file.name)
+    if isinstance(file.storage, ContentAddressedStorage):
+        return '"%s"' % os.path.splitext(name)[0]
+    stat = os.stat(file.path)
+    return '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+
+
+def parse_range(header, size):
+    """Return (start, end) for a single satisfiable byte range, or None"""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def attachment_response(request, file, filename=None):
+    """Serve a stored attachment with conditional and range request support"""
+    etag = get_etag(file)
+    filename = filename or os.path.basename(file.name)
+    content_type = mimetypes.guess_type(file.name)[0] or 'application/octet-stream'
+    if isinstance(file.storage, ContentAddressedStorage):
+        # The name changes whenever the content does
+        cache_control = 'private, max-age=31536000, immutable'
+    else:
+        cache_control = 'private, no-cache'
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+    if settings.ATTACHMENT_ACCEL_REDIRECT_PREFIX:
+        # Let the front proxy send the bytes, including any ranges
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.ATTACHMENT_ACCEL_REDIRECT_PREFIX + file.name
+    else:
+        size = file.size
+        byte_range = None
+        range_header = request.META.get('HTTP_RANGE')
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if range_header and (not if_range or if_range.strip() == etag):
+            byte_range = parse_range(range_header, size)
+            if byte_range is None:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(file.path, start, end),
+                status=206,
+                content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        else:
+            # FileResponse hands the open file to the server's file wrapper (sendfile)
+            response = FileResponse(file.open('rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+        response['Last-Modified'] = http_date(os.stat(file.path).st_mtime)
+
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    response['Content-Disposition'] = content_disposition_header(False, filename)
+    return response
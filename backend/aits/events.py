@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One client's queue of events, fed from any thread and read on its event loop"""
+
+    def __init__(self, broker, channel, max_pending):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The client's event loop has already shut down
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop events for clients that stopped reading rather than buffer forever
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Publish/subscribe between request threads and streaming clients in one process"""
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.max_pending)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def has_subscribers(self, channel):
+        return channel in self._subscriptions
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+class PostgresBroker(InProcessBroker):
+    """Relay events between processes with Postgres LISTEN/NOTIFY
+
+    Publishing sends a NOTIFY on the default database connection, so an event
+    published inside a transaction goes out when it commits. Each process opens
+    one extra connection, on its first subscriber, that listens for events and
+    hands them to the streams open in that process.
+    """
+
+    pg_channel = 'aits_events'
+    max_payload = 7999  # Postgres rejects larger NOTIFY payloads
+    reconnect_delay = 5  # Seconds before the listener retries a lost connection
+
+    def __init__(self, max_pending=100):
+        super().__init__(max_pending)
+        self._listener = None
+        self._listener_pid = None
+
+    def subscribe(self, channel):
+        self.start_listener()
+        return super().subscribe(channel)
+
+    def has_subscribers(self, channel):
+        # The streams may be open in any process
+        return True
+
+    def publish(self, channel, event):
+        payload = json.dumps({'channel': channel, 'event': event}, cls=DjangoJSONEncoder)
+        if len(payload.encode()) > self.max_payload:
+            logger.warning('Event too large to publish', extra={'channel': channel, 'size': len(payload)})
+            return
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    def deliver(self, payload):
+        """Hand an event received from Postgres to this process's streams"""
+        message = json.loads(payload)
+        super().publish(message['channel'], message['event'])
+
+    def start_listener(self):
+        with self._lock:
+            # Threads do not survive fork(), so each process starts its own
+            if self._listener_pid == os.getpid() and self._listener.is_alive():
+                return
+            self._listener_pid = os.getpid()
+            self._listener = threading.Thread(target=self.listen, name='aits-events', daemon=True)
+            self._listener.start()
+
+    def connect(self):
+        import psycopg2
+
+        connection = psycopg2.connect(**connections['default'].get_connection_params())
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.pg_channel}')
+        return connection
+
+    def listen(self):
+        while True:
+            try:
+                connection = self.connect()
+                try:
+                    while True:
+                        # Wake up now and then so a dead connection is noticed
+                        if select.select([connection], [], [], 60) != ([], [], []):
+                            connection.poll()
+                        else:
+                            with connection.cursor() as cursor:
+                                cursor.execute('SELECT 1')
+                        while connection.notifies:
+                            self.deliver(connection.notifies.pop(0).payload)
+                finally:
+                    connection.close()
+            except Exception:
+                logger.warning('Event listener lost its connection', exc_info=True)
+            time.sleep(self.reconnect_delay)
+
+
+def get_broker():
+    """Return the broker configured by NOTIFICATION_BROKER"""
+    return load_broker(settings.NOTIFICATION_BROKER)
+
+
+@lru_cache(maxsize=None)
+def load_broker(path):
+    return import_string(path)()
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def has_subscribers(user_id):
+    return get_broker().has_subscribers(user_channel(user_id))
+
+
+def publish(user_id, event_type, data):
+    """Push an event to every open stream of a user"""
+    get_broker().publish(user_channel(user_id), {'event': event_type, 'data': data})
+
+
+def subscribe(user_id):
+    return get_broker().subscribe(user_channel(user_id))
@@ -0,0 +1,161 @@
+import bisect
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+def job_name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, run_at=None, **payload):
+    """Queue func(**payload) for the background worker
+
+    The job row is written in the caller's transaction, so it only becomes
+    visible to workers if that transaction commits. With BACKGROUND_JOBS off
+    the job runs in-process right after commit instead.
+    """
+    if not settings.BACKGROUND_JOBS:
+        transaction.on_commit(lambda: func(**payload), robust=True)
+        return None
+
+    return Job.objects.create(
+        name=job_name(func),
+        payload=payload,
+        run_at=run_at or timezone.now(),
+        max_attempts=settings.JOB_MAX_ATTEMPTS
+    )
+
+
+def claim_jobs(limit):
+    """Mark up to limit due jobs as running and return them
+
+    SKIP LOCKED lets several workers claim at once without waiting on or
+    double-claiming each other's rows.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_at__lte=now)
+            .order_by('run_at')[:limit]
+        )
+        if not jobs:
+            return []
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='running',
+            started_at=now,
+            attempts=F('attempts') + 1
+        )
+
+    for job in jobs:
+        job.status = 'running'
+        job.started_at = now
+        job.attempts += 1
+    return jobs
+
+
+def retry_delay(attempts):
+    """Exponential backoff between attempts"""
+    return timedelta(seconds=settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome, returning True on success
+
+    The job's writes commit together with marking it done, and its row stays
+    locked meanwhile, so a slow run is never requeued and repeated, and a
+    failed attempt leaves nothing behind for the retry to duplicate.
+    """
+    try:
+        with transaction.atomic():
+            claim = Job.objects.select_for_update().filter(pk=job.pk, status='running', attempts=job.attempts)
+            if claim.first() is None:
+                # Requeued and claimed again since this worker claimed it
+                return False
+            func = import_string(job.name)
+            func(**job.payload)
+            claim.update(status='done', finished_at=timezone.now())
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status='failed', last_error=error, finished_at=timezone.now()
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', last_error=error,
+                run_at=timezone.now() + retry_delay(job.attempts)
+            )
+        return False
+    return True
+
+
+def requeue_stale_jobs():
+    """Put back jobs whose worker died mid-run
+
+    Jobs still running hold their row lock and are skipped, however long they take.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT)
+    with transaction.atomic():
+        stale = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='running', started_at__lt=cutoff)
+            .values_list('pk', flat=True)
+        )
+        return Job.objects.filter(pk__in=stale).update(status='queued')
+
+
+class JobLatency:
+    """Thread-safe record of how long jobs waited in the queue and took to run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.waits = []
+            self.runs = []
+            self.failures = 0
+
+    def record(self, job, run_seconds, succeeded):
+        wait_seconds = (job.started_at - job.run_at).total_seconds()
+        with self._lock:
+            bisect.insort(self.waits, max(wait_seconds, 0))
+            bisect.insort(self.runs, run_seconds)
+            if not succeeded:
+                self.failures += 1
+
+    def summary(self):
+        with self._lock:
+            return {
+                'jobs': len(self.runs),
+                'failures': self.failures,
+                'wait_p50': percentile(self.waits, 50),
+                'wait_p95': percentile(self.waits, 95),
+                'run_p50': percentile(self.runs, 50),
+                'run_p95': percentile(self.runs, 95),
+            }
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def timed_run(job, latency):
+    start = time.perf_counter()
+    succeeded = run_job(job)
+    latency.record(job, time.perf_counter() - start, succeeded)
+    return succeeded
@@ -0,0 +1,123 @@
+import os
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.base.creation import TEST_DATABASE_PREFIX
+from django.db.models import Count
+
+from aits.models import Issue, Lecturer, Notification, Student, User
+
+
+def is_test_database():
+    """Whether the default database is a throwaway test database"""
+    settings_dict = connection.settings_dict
+    name = str(settings_dict['NAME'] or '')
+    if name == settings_dict.get('TEST', {}).get('NAME') or connection.is_in_memory_db():
+        return True
+    return os.path.basename(name).startswith(TEST_DATABASE_PREFIX)
+
+
+class Command(BaseCommand):
+    help = 'Compare query plans and latencies of the hot issue and notification queries with and without their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Insert this many issues with seed_scale before measuring, e.g. 1000000')
+        parser.add_argument('--students', type=int, default=20000)
+        parser.add_argument('--lecturers', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--i-know', action='store_true',
+                            help='Run even though the database is not a test database')
+
+    def handle(self, *args, **options):
+        # Dropping indexes slows every query on the database until they are rebuilt
+        if not options['i_know'] and not is_test_database():
+            raise CommandError(
+                f'Refusing to drop indexes on {connection.settings_dict["NAME"]}, which is not a test database. '
+                'Point the settings at a test database or pass --i-know.'
+            )
+        if options['seed']:
+            call_command(
+                'seed_scale',
+                students=options['students'],
+                lecturers=options['lecturers'],
+                issues=options['seed'],
+                batch_size=options['batch_size'],
+                prefix='bench',
+                stdout=self.stdout,
+                stderr=self.stderr
+            )
+
+        student = Student.objects.annotate(n=Count('issues')).order_by('-n').first()
+        lecturer = Lecturer.objects.annotate(n=Count('assigned_issues')).order_by('-n').first()
+        recipient = User.objects.annotate(n=Count('notifications')).order_by('-n').first()
+        if not (student and lecturer and recipient):
+            self.stderr.write('No data to benchmark. Run with --seed 1000000 first.')
+            return
+
+        # Querysets mirroring the filters and ordering used in aits/views.py
+        queries = {
+            'student issues': lambda: Issue.objects.filter(student=student).order_by('-created_at', '-pk')[:50],
+            'lecturer issues': lambda: Issue.objects.filter(assigned_to=lecturer).order_by('-created_at', '-pk')[:50],
+            'lecturer open issues': lambda: Issue.objects.filter(assigned_to=lecturer, status='open'),
+            'registrar issues': lambda: Issue.objects.order_by('-created_at', '-pk')[:50],
+            'notifications': lambda: Notification.objects.filter(recipient=recipient).order_by('-created_at', '-pk')[:50],
+            'unread notifications': lambda: Notification.objects.filter(recipient=recipient, is_read=False).order_by('-created_at')[:50],
+        }
+
+        def unread_count():
+            return Notification.objects.filter(recipient=recipient, is_read=False).count()
+
+        self.stdout.write(f'Issues: {Issue.objects.count()}, notifications: {Notification.objects.count()}')
+
+        self.drop_indexes()
+        try:
+            before = self.measure(queries, unread_count, options['repeat'], 'WITHOUT INDEXES')
+        finally:
+            self.create_indexes()
+        after = self.measure(queries, unread_count, options['repeat'], 'WITH INDEXES')
+
+        self.stdout.write('\n=== Summary (median ms) ===')
+        for name in before:
+            self.stdout.write(f'{name:<24} {before[name]:>10.2f} -> {after[name]:>10.2f}')
+
+    def measure(self, queries, unread_count, repeat, label):
+        self.stdout.write(f'\n=== {label} ===')
+        results = {}
+        for name, build in queries.items():
+            self.stdout.write(f'\n-- {name}')
+            self.stdout.write(build().explain())
+            results[name] = self.time(lambda: list(build()), repeat)
+
+        self.stdout.write('\n-- unread count')
+        results['unread count'] = self.time(unread_count, repeat)
+        return results
+
+    def time(self, run, repeat):
+        run()  # Warm the cache
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        median = statistics.median(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        self.stdout.write(f'median {median:.2f} ms, p95 {p95:.2f} ms')
+        return median
+
+    def drop_indexes(self):
+        with connection.schema_editor() as editor:
+            for model in (Issue, Notification):
+                for index in model._meta.indexes:
+                    editor.remove_index(model, index)
+
+    def create_indexes(self):
+        with connection.schema_editor() as editor:
+            for model in (Issue, Notification):
+                for index in model._meta.indexes:
+                    editor.add_index(model, index)
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from aits.models import AttachmentBlob, Issue
+
+
+class Command(BaseCommand):
+    help = 'Delete attachment blobs that no issue refers to any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Keep unreferenced blobs uploaded more recently than this')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        storage = Issue._meta.get_field('attachment').storage
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        deleted = 0
+        freed = 0
+        last_pk = 0
+
+        while True:
+            with transaction.atomic():
+                # Lock the batch, skipping blobs an upload has locked, so the
+                # reference count checked here holds until the files are gone
+                blobs = list(
+                    AttachmentBlob.objects.select_for_update(skip_locked=True)
+                    .filter(ref_count__lte=0, last_uploaded_at__lt=cutoff, pk__gt=last_pk)
+                    .order_by('pk')[:options['batch_size']]
+                )
+                if not blobs:
+                    break
+                last_pk = blobs[-1].pk
+
+                if not options['dry_run']:
+                    AttachmentBlob.objects.filter(pk__in=[blob.pk for blob in blobs]).delete()
+                    # Unlink before committing, while uploads of the same content
+                    # still wait on the row locks. An upload after the commit finds
+                    # no file and writes it again
+                    self.delete_files(storage, [blob.name for blob in blobs])
+
+            deleted += len(blobs)
+            freed += sum(blob.size for blob in blobs)
+
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(f'{action} {deleted} unreferenced blobs ({freed / (1024 * 1024):.1f} MB)')
+
+    def delete_files(self, storage, names):
+        for name in names:
+            storage.delete(name)
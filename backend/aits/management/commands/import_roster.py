@@ -0,0 +1,54 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from aits import roster
+
+
+class Command(BaseCommand):
+    help = 'Create student and lecturer accounts in bulk from a CSV or NDJSON roster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Roster file, or - to read standard input')
+        parser.add_argument('--format', choices=roster.FORMATS,
+                            help='Defaults to ndjson for .ndjson/.jsonl files and csv otherwise')
+        parser.add_argument('--role', choices=list(roster.ROLE_FIELDS),
+                            help='Role for rows without a role column')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--workers', type=int, help='Password hashing processes')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the roster without creating anything')
+        parser.add_argument('--errors', help='Write every row error to this file as JSON')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.perf_counter()
+        try:
+            file = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with file:
+            summary = roster.import_roster(
+                file,
+                options['format'] or roster.detect_format(path),
+                role=options['role'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                dry_run=options['dry_run']
+            )
+
+        for error in summary['errors']:
+            messages = '; '.join(f'{field}: {message}' for field, message in error['errors'].items())
+            self.stderr.write(f'line {error["line"]}: {messages}')
+        if options['errors']:
+            with open(options['errors'], 'w') as f:
+                json.dump(summary['errors'], f, indent=2)
+
+        verb, count = ('Validated', summary['valid']) if options['dry_run'] else ('Created', summary['created'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {count} accounts in {time.perf_counter() - started:.1f}s, '
+            f'{summary["error_count"]} rows rejected, '
+            f'{len(summary["departments_created"])} new departments'
+        ))
@@ -0,0 +1,452 @@
+import http.client
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from aits import directory
+from aits.jobs import percentile
+from aits.models import AcademicRegistrar, Department, Issue, Lecturer, Student, User
+
+ROLES = ('student', 'lecturer', 'registrar')
+SEARCH_WORDS = ('exam', 'marks', 'registration', 'missing', 'lecture', 'timetable', 'results')
+
+
+class Session:
+    """One virtual user: a logged-in account on its own keep-alive connection"""
+
+    def __init__(self, base_url, timeout, results, seed=None):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.results = results
+        self.connection = None
+        self.token = None
+        self.etags = {}
+        self.issue_ids = []
+        self.notification_ids = []
+        self.lecturer_ids = []
+        # Its own generator, so threads do not interleave draws from a shared sequence
+        self.random = random.Random(seed)
+
+    def request(self, method, path, label, body=None, conditional=False):
+        """Send one request, record its latency under label and return (status, data)"""
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(body)
+        # Poll lists the way a browser revalidates its cached copy
+        if conditional and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = self.connection_class(self.netloc, timeout=self.timeout)
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.close()
+            self.results[label].append((time.perf_counter() - start, 0))
+            return 0, None
+        self.results[label].append((time.perf_counter() - start, status))
+
+        if conditional and response.getheader('ETag'):
+            self.etags[path] = response.getheader('ETag')
+        if status >= 300 or not content:
+            return status, None
+        try:
+            return status, json.loads(content)
+        except ValueError:
+            return status, None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def login(self, username, password, role):
+        status, data = self.request('POST', '/login', 'POST /login', {
+            'userId': username, 'password': password, 'role': role
+        })
+        if status != 200 or not data:
+            raise CommandError(f'Could not log in as {username} ({role}): HTTP {status}')
+        self.token = data['token']
+
+    def remember_issues(self, issues):
+        if issues:
+            self.issue_ids = [issue['issue_id'] for issue in issues[:50]]
+
+    def some_issue(self):
+        return self.random.choice(self.issue_ids) if self.issue_ids else None
+
+
+# Each action is (weight, callable). Weights approximate how often the
+# frontend makes the call while a user has the app open.
+
+def student_list_issues(s):
+    status, data = s.request('GET', '/student/issues', 'GET /student/issues', conditional=True)
+    if data:
+        s.remember_issues(data.get('issues'))
+
+
+def student_view_issue(s):
+    pk = s.some_issue()
+    if pk:
+        s.request('GET', f'/issues/{pk}', 'GET /issues/<pk>')
+
+
+def student_create_issue(s):
+    issue = {
+        'title': f'Load test {s.random.choice(SEARCH_WORDS)} issue',
+        'category': s.random.choice([choice for choice, _ in Issue.CATEGORIES]),
+        'description': f'Generated at {timezone.now().isoformat()} about {s.random.choice(SEARCH_WORDS)}.',
+        'courseUnit': s.random.choice([choice for choice, _ in Issue.COURSE_UNITS]),
+        'priority': s.random.choice([choice for choice, _ in Issue.PRIORITIES]),
+    }
+    if s.lecturer_ids:
+        issue['assigned_to'] = s.random.choice(s.lecturer_ids)
+    s.request('POST', '/student/issues', 'POST /student/issues', issue)
+
+
+def list_lecturers(s):
+    status, data = s.request('GET', '/lecturers', 'GET /lecturers')
+    if isinstance(data, list):
+        s.lecturer_ids = [lecturer['id'] for lecturer in data]
+
+
+def list_students(s):
+    s.request('GET', '/students?page_size=50', 'GET /students')
+
+
+def lecturer_list_issues(s):
+    status, data = s.request('GET', '/lecturer/issues', 'GET /lecturer/issues', conditional=True)
+    if isinstance(data, list):
+        s.remember_issues(data)
+
+
+def lecturer_view_issue(s):
+    pk = s.some_issue()
+    if pk:
+        s.request('GET', f'/lecturer/issues/{pk}', 'GET /lecturer/issues/<pk>')
+
+
+def lecturer_update_status(s):
+    pk = s.some_issue()
+    if pk:
+        s.request('PATCH', f'/lecturer/issues/{pk}/status', 'PATCH /lecturer/issues/<pk>/status', {
+            'status': s.random.choice(['in_progress', 'resolved'])
+        })
+
+
+def registrar_list_issues(s):
+    status, data = s.request('GET', '/registrar/issues?page_size=50', 'GET /registrar/issues', conditional=True)
+    if data:
+        s.remember_issues(data.get('results'))
+
+
+def registrar_search(s):
+    query = urlencode({'q': s.random.choice(SEARCH_WORDS)})
+    s.request('GET', f'/registrar/issues/search?{query}', 'GET /registrar/issues/search')
+
+
+def registrar_analytics(s):
+    s.request('GET', '/registrar/analytics', 'GET /registrar/analytics')
+
+
+def registrar_view_issue(s):
+    pk = s.some_issue()
+    if pk:
+        s.request('GET', f'/registrar/issues/{pk}', 'GET /registrar/issues/<pk>')
+
+
+def registrar_update_issue(s):
+    pk = s.some_issue()
+    if pk:
+        s.request('PATCH', f'/registrar/issues/{pk}', 'PATCH /registrar/issues/<pk>', {
+            'priority': s.random.choice([choice for choice, _ in Issue.PRIORITIES])
+        })
+
+
+def registrar_update_status(s):
+    pk = s.some_issue()
+    if pk:
+        s.request('PATCH', f'/registrar/issues/{pk}/status', 'PATCH /registrar/issues/<pk>/status', {
+            'status': s.random.choice(['in_progress', 'resolved', 'closed'])
+        })
+
+
+def registrar_bulk_update(s):
+    if s.issue_ids:
+        s.request('POST', '/registrar/issues/bulk', 'POST /registrar/issues/bulk', {
+            'issue_ids': s.random.sample(s.issue_ids, min(10, len(s.issue_ids))),
+            'operation': 'set_priority',
+            'value': s.random.choice([choice for choice, _ in Issue.PRIORITIES]),
+        })
+
+
+def poll_notifications(s):
+    status, data = s.request('GET', '/notifications', 'GET /notifications', conditional=True)
+    if isinstance(data, list):
+        s.notification_ids = [n['id'] for n in data if not n['is_read']][:20]
+
+
+def poll_unread_count(s):
+    s.request('GET', '/notifications/unread-count', 'GET /notifications/unread-count')
+
+
+def mark_notification_read(s):
+    if s.notification_ids:
+        pk = s.notification_ids.pop()
+        s.request('POST', f'/notifications/{pk}/mark-read', 'POST /notifications/<pk>/mark-read')
+
+
+SCENARIOS = {
+    'student': [
+        (30, student_list_issues),
+        (25, poll_unread_count),
+        (15, poll_notifications),
+        (10, student_view_issue),
+        (5, student_create_issue),
+        (5, list_lecturers),
+        (5, mark_notification_read),
+    ],
+    'lecturer': [
+        (30, lecturer_list_issues),
+        (25, poll_unread_count),
+        (15, poll_notifications),
+        (10, lecturer_view_issue),
+        (8, lecturer_update_status),
+        (5, list_students),
+        (5, mark_notification_read),
+    ],
+    'registrar': [
+        (25, registrar_list_issues),
+        (20, poll_unread_count),
+        (10, poll_notifications),
+        (10, registrar_search),
+        (8, registrar_analytics),
+        (8, registrar_view_issue),
+        (5, registrar_update_issue),
+        (4, registrar_update_status),
+        (2, registrar_bulk_update),
+        (4, list_lecturers),
+        (4, list_students),
+    ],
+}
+
+# Calls a user makes once when the app loads
+STARTUP = {
+    'student': [list_lecturers, student_list_issues],
+    'lecturer': [lecturer_list_issues],
+    'registrar': [registrar_list_issues],
+}
+
+
+def summarize(samples, duration):
+    latencies = sorted(seconds * 1000 for seconds, _ in samples)
+    statuses = defaultdict(int)
+    for _, status in samples:
+        statuses[str(status)] += 1
+    errors = sum(count for status, count in statuses.items() if status == '0' or int(status) >= 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput': round(len(samples) / duration, 2) if duration else 0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0,
+        'max_ms': round(latencies[-1], 2) if latencies else 0,
+        'statuses': dict(statuses),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Replay a mixed student, lecturer and registrar workload against a running API and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running API')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to generate load for')
+        parser.add_argument('--warmup', type=float, default=3, help='Seconds of load excluded from the results')
+        parser.add_argument('--concurrency', type=int, default=20, help='Virtual users making requests in parallel')
+        parser.add_argument('--mix', default='student:70,lecturer:20,registrar:10',
+                            help='Share of virtual users per role')
+        parser.add_argument('--think-time', type=float, default=0,
+                            help='Mean seconds a virtual user waits between requests')
+        parser.add_argument('--users', type=int, default=10, help='Accounts per role to log in as')
+        parser.add_argument('--password', default='loadtest')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Create the loadtest-<role>-<n> accounts in this database first')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for a repeatable request sequence')
+        parser.add_argument('--output', default=None, help='Write JSON results to this file')
+        parser.add_argument('--compare', default=None, help='Earlier JSON results to compare against')
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        mix = self.parse_mix(options['mix'])
+        if options['create_users']:
+            self.create_users(options['users'], options['password'])
+
+        chooser = random.Random(seed)
+        roles = [chooser.choices(list(mix), weights=list(mix.values()))[0] for _ in range(options['concurrency'])]
+        self.stdout.write(
+            f"Logging in {len(roles)} virtual users "
+            f"({', '.join(f'{roles.count(role)} {role}' for role in ROLES)})..."
+        )
+        sessions = []
+        for number, role in enumerate(roles):
+            session_seed = None if seed is None else seed + number
+            session = Session(options['url'], options['timeout'], defaultdict(list), session_seed)
+            session.login(f'loadtest-{role}-{number % options["users"]}', options['password'], role)
+            for action in STARTUP[role]:
+                action(session)
+            sessions.append((role, session))
+
+        self.stdout.write(f"Running for {options['duration']}s after a {options['warmup']}s warm-up...")
+        measured_from = time.monotonic() + options['warmup']
+        stop_at = measured_from + options['duration']
+        threads = [
+            threading.Thread(target=self.run_user, args=(session, role, measured_from, stop_at, options['think_time']))
+            for role, session in sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        results = defaultdict(list)
+        for _, session in sessions:
+            session.close()
+            for label, samples in session.results.items():
+                results[label].extend(samples)
+
+        report = self.build_report(results, options, mix)
+        self.print_report(report)
+        if options['compare']:
+            self.print_comparison(report, options['compare'])
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            role, _, share = part.partition(':')
+            if role not in ROLES:
+                raise CommandError(f'Unknown role in --mix: {role}')
+            mix[role] = float(share or 1)
+        return mix
+
+    def run_user(self, session, role, measured_from, stop_at, think_time):
+        weights = [weight for weight, _ in SCENARIOS[role]]
+        actions = [action for _, action in SCENARIOS[role]]
+        warming_up = True
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                return
+            if warming_up and now >= measured_from:
+                session.results.clear()
+                warming_up = False
+            session.random.choices(actions, weights=weights)[0](session)
+            if think_time:
+                time.sleep(session.random.expovariate(1 / think_time))
+
+    def build_report(self, results, options, mix):
+        duration = options['duration']
+        return {
+            'meta': {
+                'revision': git_revision(),
+                'started_at': timezone.now().isoformat(),
+                'url': options['url'],
+                'duration': duration,
+                'concurrency': options['concurrency'],
+                'mix': mix,
+                'think_time': options['think_time'],
+                'python': platform.python_version(),
+            },
+            'total': summarize([sample for samples in results.values() for sample in samples], duration),
+            'endpoints': {label: summarize(samples, duration) for label, samples in sorted(results.items())},
+        }
+
+    def print_report(self, report):
+        header = f"{'endpoint':<42} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+        self.stdout.write('\n' + header)
+        self.stdout.write('-' * len(header))
+        rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+        for label, s in rows:
+            self.stdout.write(
+                f"{label:<42} {s['requests']:>7} {s['errors']:>5} {s['throughput']:>8.1f} "
+                f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}"
+            )
+
+    def print_comparison(self, report, path):
+        with open(path) as f:
+            baseline = json.load(f)
+        self.stdout.write(f"\nCompared with {path} (revision {baseline['meta'].get('revision')}):")
+        rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+        for label, current in rows:
+            before = baseline['total'] if label == 'TOTAL' else baseline['endpoints'].get(label)
+            if not before:
+                continue
+            self.stdout.write(
+                f"{label:<42} p95 {before['p95_ms']:>8.1f} -> {current['p95_ms']:>8.1f} ms   "
+                f"req/s {before['throughput']:>8.1f} -> {current['throughput']:>8.1f}"
+            )
+
+    def create_users(self, count, password):
+        """Create loadtest accounts for every role, skipping ones that already exist"""
+        hashed = make_password(password)
+        department, _ = Department.objects.get_or_create(
+            name='Department of Computer Science',
+            defaults={'faculty': 'College of Computing'}
+        )
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=f'loadtest-{role}-{i}', email=f'loadtest-{role}-{i}@example.com',
+                     role=role, password=hashed, first_name='Load', last_name=f'Test {role} {i}')
+                for role in ROLES for i in range(count)
+            ], ignore_conflicts=True)
+            users = User.objects.filter(username__startswith='loadtest-')
+            Student.objects.bulk_create([
+                Student(user=user, college='College of Computing', department=department,
+                        year_of_study='First Year', course='Computer Science')
+                for user in users.filter(role='student', student_profile__isnull=True)
+            ])
+            Lecturer.objects.bulk_create([
+                Lecturer(user=user, department=department)
+                for user in users.filter(role='lecturer', lecturer_profile__isnull=True)
+            ])
+            AcademicRegistrar.objects.bulk_create([
+                AcademicRegistrar(user=user, college='College of Computing', department=department)
+                for user in users.filter(role='registrar', registrar_profile__isnull=True)
+            ])
+            directory.invalidate()
+        self.stdout.write(f'Ensured {count} loadtest accounts per role')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from aits import analytics
+
+
+class Command(BaseCommand):
+    help = 'Recount the issue analytics summary table from scratch'
+
+    def handle(self, *args, **options):
+        statistics = analytics.rebuild()
+        self.stdout.write(f'Rebuilt {len(statistics)} issue statistic buckets')
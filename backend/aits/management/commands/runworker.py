@@ -0,0 +1,116 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from aits import jobs
+from aits.processes import per_process_backends
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes to start')
+        parser.add_argument('--threads', type=int, default=settings.JOB_WORKER_THREADS,
+                            help='Job threads per process')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--report-interval', type=float, default=60.0,
+                            help='Seconds between job latency reports')
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due now and exit')
+
+    def handle(self, *args, **options):
+        # Jobs update unread counts and push to streams held by the web processes
+        problems = per_process_backends()
+        if problems:
+            raise CommandError('runworker needs backends shared with the web processes: ' + '; '.join(problems))
+
+        if options['once']:
+            latency = jobs.JobLatency()
+            while self.work(latency, options['threads']):
+                pass
+            self.report(latency)
+            return
+
+        if options['processes'] <= 1:
+            self.serve(options)
+            return
+
+        # Forked children must not share the parent's database connections
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=self.serve, args=(options,), daemon=False)
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+
+        def stop(signum, frame):
+            for worker in workers:
+                worker.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for worker in workers:
+            worker.join()
+
+    def serve(self, options):
+        """Run job threads in this process until it is told to stop"""
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+
+        latency = jobs.JobLatency()
+        threads = [
+            threading.Thread(target=self.loop, args=(stopping, latency, options), daemon=True)
+            for _ in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f'Worker started with {len(threads)} threads')
+
+        next_report = time.monotonic() + options['report_interval']
+        while not stopping.wait(1):
+            if time.monotonic() >= next_report:
+                jobs.requeue_stale_jobs()
+                self.report(latency)
+                next_report = time.monotonic() + options['report_interval']
+
+        # Let running jobs finish before exiting
+        for thread in threads:
+            thread.join()
+        self.report(latency)
+
+    def loop(self, stopping, latency, options):
+        while not stopping.is_set():
+            close_old_connections()
+            try:
+                claimed = self.work(latency, 1)
+            except Exception as e:
+                self.stderr.write(f'Worker error: {e}')
+                claimed = 0
+            if not claimed:
+                stopping.wait(options['poll_interval'])
+        connections.close_all()
+
+    def work(self, latency, limit):
+        claimed = jobs.claim_jobs(limit)
+        for job in claimed:
+            jobs.timed_run(job, latency)
+        return len(claimed)
+
+    def report(self, latency):
+        stats = latency.summary()
+        latency.reset()
+        if not stats['jobs']:
+            return
+        self.stdout.write(
+            f"Jobs: {stats['jobs']} ({stats['failures']} failed), "
+            f"queue wait p50 {stats['wait_p50'] * 1000:.0f} ms / p95 {stats['wait_p95'] * 1000:.0f} ms, "
+            f"run p50 {stats['run_p50'] * 1000:.0f} ms / p95 {stats['run_p95'] * 1000:.0f} ms"
+        )
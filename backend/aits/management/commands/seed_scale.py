@@ -0,0 +1,357 @@
+import bisect
+import csv
+import io
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from aits import analytics, directory
+from aits.models import AcademicRegistrar, Department, Issue, Lecturer, Notification, Student, User
+
+FIRST_NAMES = [
+    'Aisha', 'Brian', 'Catherine', 'Daniel', 'Esther', 'Frank', 'Grace', 'Henry', 'Irene', 'Joseph',
+    'Kevin', 'Lydia', 'Moses', 'Naomi', 'Oscar', 'Patience', 'Ronald', 'Sarah', 'Timothy', 'Winnie',
+]
+LAST_NAMES = [
+    'Akello', 'Byaruhanga', 'Kato', 'Mugisha', 'Nabirye', 'Nakato', 'Okello', 'Opio', 'Ssempala',
+    'Tumusiime', 'Wasswa', 'Atuhaire', 'Namubiru', 'Kiggundu', 'Achieng', 'Lubega',
+]
+DEPARTMENT_SUBJECTS = [
+    'Computer Science', 'Software Engineering', 'Information Technology', 'Library And Information System',
+    'Electrical Engineering', 'Civil Engineering', 'Mechanical Engineering', 'Mathematics', 'Statistics',
+    'Economics', 'History', 'Languages', 'Educational Psychology', 'Adult Education', 'Physics',
+]
+
+# Relative frequencies observed in real issue queues
+CATEGORY_WEIGHTS = {
+    'academic': 35, 'examination': 25, 'registration': 15, 'technical': 12, 'administrative': 9, 'other': 4,
+}
+PRIORITY_WEIGHTS = {'low': 25, 'medium': 60, 'high': 15}
+YEAR_WEIGHTS = {'First Year': 40, 'Second Year': 33, 'Third Year': 27}
+ISSUE_YEARS = {'First Year': '1', 'Second Year': '2', 'Third Year': '3'}
+# Most issues are filed during working hours
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 14, 13, 10, 12, 13, 12, 10, 8, 6, 5, 4, 3, 2, 1]
+# Status mix by issue age in days: young issues are still open, old ones resolved
+STATUS_BY_AGE = [
+    (7, {'open': 55, 'in_progress': 35, 'resolved': 8, 'closed': 2}),
+    (30, {'open': 20, 'in_progress': 30, 'resolved': 35, 'closed': 15}),
+    (None, {'open': 5, 'in_progress': 5, 'resolved': 50, 'closed': 40}),
+]
+UNASSIGNED_RATE = 0.1
+CROSS_DEPARTMENT_RATE = 0.05
+
+
+class Picker:
+    """Draw from a population with Zipf-like skew: the item at rank r has weight 1/r**s"""
+
+    def __init__(self, population, skew=1.0, weights=None):
+        self.population = list(population)
+        if weights is None:
+            random.shuffle(self.population)
+            weights = [1 / (rank + 1) ** skew for rank in range(len(self.population))]
+        self.cum_weights = list(itertools.accumulate(weights))
+
+    def pick(self):
+        return self.population[bisect.bisect(self.cum_weights, random.random() * self.cum_weights[-1])]
+
+    def sample(self, k):
+        return random.choices(self.population, cum_weights=self.cum_weights, k=k)
+
+
+def weighted(choices):
+    return Picker(choices.keys(), weights=choices.values())
+
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    return value
+
+
+class TableWriter:
+    """Insert model instances with COPY on Postgres and a single executemany elsewhere"""
+
+    def __init__(self, model, use_copy):
+        self.model = model
+        self.use_copy = use_copy
+        self.fields = model._meta.concrete_fields
+        self.table = connection.ops.quote_name(model._meta.db_table)
+        self.columns = ', '.join(connection.ops.quote_name(field.column) for field in self.fields)
+        self.written = 0
+
+    def values(self, obj):
+        # Skips pre_save, so explicit created_at/updated_at values survive auto_now
+        return [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in self.fields]
+
+    def write(self, objects):
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for obj in objects:
+                    writer.writerow([copy_value(value) for value in self.values(obj)])
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {self.table} ({self.columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+                )
+            else:
+                placeholders = ', '.join(['%s'] * len(self.fields))
+                cursor.executemany(
+                    f'INSERT INTO {self.table} ({self.columns}) VALUES ({placeholders})',
+                    [self.values(obj) for obj in objects]
+                )
+        self.written += len(objects)
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a production-sized, realistically skewed set of users, issues and notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=20)
+        parser.add_argument('--students', type=int, default=20000)
+        parser.add_argument('--lecturers', type=int, default=500)
+        parser.add_argument('--registrars', type=int, default=10)
+        parser.add_argument('--issues', type=int, default=100000)
+        parser.add_argument('--comments', type=float, default=0.5,
+                            help='Average comment notifications per issue on top of its lifecycle notifications')
+        parser.add_argument('--days', type=int, default=365, help='Spread issues over this many past days')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Zipf exponent for how unevenly issues fall on students, lecturers and departments')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--password', default='password', help='Password shared by every seeded account')
+        parser.add_argument('--prefix', default='seed', help='Username prefix for seeded accounts')
+        parser.add_argument('--random-seed', type=int, default=None)
+        parser.add_argument('--no-copy', action='store_true', help='Use INSERT batches even on Postgres')
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 and options['issues']:
+            raise CommandError('Issues need at least one student.')
+        random.seed(options['random_seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        self.now = timezone.now()
+        # Hashing is deliberately slow, so every account shares one precomputed hash
+        self.password = make_password(options['password'])
+        started = time.perf_counter()
+
+        departments = self.seed_departments()
+        students = self.seed_users('student', options['students'], departments)
+        lecturers = self.seed_users('lecturer', options['lecturers'], departments)
+        self.seed_users('registrar', options['registrars'], departments)
+        issues, notifications = self.seed_issues(students, lecturers)
+
+        # Explicit keys leave Postgres sequences behind the data
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Student, Lecturer, AcademicRegistrar, Issue, Notification]
+            ):
+                cursor.execute(sql)
+
+        # Raw inserts skip the signals that maintain the summary table and directory cache
+        analytics.rebuild()
+        directory.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(students)} students, {len(lecturers)} lecturers, {options["registrars"]} registrars, '
+            f'{issues} issues and {notifications} notifications in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def seed_departments(self):
+        faculties = [choice for choice, _ in Student.COLLEGE_CHOICES]
+        names = [f'Department of {subject}' for subject in DEPARTMENT_SUBJECTS]
+        names += [f'Department of Studies {n}' for n in range(len(names) + 1, self.options['departments'] + 1)]
+
+        departments = []
+        for name in names[:self.options['departments']]:
+            department, _ = Department.objects.get_or_create(
+                name=name, defaults={'faculty': random.choice(faculties)}
+            )
+            departments.append(department)
+        if not departments:
+            departments = list(Department.objects.all())
+        if not departments:
+            raise CommandError('No departments to attach users to.')
+        return Picker(departments, self.options['skew'])
+
+    def build_user(self, pk, role):
+        first_name = random.choice(FIRST_NAMES)
+        last_name = random.choice(LAST_NAMES)
+        username = f'{self.options["prefix"]}-{role[0]}{pk}'
+        return User(
+            pk=pk,
+            username=username,
+            email=f'{username}@example.com',
+            first_name=first_name,
+            last_name=last_name,
+            role=role,
+            password=self.password,
+            date_joined=self.now - timedelta(days=random.randint(self.options['days'], self.options['days'] + 1000))
+        )
+
+    def build_profile(self, role, pk, user, department):
+        if role == 'student':
+            year = random.choices(list(YEAR_WEIGHTS), weights=YEAR_WEIGHTS.values())[0]
+            return Student(
+                pk=pk, user=user, department=department, year_of_study=year,
+                college=self.college(department), course=random.choice(Student.COURSE_CHOICES)[0]
+            )
+        if role == 'lecturer':
+            return Lecturer(pk=pk, user=user, department=department)
+        return AcademicRegistrar(pk=pk, user=user, department=department, college=self.college(department))
+
+    def college(self, department):
+        colleges = [choice for choice, _ in Student.COLLEGE_CHOICES]
+        return department.faculty if department.faculty in colleges else random.choice(colleges)
+
+    def seed_users(self, role, total, departments):
+        """Write users and their profiles in chunks and return the profiles"""
+        profile_model = {'student': Student, 'lecturer': Lecturer, 'registrar': AcademicRegistrar}[role]
+        user_writer = TableWriter(User, self.use_copy)
+        profile_writer = TableWriter(profile_model, self.use_copy)
+        first_user, first_profile = next_pk(User), next_pk(profile_model)
+        # Registrars are spread evenly, everyone else follows department size
+        assign = itertools.cycle(departments.population).__next__ if role == 'registrar' else departments.pick
+
+        profiles = []
+        for offset in range(0, total, self.batch_size):
+            count = min(self.batch_size, total - offset)
+            users = [self.build_user(first_user + offset + i, role) for i in range(count)]
+            chunk = [
+                self.build_profile(role, first_profile + offset + i, user, assign())
+                for i, user in enumerate(users)
+            ]
+            with transaction.atomic():
+                user_writer.write(users)
+                profile_writer.write(chunk)
+            profiles.extend(chunk)
+            self.stdout.write(f'  {role}s {offset + count}/{total}')
+        return profiles
+
+    def issue_status(self, age):
+        for max_age, picker in self.status_pickers:
+            if max_age is None or age < max_age:
+                return picker.pick()
+
+    def created_at(self):
+        # Volume grows over time, so recent days get more issues
+        day = int(self.options['days'] * random.random() ** 1.6)
+        created = self.now - timedelta(days=day)
+        hour = self.hours.pick()
+        created = created.replace(hour=hour, minute=random.randint(0, 59), second=random.randint(0, 59))
+        return min(created, self.now - timedelta(minutes=random.randint(1, 60)))
+
+    def seed_issues(self, students, lecturers):
+        total = self.options['issues']
+        if not total:
+            return 0, 0
+        skew = self.options['skew']
+        self.status_pickers = [(max_age, weighted(mix)) for max_age, mix in STATUS_BY_AGE]
+        self.hours = Picker(range(24), weights=HOUR_WEIGHTS)
+        categories = weighted(CATEGORY_WEIGHTS)
+        priorities = weighted(PRIORITY_WEIGHTS)
+        course_units = [choice for choice, _ in Issue.COURSE_UNITS]
+
+        # Students raise issues, and lecturers receive them, with a heavy head
+        student_picker = Picker(students, skew)
+        lecturer_picker = Picker(lecturers, skew) if lecturers else None
+        by_department = {}
+        for lecturer in lecturers:
+            by_department.setdefault(lecturer.department_id, []).append(lecturer)
+        department_pickers = {pk: Picker(members, skew) for pk, members in by_department.items()}
+
+        issue_writer = TableWriter(Issue, self.use_copy)
+        notification_writer = TableWriter(Notification, self.use_copy)
+        first_issue, next_notification = next_pk(Issue), next_pk(Notification)
+        started = time.perf_counter()
+
+        for offset in range(0, total, self.batch_size):
+            count = min(self.batch_size, total - offset)
+            issues, notifications = [], []
+            for i, student in enumerate(student_picker.sample(count)):
+                assignee = None
+                if lecturer_picker and random.random() >= UNASSIGNED_RATE:
+                    picker = department_pickers.get(student.department_id)
+                    if picker is None or random.random() < CROSS_DEPARTMENT_RATE:
+                        picker = lecturer_picker
+                    assignee = picker.pick()
+
+                created = self.created_at()
+                age = (self.now - created).days
+                status = self.issue_status(age) if assignee else 'open'
+                updated = created
+                if status != 'open':
+                    updated = created + (self.now - created) * random.random() ** 2
+                category = categories.pick()
+                course_unit = random.choice(course_units)
+
+                issue = Issue(
+                    pk=first_issue + offset + i,
+                    title=f'{category.title()} issue in {course_unit}',
+                    description=f'Seeded {category} issue raised by {student.user.username} about {course_unit}.',
+                    category=category,
+                    status=status,
+                    priority=priorities.pick(),
+                    courseUnit=course_unit,
+                    yearOfStudy=ISSUE_YEARS[student.year_of_study],
+                    semester=random.choice('12'),
+                    student_id=student.pk,
+                    assigned_to_id=assignee.pk if assignee else None,
+                    created_at=created,
+                    updated_at=updated
+                )
+                issues.append(issue)
+
+                for recipient, notification_type, at in self.lifecycle(issue, student, assignee):
+                    notifications.append(Notification(
+                        pk=next_notification,
+                        recipient_id=recipient,
+                        notification_type=notification_type,
+                        issue_id=issue.pk,
+                        message=f'{notification_type.replace("_", " ").capitalize()}: {issue.title}',
+                        # Older notifications have almost always been read
+                        is_read=random.random() < (0.95 if (self.now - at).days > 14 else 0.4),
+                        created_at=at
+                    ))
+                    next_notification += 1
+
+            with transaction.atomic():
+                issue_writer.write(issues)
+                notification_writer.write(notifications)
+            done = offset + count
+            rate = done / (time.perf_counter() - started)
+            self.stdout.write(f'  issues {done}/{total} ({rate:.0f}/s), notifications {notification_writer.written}')
+
+        return issue_writer.written, notification_writer.written
+
+    def lifecycle(self, issue, student, assignee):
+        """Recipients, types and times of the notifications an issue would have produced"""
+        yield student.user_id, 'issue_created', issue.created_at
+        if assignee:
+            yield assignee.user_id, 'issue_assigned', issue.created_at
+        span = issue.updated_at - issue.created_at
+        if issue.status != 'open':
+            yield student.user_id, 'issue_updated', issue.created_at + span * random.random()
+        if issue.status in ('resolved', 'closed'):
+            yield student.user_id, 'issue_resolved', issue.updated_at
+        # Comments follow a geometric distribution around the configured mean
+        mean = self.options['comments']
+        while mean and random.random() < mean / (1 + mean):
+            recipient = assignee.user_id if assignee and random.random() < 0.5 else student.user_id
+            yield recipient, 'comment_added', issue.created_at + span * random.random()
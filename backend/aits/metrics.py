@@ -0,0 +1,373 @@
+"""
+Per-request instrumentation: total latency, SQL query count and time, and
+serializer time for every route, kept in in-process histograms and served
+at /metrics in the Prometheus text format.
+
+Each process keeps its own histograms. With METRICS_DIR set, every process
+also publishes them to a file there every METRICS_PUBLISH_INTERVAL seconds,
+and /metrics sums the files, so any worker can answer for all of them. When a
+worker exits, runner.py folds its file into metrics-dead.json, so totals never
+go backwards while the directory holds one file per live process; runner.py
+clears the directory when it starts. Responses also carry a Server-Timing
+header with the same numbers for the request at hand.
+"""
+
+import bisect
+import contextlib
+import contextvars
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import sync_and_async_middleware
+from django.views.decorators.http import require_GET
+
+from core.log import dropped_records
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+DEAD_FILE = 'metrics-dead.json'  # Totals of exited processes
+
+# Follows the request into sync_to_async threads, unlike a thread local
+_current = contextvars.ContextVar('aits_request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'queries', 'sql_time', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels):
+        with self._lock:
+            self.series[labels] = self.series.get(labels, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.series)
+
+    def combine(self, value, other):
+        return value + other
+
+    def render(self, series):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(series.items()):
+            lines.append(f'{self.name}{format_labels(self.labels, labels)} {value}')
+        return lines
+
+
+class DroppedLogs(Counter):
+    """Read from the log handlers rather than counted here, as logging runs outside requests"""
+
+    def snapshot(self):
+        dropped = dropped_records()
+        return {(): dropped} if dropped else {}
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # labels -> [per-bucket counts, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: [list(counts), total] for labels, (counts, total) in self.series.items()}
+
+    def combine(self, value, other):
+        return [[a + b for a, b in zip(value[0], other[0])], value[1] + other[1]]
+
+    def render(self, series):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                bucket = format_labels(self.labels, labels, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{bucket} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(self.labels, labels)} {total}')
+            lines.append(f'{self.name}_count{format_labels(self.labels, labels)} {cumulative}')
+        return lines
+
+
+REQUESTS = Counter('aits_requests_total', 'Requests served.', ('route', 'method', 'status'))
+LATENCY = Histogram(
+    'aits_request_duration_seconds', 'Time from the metrics middleware to the response.',
+    ('route', 'method'), LATENCY_BUCKETS
+)
+QUERIES = Histogram('aits_request_queries', 'SQL queries run per request.', ('route', 'method'), QUERY_BUCKETS)
+SQL_TIME = Histogram(
+    'aits_request_sql_seconds', 'Time spent in SQL queries per request.', ('route', 'method'), LATENCY_BUCKETS
+)
+SERIALIZER_TIME = Histogram(
+    'aits_request_serializer_seconds', 'Time spent building serializer data per request, excluding its queries.',
+    ('route', 'method'), LATENCY_BUCKETS
+)
+DROPPED_LOGS = DroppedLogs('aits_log_records_dropped_total', 'Log records dropped while the log queue was full.', ())
+METRICS = (REQUESTS, LATENCY, QUERIES, SQL_TIME, SERIALIZER_TIME, DROPPED_LOGS)
+
+
+_publish_lock = threading.Lock()
+_started_at = time.time_ns()
+_published_at = 0
+
+
+def reset():
+    """Forget this process's series and publish them under a new file"""
+    global _started_at, _published_at
+    for metric in METRICS:
+        with metric._lock:
+            metric.series.clear()
+    _started_at, _published_at = time.time_ns(), 0
+
+
+# A forked child starts with its parent's numbers, which the parent reports itself
+os.register_at_fork(after_in_child=reset)
+
+
+def store_path():
+    # The start time keeps a reused pid from overwriting an exited process's file
+    return os.path.join(settings.METRICS_DIR, f'metrics-{os.getpid()}-{_started_at}.json')
+
+
+def read(path):
+    """A metrics file as {metric name: [[labels, value], ...]}, empty if it is missing or partial"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write(path, collected):
+    # Write then rename so scrapes never read a partial file
+    data = {name: [[list(labels), value] for labels, value in series.items()] for name, series in collected.items()}
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def merge(collected, data):
+    for metric in METRICS:
+        series = collected[metric.name]
+        for labels, value in data.get(metric.name, []):
+            labels = tuple(labels)
+            series[labels] = metric.combine(series[labels], value) if labels in series else value
+
+
+@contextlib.contextmanager
+def locked(exclusive):
+    """Hold METRICS_DIR's lock, so no scrape sees an exited process both in its own file and folded"""
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(os.path.join(settings.METRICS_DIR, 'metrics.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def publish(force=False):
+    """Write this process's series to METRICS_DIR, at most every METRICS_PUBLISH_INTERVAL seconds"""
+    global _published_at
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _published_at < settings.METRICS_PUBLISH_INTERVAL:
+        return
+    # Skip rather than wait while another thread is publishing
+    if not _publish_lock.acquire(blocking=False):
+        return
+    try:
+        _published_at = now
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        write(store_path(), {metric.name: metric.snapshot() for metric in METRICS})
+    finally:
+        _publish_lock.release()
+
+
+def retire(pid):
+    """Fold the files an exited process published into metrics-dead.json and delete them"""
+    if not settings.METRICS_DIR:
+        return
+    with locked(exclusive=True):
+        paths = glob.glob(os.path.join(settings.METRICS_DIR, f'metrics-{pid}-*.json'))
+        if not paths:
+            return
+        dead_path = os.path.join(settings.METRICS_DIR, DEAD_FILE)
+        collected = {metric.name: {} for metric in METRICS}
+        for path in [dead_path] + paths:
+            merge(collected, read(path))
+        write(dead_path, collected)
+        for path in paths:
+            os.unlink(path)
+
+
+def collect():
+    """Every metric's series, summed over all processes publishing to METRICS_DIR"""
+    if not settings.METRICS_DIR:
+        return {metric.name: metric.snapshot() for metric in METRICS}
+
+    publish(force=True)
+    collected = {metric.name: {} for metric in METRICS}
+    with locked(exclusive=False):
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, 'metrics-*.json')):
+            merge(collected, read(path))
+    return collected
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request's totals"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - start
+
+
+def instrument_connection(sender, connection, **kwargs):
+    # Runs on every (re)connect of the same wrapper, so only add it once
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def instrument_serializers():
+    """Time serializer.data, the single point where DRF builds a representation"""
+    from rest_framework.serializers import BaseSerializer
+
+    build_data = BaseSerializer.data.fget
+    if getattr(build_data, 'instrumented', False):
+        return
+
+    def data(self):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return build_data(self)
+        metrics.serializing = True
+        start, sql_time = time.perf_counter(), metrics.sql_time
+        try:
+            return build_data(self)
+        finally:
+            # Lazy querysets run inside to_representation; count those as SQL time
+            metrics.serializer_time += time.perf_counter() - start - (metrics.sql_time - sql_time)
+            metrics.serializing = False
+
+    data.instrumented = True
+    BaseSerializer.data = property(data)
+
+
+def route_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.route:
+        return 'unmatched'
+    # The same endpoint is routed with and without a trailing slash
+    return '/' + match.route.rstrip('/')
+
+
+def finish(request, response, metrics):
+    elapsed = time.perf_counter() - metrics.started
+    labels = (route_label(request), request.method if request.method in METHODS else 'other')
+    REQUESTS.inc(labels + (str(response.status_code),))
+    LATENCY.observe(labels, elapsed)
+    QUERIES.observe(labels, metrics.queries)
+    SQL_TIME.observe(labels, metrics.sql_time)
+    SERIALIZER_TIME.observe(labels, metrics.serializer_time)
+    publish()
+
+    response['Server-Timing'] = (
+        f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries", '
+        f'serialize;dur={metrics.serializer_time * 1000:.1f}, '
+        f'total;dur={elapsed * 1000:.1f}'
+    )
+    return response
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    if not settings.METRICS_ENABLED:
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            return finish(request, response, metrics)
+    else:
+        def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            return finish(request, response, metrics)
+
+    return middleware
+
+
+@require_GET
+def metrics_view(request):
+    """Every histogram and counter in the Prometheus text exposition format"""
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), expected):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG:
+        # Without a token only local development may read the metrics
+        return HttpResponse(status=403)
+
+    lines = []
+    collected = collect()
+    for metric in METRICS:
+        lines.extend(metric.render(collected[metric.name]))
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 12:20
+
+import aits.storage
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aits', '0004_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='issue',
+            name='attachment',
+            field=models.FileField(blank=True, null=True, storage=aits.storage.get_attachment_storage, upload_to='issue_attachments/%Y/%m/%d/'),
+        ),
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.IntegerField(default=0)),
+                ('last_uploaded_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('ref_count__lte', 0)), fields=['last_uploaded_at'], name='blob_unreferenced_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+from django.db import migrations
+
+# Postgres keeps a weighted tsvector as a stored generated column with a GIN index
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE aits_issue ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce("courseUnit", '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX issue_search_idx ON aits_issue USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS issue_search_idx",
+    "ALTER TABLE aits_issue DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite uses an external-content FTS5 table kept in sync by triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE aits_issue_fts USING fts5(
+        title, description, "courseUnit",
+        content='aits_issue', content_rowid='issue_id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    INSERT INTO aits_issue_fts (rowid, title, description, "courseUnit")
+    SELECT issue_id, title, description, "courseUnit" FROM aits_issue
+    """,
+    """
+    CREATE TRIGGER aits_issue_fts_insert AFTER INSERT ON aits_issue BEGIN
+        INSERT INTO aits_issue_fts (rowid, title, description, "courseUnit")
+        VALUES (new.issue_id, new.title, new.description, new."courseUnit");
+    END
+    """,
+    """
+    CREATE TRIGGER aits_issue_fts_delete AFTER DELETE ON aits_issue BEGIN
+        INSERT INTO aits_issue_fts (aits_issue_fts, rowid, title, description, "courseUnit")
+        VALUES ('delete', old.issue_id, old.title, old.description, old."courseUnit");
+    END
+    """,
+    """
+    CREATE TRIGGER aits_issue_fts_update AFTER UPDATE OF title, description, "courseUnit" ON aits_issue BEGIN
+        INSERT INTO aits_issue_fts (aits_issue_fts, rowid, title, description, "courseUnit")
+        VALUES ('delete', old.issue_id, old.title, old.description, old."courseUnit");
+        INSERT INTO aits_issue_fts (rowid, title, description, "courseUnit")
+        VALUES (new.issue_id, new.title, new.description, new."courseUnit");
+    END
+    """,
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS aits_issue_fts_update",
+    "DROP TRIGGER IF EXISTS aits_issue_fts_delete",
+    "DROP TRIGGER IF EXISTS aits_issue_fts_insert",
+    "DROP TABLE IF EXISTS aits_issue_fts",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aits', '0005_attachment_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_statements({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
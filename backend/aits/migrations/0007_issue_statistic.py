@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 12:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_issues(apps, schema_editor):
+    Issue = apps.get_model('aits', 'Issue')
+    IssueStatistic = apps.get_model('aits', 'IssueStatistic')
+    fields = {
+        'status': 'status',
+        'category': 'category',
+        'priority': 'priority',
+        'department': 'student__department_id',
+        'courseUnit': 'courseUnit',
+    }
+    statistics = []
+    for dimension, field in fields.items():
+        for row in Issue.objects.values(field).annotate(count=Count('pk')).order_by():
+            value = '' if row[field] is None else str(row[field])
+            statistics.append(IssueStatistic(dimension=dimension, value=value, count=row['count']))
+    IssueStatistic.objects.bulk_create(statistics)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aits', '0006_issue_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('status', 'Status'), ('category', 'Category'), ('priority', 'Priority'), ('department', 'Department'), ('courseUnit', 'Course Unit')], max_length=20)),
+                ('value', models.CharField(blank=True, max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'value'), name='issue_statistic_bucket')],
+            },
+        ),
+        migrations.RunPython(count_existing_issues, migrations.RunPython.noop),
+    ]
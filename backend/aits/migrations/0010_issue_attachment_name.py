@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 13:02
+
+import importlib
+
+from django.db import migrations, models
+
+issue_search = importlib.import_module('aits.migrations.0006_issue_search')
+
+
+def restore_search_triggers(apps, schema_editor):
+    # SQLite adds and drops the column by remaking aits_issue, which loses its triggers
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in issue_search.SQLITE_REVERSE[:3] + issue_search.SQLITE_FORWARD[2:]:
+        schema_editor.execute(statement)
+    schema_editor.execute("INSERT INTO aits_issue_fts (aits_issue_fts) VALUES ('rebuild')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aits', '0009_refresh_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='issue',
+            name='attachment_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
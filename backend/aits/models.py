@@ -1,8 +1,12 @@
 # Import Django modules
-from django.db import models
+import os
+
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from .storage import get_attachment_storage
+
 
 # User model with role-based authentication
 class User(AbstractUser):
@@ -15,6 +19,9 @@ class User(AbstractUser):
     
     role = models.CharField(max_length=10, choices=ROLES, default='student')
     email = models.EmailField(unique=True)
+    
+    # Bumped to invalidate tokens issued before a role change
+    token_version = models.PositiveIntegerField(default=0)
 
     # Add custom related names to avoid clashes with default User model
     groups = models.ManyToManyField(
@@ -32,6 +39,23 @@ class User(AbstractUser):
         verbose_name='user permissions',
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the stored role so save() can tell when it changes
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_role = instance.__dict__.get('role')
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded_role = getattr(self, '_loaded_role', None)
+        if loaded_role is not None and loaded_role != self.role:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_role = self.role
+
     def __str__(self):
         return self.username
 
@@ -103,6 +127,11 @@ class Student(models.Model):
     year_of_study = models.CharField(max_length=20, choices=YEAR_CHOICES)
     course = models.CharField(max_length=100, choices=COURSE_CHOICES)
 
+    def save(self, *args, **kwargs):
+        # Statistics move this student's issues to a new department before the save commits
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return self.user.get_full_name()
 
@@ -191,12 +220,15 @@ class Issue(models.Model):
     yearOfStudy = models.CharField(max_length=1, choices=YEAR_CHOICES, null=True, blank=True)
     semester = models.CharField(max_length=1, choices=SEMESTER_CHOICES, null=True, blank=True)
     
-    # File attachments
+    # File attachments, stored once per distinct content
     attachment = models.FileField(
         upload_to='issue_attachments/%Y/%m/%d/',
+        storage=get_attachment_storage,
         null=True,
         blank=True
     )
+    # Name the file was uploaded under, as storage names it after its content
+    attachment_name = models.CharField(max_length=255, blank=True)
     
     # Relationships
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='issues')
@@ -212,11 +244,46 @@ class Issue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Indexes matching the issue list filters and their newest-first ordering
+        indexes = [
+            models.Index(fields=['-created_at', '-issue_id'], name='issue_created_idx'),
+            models.Index(fields=['student', '-created_at', '-issue_id'], name='issue_student_created_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='issue_assignee_status_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-issue_id'], name='issue_assignee_created_idx'),
+            models.Index(fields=['updated_at'], name='issue_updated_idx'),
+        ]
+
+    # Fields the analytics summary counts issues by
+    TRACKED_FIELDS = ('status', 'category', 'priority', 'courseUnit', 'student_id')
+    TRACKED_UPDATE_FIELDS = {'status', 'category', 'priority', 'courseUnit', 'student', 'student_id'}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the stored attachment so its reference can be moved on change
+        instance = super().from_db(db, field_names, values)
+        loaded = instance.__dict__
+        if 'attachment' in loaded:
+            instance._loaded_attachment = loaded['attachment']
+        return instance
+
     def save(self, *args, **kwargs):
         # Set priority based on category if not already set
         if not self.priority:
             self.priority = self.get_priority_for_category()
-        super().save(*args, **kwargs)
+        # Keep the uploaded file's name before storage replaces it
+        if 'attachment' not in self.get_deferred_fields():
+            if self.attachment and not self.attachment._committed:
+                self.attachment_name = os.path.basename(self.attachment.name)[:255]
+            elif not self.attachment:
+                self.attachment_name = ''
+        # Statistics lock the stored row and move its counts before the save commits
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    def get_attachment_name(self):
+        # Issues uploaded before attachment_name existed fall back to the stored name
+        return self.attachment_name or os.path.basename(self.attachment.name or '')
 
     def get_priority_for_category(self):
         # Default priorities for different issue categories
@@ -234,6 +301,50 @@ class Issue(models.Model):
         return f"{self.title} - {self.student}"
 
 
+# Running issue counts per bucket, so analytics never scans the issue table
+class IssueStatistic(models.Model):
+    # Issue attributes the counts are grouped by
+    DIMENSIONS = (
+        ('status', 'Status'),
+        ('category', 'Category'),
+        ('priority', 'Priority'),
+        ('department', 'Department'),
+        ('courseUnit', 'Course Unit'),
+    )
+
+    dimension = models.CharField(max_length=20, choices=DIMENSIONS)
+    value = models.CharField(max_length=100, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'value'], name='issue_statistic_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.value}: {self.count}"
+
+
+# Stored attachment content shared by every issue that uploaded the same file
+class AttachmentBlob(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    
+    # Number of issues pointing at this blob
+    ref_count = models.IntegerField(default=0)
+    last_uploaded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # Cleanup scans only blobs nothing refers to
+        indexes = [
+            models.Index(fields=['last_uploaded_at'], condition=models.Q(ref_count__lte=0), name='blob_unreferenced_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
 # Notification model for system notifications
 class Notification(models.Model):
     # Types of notifications
@@ -253,5 +364,69 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        # Indexes matching the notification list and the unread count
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_recipient_idx'),
+            models.Index(
+                fields=['recipient', '-created_at'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type} for {self.recipient.username}"
+
+
+# Job model for work deferred to the background worker
+class Job(models.Model):
+    # Job lifecycle states
+    STATUSES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    # Dotted path of the function to run and its keyword arguments
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+
+    # Progress and retry bookkeeping
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+
+    # Timestamps
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Workers only ever scan jobs that are waiting to run
+        indexes = [
+            models.Index(fields=['run_at'], condition=models.Q(status='queued'), name='job_queued_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+# Refresh token issued at login, stored only as a digest of the token
+class RefreshToken(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_tokens')
+    token_hash = models.CharField(max_length=64, unique=True)
+
+    # Tokens rotated from the same login share a family, revoked together on reuse
+    family = models.CharField(max_length=32, db_index=True)
+    token_version = models.PositiveIntegerField()
+
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+    used_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
-        return f"{self.notification_type} for {self.recipient.username}"
\ No newline at end of file
+        return f"Refresh token for {self.user.username}"
@@ -0,0 +1,94 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from . import events, jobs, notification_counts
+from .models import Notification
+from .serializers import CompactNotificationSerializer
+
+_active_batch = ContextVar('aits_notification_batch', default=None)
+
+
+class NotificationBatch:
+    """Notifications collected during a request and inserted together"""
+
+    def __init__(self):
+        self.notifications = []
+
+    def add(self, notification):
+        self.notifications.append(notification)
+
+    def to_payload(self):
+        return [
+            {
+                'recipient_id': n.recipient_id,
+                'notification_type': n.notification_type,
+                'issue_id': n.issue_id,
+                'message': n.message,
+                'created_at': n.created_at.isoformat(),
+            }
+            for n in self.notifications
+        ]
+
+    def flush(self):
+        """Insert the collected notifications with one query and announce them"""
+        if not self.notifications:
+            return []
+        notifications = Notification.objects.bulk_create(self.notifications)
+        self.notifications = []
+
+        for recipient_id, count in Counter(n.recipient_id for n in notifications).items():
+            notification_counts.adjust_unread_count(recipient_id, count)
+
+        # Push the new notifications to their recipients' open streams
+        for notification in notifications:
+            if events.has_subscribers(notification.recipient_id):
+                data = CompactNotificationSerializer(notification).data
+                events.publish(notification.recipient_id, 'notification', data)
+        return notifications
+
+
+def deliver_notifications(notifications):
+    """Job that inserts a committed batch of notifications"""
+    batch = NotificationBatch()
+    for values in notifications:
+        batch.add(Notification(
+            recipient_id=values['recipient_id'],
+            notification_type=values['notification_type'],
+            issue_id=values['issue_id'],
+            message=values['message'],
+            created_at=parse_datetime(values['created_at'])
+        ))
+    batch.flush()
+
+
+def get_active_batch():
+    return _active_batch.get()
+
+
+@contextmanager
+def notification_batch():
+    """Run a block in a transaction and deliver its notifications once it commits
+
+    create_notification() calls made inside the block are collected and handed
+    to one deliver_notifications job, so a rolled-back block leaves no
+    notifications behind. Nested blocks share the outermost batch.
+    """
+    batch = get_active_batch()
+    if batch is not None:
+        with transaction.atomic():
+            yield batch
+        return
+
+    batch = NotificationBatch()
+    token = _active_batch.set(batch)
+    try:
+        with transaction.atomic():
+            yield batch
+            if batch.notifications:
+                jobs.enqueue(deliver_notifications, notifications=batch.to_payload())
+    finally:
+        _active_batch.reset(token)
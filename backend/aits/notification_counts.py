@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import events
+from .models import Notification
+
+
+def unread_count_key(user_id):
+    return f'aits:unread-count:{user_id}'
+
+
+def get_unread_count(user_id):
+    """Return a user's unread notification count, counting only on a cache miss"""
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        # add() so a concurrent increment is not overwritten by this recount
+        cache.add(key, count, settings.UNREAD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+async def aget_unread_count(user_id):
+    key = unread_count_key(user_id)
+    count = await cache.aget(key)
+    if count is None:
+        count = await Notification.objects.filter(recipient_id=user_id, is_read=False).acount()
+        await cache.aadd(key, count, settings.UNREAD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """Apply a change to the cached count once the current transaction commits"""
+    def apply():
+        key = unread_count_key(user_id)
+        try:
+            count = cache.incr(key, delta)
+        except ValueError:
+            # Nothing cached yet, the next read will count from the database
+            return
+        if count < 0:
+            cache.delete(key)
+        publish_unread_count(user_id)
+
+    transaction.on_commit(apply)
+
+
+def set_unread_count(user_id, count):
+    """Store a known count once the current transaction commits"""
+    def apply():
+        cache.set(unread_count_key(user_id), count, settings.UNREAD_COUNT_CACHE_TIMEOUT)
+        publish_unread_count(user_id)
+
+    transaction.on_commit(apply)
+
+
+def reset_unread_counts(user_ids):
+    """Drop cached counts so they are recounted on the next read"""
+    def apply():
+        cache.delete_many([unread_count_key(user_id) for user_id in user_ids])
+        for user_id in user_ids:
+            publish_unread_count(user_id)
+
+    transaction.on_commit(apply)
+
+
+def publish_unread_count(user_id):
+    """Push the current count to the user's open notification streams"""
+    if events.has_subscribers(user_id):
+        events.publish(user_id, 'unread_count', {'count': get_unread_count(user_id)})
@@ -0,0 +1,178 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_page_size(request, param):
+    """Read a client page size, clamped to API_MAX_PAGE_SIZE"""
+    try:
+        page_size = int(request.query_params[param])
+    except (KeyError, ValueError):
+        return settings.API_PAGE_SIZE
+    return max(1, min(page_size, settings.API_MAX_PAGE_SIZE))
+
+
+class KeysetPagination(BasePagination):
+    """Newest-first pagination on (created_at, pk) without OFFSET or COUNT"""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('-created_at', '-pk')
+
+    def is_requested(self, request):
+        # Clients opt in by asking for a page, so existing callers still get full lists
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        return get_page_size(request, self.page_size_query_param)
+
+    def encode_cursor(self, obj):
+        position = f'{obj.created_at.isoformat()}|{obj.pk}'
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = base64.urlsafe_b64decode(encoded.encode()).decode()
+            created_at, pk = position.rsplit('|', 1)
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def seek(self, queryset, position):
+        created_at, pk = position
+        return queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+
+    def get_page_queryset(self, queryset, request):
+        """The unevaluated query for the requested page, or None if none was requested"""
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        # Seek past the last row of the previous page
+        position = self.decode_cursor(request)
+        if position:
+            queryset = self.seek(queryset, position)
+
+        # Fetch one extra row to learn whether another page exists
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class DirectoryPagination(KeysetPagination):
+    """Keyset pagination in pk order for the student and lecturer directories"""
+    ordering = ('pk',)
+
+    def encode_cursor(self, obj):
+        return base64.urlsafe_b64encode(str(obj.pk).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            return int(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def seek(self, queryset, position):
+        return queryset.filter(pk__gt=position)
+
+
+class RankedPagination(BasePagination):
+    """Numbered pages for relevance-ordered results, without a COUNT(*)"""
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = get_page_size(request, self.page_size_query_param)
+        try:
+            self.page_number = max(1, int(request.query_params.get(self.page_query_param, 1)))
+        except ValueError:
+            raise NotFound('Invalid page')
+
+        # Ranked results cannot seek by key, so cap how deep clients can page
+        offset = (self.page_number - 1) * self.page_size
+        if offset >= settings.API_MAX_SEARCH_RESULTS:
+            raise NotFound('Invalid page')
+
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = (
+            len(rows) > self.page_size and offset + self.page_size < settings.API_MAX_SEARCH_RESULTS
+        )
+        return rows[:self.page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
@@ -1,5 +1,6 @@
 # Import required modules
 from rest_framework import permissions
+from .authentication import get_request_profile_id
 from .models import Issue, Lecturer, Student, AcademicRegistrar, Department
 
 
@@ -18,7 +19,8 @@ class IsStudent(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Only allow access to student's own issues
         if isinstance(obj, Issue):
-            return obj.student.user == request.user
+            profile_id = get_request_profile_id(request)
+            return profile_id is not None and obj.student_id == profile_id
         return False
 
 
@@ -37,8 +39,8 @@ class IsLecturer(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Only allow access to issues assigned to this lecturer
         if isinstance(obj, Issue):
-            lecturer = Lecturer.objects.get(user=request.user)
-            return obj.assigned_to == lecturer
+            profile_id = get_request_profile_id(request)
+            return profile_id is not None and obj.assigned_to_id == profile_id
         return False
 
 
@@ -0,0 +1,27 @@
+"""
+Backends that keep their state in the memory of one process.
+
+Unread counts, the directory and reference data versions and notification
+streams all live in the default cache and NOTIFICATION_BROKER. Once more than
+one process serves the API, or runworker delivers jobs beside it, both must be
+shared between processes, so runner.py and runworker refuse to start without.
+"""
+
+from django.conf import settings
+
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+PER_PROCESS_BROKERS = {'aits.events.InProcessBroker'}
+
+
+def per_process_backends():
+    """Describe each configured backend that other processes cannot see"""
+    problems = []
+    cache_backend = settings.CACHES['default']['BACKEND']
+    if cache_backend in PER_PROCESS_CACHES:
+        problems.append(f'CACHES uses {cache_backend}; set CACHE_BACKEND and CACHE_LOCATION to a shared cache')
+    if settings.NOTIFICATION_BROKER in PER_PROCESS_BROKERS:
+        problems.append(f'NOTIFICATION_BROKER is {settings.NOTIFICATION_BROKER}; use aits.events.PostgresBroker')
+    return problems
@@ -0,0 +1,136 @@
+"""
+Reference data read on every registration: departments, the department to
+faculty map and the model choice tables.
+
+Choice maps are built once at import. Departments are held in memory per
+process and reloaded when the version in the default cache changes, which the
+signals in signals.py bump whenever a department is written. The version is
+only shared when the cache is (see processes.py), and departments are reloaded
+after REFERENCE_MAX_AGE seconds regardless.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AcademicRegistrar, Department, Issue, Notification, Student, User
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'aits:reference:version'
+
+# Departments offered at registration and the faculty each belongs to
+DEPARTMENT_FACULTY_MAP = {
+    'Department of Computer Science': 'College of Computing',
+    'Department Of Software Engineering': 'College of Computing',
+    'Department of Library And Information System': 'College Of Humanity And Social Sciences',
+    'Department Of Information Technology': 'College of Computing'
+}
+# Faculty given to a department first named by a registration outside the map
+DEFAULT_FACULTY = 'Faculty of Computing'
+
+CHOICE_TABLES = {
+    'roles': User.ROLES,
+    'colleges': Student.COLLEGE_CHOICES,
+    'courses': Student.COURSE_CHOICES,
+    'years_of_study': Student.YEAR_CHOICES,
+    'registrar_colleges': AcademicRegistrar.COLLEGE_CHOICES,
+    'issue_categories': Issue.CATEGORIES,
+    'issue_statuses': Issue.STATUSES,
+    'issue_priorities': Issue.PRIORITIES,
+    'course_units': Issue.COURSE_UNITS,
+    'issue_years': Issue.YEAR_CHOICES,
+    'semesters': Issue.SEMESTER_CHOICES,
+    'notification_types': Notification.NOTIFICATION_TYPES,
+}
+CHOICES = {name: dict(table) for name, table in CHOICE_TABLES.items()}
+
+_lock = threading.Lock()
+_departments = None  # (version, loaded at, {name: Department})
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost counter never reuses an old version
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, int(time.time() * 1000), None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    """Make every process reload its departments once the current transaction commits"""
+    def apply():
+        global _departments
+        _departments = None
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            # No version yet, so nothing has been loaded
+            pass
+
+    transaction.on_commit(apply)
+
+
+def is_current(loaded, version):
+    return loaded is not None and loaded[0] == version and time.monotonic() - loaded[1] < settings.REFERENCE_MAX_AGE
+
+
+def get_departments():
+    """Return (version, {name: Department}) for the current version"""
+    global _departments
+    version = get_version()
+    loaded = _departments
+    if not is_current(loaded, version):
+        with _lock:
+            if not is_current(_departments, version):
+                departments = {department.name: department for department in Department.objects.all()}
+                _departments = (version, time.monotonic(), departments)
+            loaded = _departments
+    return loaded[0], loaded[2]
+
+
+def get_department(name, faculty=None):
+    """Return the named department, creating it if no process has seen it yet"""
+    department = get_departments()[1].get(name)
+    if department is None:
+        department, created = Department.objects.get_or_create(
+            name=name,
+            defaults={'faculty': faculty or DEPARTMENT_FACULTY_MAP.get(name, DEFAULT_FACULTY)}
+        )
+        if created:
+            logger.info('Department created', extra={'department': department.name, 'faculty': department.faculty})
+    return department
+
+
+def choice_error(label, name):
+    return f"Invalid {label}. Must be one of: {', '.join(CHOICES[name])}"
+
+
+def as_json():
+    """Everything the registration and issue forms need, tagged with its version"""
+    version, departments = get_departments()
+    return {
+        'version': version,
+        'departments': [
+            {'id': department.pk, 'name': department.name, 'faculty': department.faculty}
+            for department in sorted(departments.values(), key=lambda department: department.name)
+        ],
+        'department_faculties': DEPARTMENT_FACULTY_MAP,
+        'choices': {
+            name: [{'value': value, 'label': label} for value, label in table]
+            for name, table in CHOICE_TABLES.items()
+        },
+    }
@@ -0,0 +1,268 @@
+"""
+Bulk import of student and lecturer rosters from CSV or NDJSON.
+
+Rows are checked against usernames, emails and departments loaded once up
+front, passwords are hashed in a process pool while the previous chunk is
+written, and accounts go in with chunked bulk_create. Invalid rows are
+reported by line number and skipped; the rest are imported.
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from . import directory, reference
+from .models import Department, Lecturer, Student, User
+
+FORMATS = ('csv', 'ndjson')
+ROLE_FIELDS = {
+    'student': ('college', 'department', 'year_of_study', 'course'),
+    'lecturer': ('department',),
+}
+REQUIRED_FIELDS = ('username', 'email', 'password', 'first_name')
+CHOICE_FIELDS = {
+    'college': reference.CHOICES['colleges'],
+    'year_of_study': reference.CHOICES['years_of_study'],
+    'course': reference.CHOICES['courses'],
+}
+# Below this many passwords a chunk is hashed inline rather than starting workers
+POOL_THRESHOLD = 50
+
+
+def detect_format(name='', content_type=''):
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    return 'csv'
+
+
+def read_rows(stream, format):
+    """Yield (line number, row dict or None, error) from a text stream"""
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key.strip(): (value or '').strip() for key, value in row.items() if key}, None
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Each line must be a JSON object'
+            continue
+        yield line_number, {key: str(value).strip() for key, value in row.items() if value is not None}, None
+
+
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class RosterImport:
+    """Validate and create the accounts in a roster, collecting per-row errors"""
+
+    def __init__(self, role=None, batch_size=None, workers=None, dry_run=False):
+        self.role = role
+        self.batch_size = batch_size or settings.ROSTER_IMPORT_BATCH_SIZE
+        self.workers = workers or settings.ROSTER_IMPORT_WORKERS
+        self.dry_run = dry_run
+        self.valid = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.departments_created = []
+
+        # One query each instead of two existence checks and a lookup per row
+        self.usernames = set(User.objects.values_list('username', flat=True))
+        self.emails = {email.lower() for email in User.objects.values_list('email', flat=True)}
+        # Copied, as departments named only in this roster are added to it
+        self.departments = dict(reference.get_departments()[1])
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < settings.ROSTER_MAX_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def clean(self, row):
+        """Return (cleaned row, errors) for one roster row"""
+        # Accept the lecturer registration field names as well
+        row.setdefault('username', row.get('userId', ''))
+        if not row.get('first_name') and row.get('fullName'):
+            row['first_name'], _, row['last_name'] = row['fullName'].partition(' ')
+        row['role'] = row.get('role') or self.role or ''
+
+        errors = {}
+        if row['role'] not in ROLE_FIELDS:
+            errors['role'] = f'Must be one of: {", ".join(ROLE_FIELDS)}'
+            return row, errors
+
+        for field in REQUIRED_FIELDS + ROLE_FIELDS[row['role']]:
+            if not row.get(field):
+                errors[field] = 'This field is required.'
+        for field, choices in CHOICE_FIELDS.items():
+            if row['role'] == 'student' and row.get(field) and row[field] not in choices:
+                errors[field] = f'Must be one of: {", ".join(choices)}'
+
+        if row.get('email'):
+            try:
+                validate_email(row['email'])
+            except ValidationError:
+                errors['email'] = 'Enter a valid email address.'
+            if row['email'].lower() in self.emails:
+                errors['email'] = 'This email is already registered'
+        if row.get('username') in self.usernames:
+            errors['username'] = 'This username is already taken'
+        return row, errors
+
+    def get_department(self, name, faculty):
+        department = self.departments.get(name)
+        if department is None:
+            department = Department(
+                name=name,
+                faculty=faculty or reference.DEPARTMENT_FACULTY_MAP.get(name, reference.DEFAULT_FACULTY)
+            )
+            if not self.dry_run:
+                department, _ = Department.objects.get_or_create(name=name, defaults={'faculty': department.faculty})
+            self.departments[name] = department
+            self.departments_created.append(name)
+        return department
+
+    def validate(self, rows):
+        """Keep the valid rows of a chunk and claim their usernames and emails"""
+        valid = []
+        for line, row, error in rows:
+            if error:
+                self.add_error(line, {'row': error})
+                continue
+            row, errors = self.clean(row)
+            if errors:
+                self.add_error(line, errors)
+                continue
+            # Later rows in the same file must not reuse these either
+            self.usernames.add(row['username'])
+            self.emails.add(row['email'].lower())
+            row['department'] = self.get_department(row['department'], row.get('faculty'))
+            valid.append((line, row))
+        self.valid += len(valid)
+        return valid
+
+    def hash_passwords(self, pool, rows):
+        passwords = [row['password'] for _, row in rows]
+        if pool is None or len(passwords) < POOL_THRESHOLD:
+            return map(make_password, passwords)
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return pool.map(make_password, passwords, chunksize=chunksize)
+
+    def build(self, row, password_hash):
+        user = User(
+            username=row['username'],
+            email=row['email'],
+            first_name=row['first_name'],
+            last_name=row.get('last_name', ''),
+            role=row['role'],
+            password=password_hash
+        )
+        if row['role'] == 'student':
+            profile = Student(
+                user=user,
+                college=row['college'],
+                department=row['department'],
+                year_of_study=row['year_of_study'],
+                course=row['course']
+            )
+        else:
+            profile = Lecturer(user=user, department=row['department'])
+        return user, profile
+
+    def write(self, rows, hashes):
+        accounts = [self.build(row, password_hash) for (_, row), password_hash in zip(rows, hashes)]
+        try:
+            with transaction.atomic():
+                self.insert(accounts)
+            self.created += len(accounts)
+        except IntegrityError:
+            # Someone registered a clashing account meanwhile; find the rows one by one
+            for (line, _), account in zip(rows, accounts):
+                try:
+                    with transaction.atomic():
+                        self.insert([account])
+                    self.created += 1
+                except IntegrityError:
+                    self.add_error(line, {'username': 'This username or email is already taken'})
+
+    def insert(self, accounts):
+        # bulk_create sets each user's pk, which the profiles then pick up
+        User.objects.bulk_create([user for user, _ in accounts])
+        for model in (Student, Lecturer):
+            profiles = [profile for _, profile in accounts if isinstance(profile, model)]
+            if profiles:
+                model.objects.bulk_create(profiles)
+
+    def run(self, rows):
+        """Import every row and return the summary"""
+        with ExitStack() as stack:
+            pool = None
+            pending = None
+            for chunk in chunks(rows, self.batch_size):
+                valid = self.validate(chunk)
+                if self.dry_run or not valid:
+                    continue
+
+                if pool is None and self.workers > 1 and len(valid) >= POOL_THRESHOLD:
+                    # Spawn rather than fork, which is unsafe in a threaded web server.
+                    # Spawned workers start without Django configured
+                    pool = stack.enter_context(ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=django.setup
+                    ))
+                # Hash this chunk while the previous one is written
+                hashes = self.hash_passwords(pool, valid)
+                if pending:
+                    self.write(*pending)
+                pending = (valid, hashes)
+            if pending:
+                self.write(*pending)
+
+        if self.created:
+            directory.invalidate()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'valid': self.valid,
+            'created': self.created,
+            'departments_created': self.departments_created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'dry_run': self.dry_run,
+        }
+
+
+def import_roster(file, format=None, **options):
+    """Import a roster from a binary file object"""
+    stream = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        return RosterImport(**options).run(read_rows(stream, format or 'csv'))
+    finally:
+        stream.detach()
@@ -0,0 +1,63 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+_fts5_table_found = False
+
+
+def has_fts5_table():
+    global _fts5_table_found
+    if not _fts5_table_found:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'aits_issue_fts'")
+            _fts5_table_found = cursor.fetchone() is not None
+    return _fts5_table_found
+
+
+def search_issues(queryset, query):
+    """Filter issues to those matching query and annotate them with a relevance rank
+
+    Uses the tsvector column on Postgres and the FTS5 table on SQLite, both
+    created by migration 0006. Other backends fall back to unranked substring
+    matching.
+    """
+    if connection.vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('english', %s)"
+        return queryset.filter(
+            RawSQL(f'aits_issue.search_vector @@ {tsquery}', [query], output_field=BooleanField())
+        ).annotate(
+            rank=RawSQL(f'ts_rank_cd(aits_issue.search_vector, {tsquery})', [query], output_field=FloatField())
+        )
+
+    words = WORD_RE.findall(query)
+    if not words:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'sqlite' and has_fts5_table():
+        # Quote each word so user input cannot inject FTS5 query syntax
+        match = ' '.join(f'"{word}"' for word in words)
+        return queryset.filter(
+            RawSQL(
+                'aits_issue.issue_id IN (SELECT rowid FROM aits_issue_fts WHERE aits_issue_fts MATCH %s)',
+                [match],
+                output_field=BooleanField()
+            )
+        ).annotate(
+            # bm25() is lower for better matches, so negate it
+            rank=RawSQL(
+                '(SELECT -bm25(aits_issue_fts, 3.0, 1.0, 3.0) FROM aits_issue_fts '
+                'WHERE aits_issue_fts MATCH %s AND rowid = aits_issue.issue_id)',
+                [match],
+                output_field=FloatField()
+            )
+        )
+
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(description__icontains=word) | Q(courseUnit__icontains=word)
+    return queryset.filter(condition).annotate(rank=Value(0.0, output_field=FloatField()))
@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.hashers import make_password, check_password
+from django.urls import reverse
 
 from .models import User, Department, Lecturer, Student, AcademicRegistrar, Issue, Notification
+from . import reference
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -51,6 +54,8 @@ class IssueSerializer(serializers.ModelSerializer):
     student_name = serializers.SerializerMethodField()
     student_department = serializers.SerializerMethodField()
     assigned_to = LecturerSerializer(read_only=True)
+    attachment_url = serializers.SerializerMethodField()
+    attachment_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Issue
@@ -67,6 +72,8 @@ class IssueSerializer(serializers.ModelSerializer):
             'student_name',
             'student_department',
             'assigned_to', 
+            'attachment_url',
+            'attachment_name',
             'created_at', 
             'updated_at'
         ]
@@ -77,6 +84,12 @@ class IssueSerializer(serializers.ModelSerializer):
     def get_student_department(self, obj):
         return obj.student.department.name if obj.student and obj.student.department else None
 
+    def get_attachment_url(self, obj):
+        return reverse('issue-attachment', args=[obj.pk]) if obj.attachment else None
+
+    def get_attachment_name(self, obj):
+        return obj.get_attachment_name() if obj.attachment else None
+
 class NotificationSerializer(serializers.ModelSerializer):
     issue = IssueSerializer(read_only=True)
     recipient = UserSerializer(read_only=True)
@@ -94,6 +107,59 @@ class NotificationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at']
 
+class IssueSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Issue
+        fields = ['issue_id', 'title', 'status']
+
+class CompactNotificationSerializer(serializers.ModelSerializer):
+    issue = IssueSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = [
+            'id',
+            'notification_type',
+            'issue',
+            'message',
+            'is_read',
+            'created_at'
+        ]
+        read_only_fields = ['created_at']
+
+class BulkIssueOperationSerializer(serializers.Serializer):
+    OPERATIONS = (
+        ('assign', 'Assign to lecturer'),
+        ('set_status', 'Set status'),
+        ('set_priority', 'Set priority'),
+    )
+
+    issue_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.API_MAX_BULK_ISSUES
+    )
+    operation = serializers.ChoiceField(choices=OPERATIONS)
+    value = serializers.CharField()
+
+    def validate(self, data):
+        operation = data['operation']
+        value = data['value']
+
+        if operation == 'assign':
+            try:
+                data['value'] = Lecturer.objects.select_related('user').get(pk=int(value))
+            except (ValueError, Lecturer.DoesNotExist):
+                raise serializers.ValidationError({'value': 'Lecturer not found.'})
+        elif operation == 'set_status' and value not in reference.CHOICES['issue_statuses']:
+            raise serializers.ValidationError({'value': 'Invalid status.'})
+        elif operation == 'set_priority' and value not in reference.CHOICES['issue_priorities']:
+            raise serializers.ValidationError({'value': 'Invalid priority.'})
+
+        # Duplicate ids would otherwise be notified twice
+        data['issue_ids'] = list(dict.fromkeys(data['issue_ids']))
+        return data
+
 class LoginSerializer(serializers.Serializer):
     userId = serializers.CharField()
     password = serializers.CharField()
@@ -159,17 +225,8 @@ class StudentRegistrationSerializer(serializers.Serializer):
                 password=make_password(validated_data['password'])
             )
             
-            # Get or create Department instance
-            department_name = student_data['department']
-            try:
-                department = Department.objects.get(name=department_name)
-            except Department.DoesNotExist:
-                # If department doesn't exist, create it with appropriate faculty
-                faculty = "Faculty of Computing"  # Default faculty for computing departments
-                department = Department.objects.create(
-                    name=department_name,
-                    faculty=faculty
-                )
+            # Departments first named at registration get the default faculty
+            department = reference.get_department(student_data['department'], reference.DEFAULT_FACULTY)
             
             # Create Student instance with additional data
             student = Student.objects.create(
@@ -236,17 +293,8 @@ class LecturerRegistrationSerializer(serializers.Serializer):
                 password=make_password(validated_data['password'])
             )
             
-            # Get or create Department instance
-            department_name = lecturer_data['department']
-            try:
-                department = Department.objects.get(name=department_name)
-            except Department.DoesNotExist:
-                # If department doesn't exist, create it with appropriate faculty
-                faculty = "Faculty of Computing"  # Default faculty for computing departments
-                department = Department.objects.create(
-                    name=department_name,
-                    faculty=faculty
-                )
+            # Departments first named at registration get the default faculty
+            department = reference.get_department(lecturer_data['department'], reference.DEFAULT_FACULTY)
             
             # Create Lecturer instance with department
             lecturer = Lecturer.objects.create(
@@ -302,17 +350,8 @@ class RegistrarRegistrationSerializer(serializers.Serializer):
                 password=make_password(validated_data['password'])
             )
             
-            # Get or create Department instance
-            department_name = registrar_data['department']
-            try:
-                department = Department.objects.get(name=department_name)
-            except Department.DoesNotExist:
-                # If department doesn't exist, create it with appropriate faculty
-                faculty = "Faculty of Computing"  # Default faculty for computing departments
-                department = Department.objects.create(
-                    name=department_name,
-                    faculty=faculty
-                )
+            # Departments first named at registration get the default faculty
+            department = reference.get_department(registrar_data['department'], reference.DEFAULT_FACULTY)
             
             # Create AcademicRegistrar instance with additional data
             registrar = AcademicRegistrar.objects.create(
@@ -0,0 +1,92 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import analytics, directory, reference
+from .authentication import user_cache
+from .models import Department, Issue, Lecturer, Student, User
+from .storage import add_reference, release_reference
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    """Drop a changed or deleted user from this process's authentication cache"""
+    user_cache.evict(instance.pk)
+
+
+# Written on login and token changes, and shown by no directory or list
+UNLISTED_USER_FIELDS = {'password', 'last_login', 'token_version'}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Lecturer)
+@receiver(post_delete, sender=Lecturer)
+def invalidate_directory(sender, instance, update_fields=None, **kwargs):
+    """Orphan cached directory pages and list ETags that show a changed person"""
+    if update_fields and set(update_fields) <= UNLISTED_USER_FIELDS:
+        return
+    directory.invalidate()
+
+
+@receiver(post_save, sender=Issue)
+def move_attachment_reference(sender, instance, created, **kwargs):
+    """Keep attachment blob reference counts in step with the issues using them"""
+    if not created and not hasattr(instance, '_loaded_attachment'):
+        # Loaded without its attachment column, so it cannot have changed it
+        return
+    old_name = str(getattr(instance, '_loaded_attachment', None) or '')
+    new_name = instance.attachment.name or ''
+    if old_name != new_name:
+        add_reference(new_name)
+        release_reference(old_name)
+        instance._loaded_attachment = new_name
+
+
+@receiver(post_delete, sender=Issue)
+def release_attachment_reference(sender, instance, **kwargs):
+    release_reference(instance.attachment.name)
+
+
+@receiver(pre_save, sender=Issue)
+def lock_issue_statistics(sender, instance, update_fields=None, **kwargs):
+    analytics.issue_saving(instance, update_fields)
+
+
+@receiver(post_save, sender=Issue)
+def update_issue_statistics(sender, instance, created, **kwargs):
+    analytics.issue_saved(instance, created)
+
+
+@receiver(pre_delete, sender=Issue)
+def remember_issue_buckets(sender, instance, **kwargs):
+    # Read the row before a cascade can remove the student
+    instance._stored_values = analytics.stored_values(instance)
+
+
+@receiver(post_delete, sender=Issue)
+def remove_issue_statistics(sender, instance, **kwargs):
+    analytics.issue_deleted(getattr(instance, '_stored_values', None))
+
+
+@receiver(pre_save, sender=Student)
+def lock_student_department(sender, instance, update_fields=None, **kwargs):
+    analytics.student_saving(instance, update_fields)
+
+
+@receiver(post_save, sender=Student)
+def move_student_issue_statistics(sender, instance, created, **kwargs):
+    analytics.student_saved(instance, created)
+
+
+@receiver(post_delete, sender=Department)
+def move_department_issue_statistics(sender, instance, **kwargs):
+    analytics.department_deleted(instance.pk)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_reference_data(sender, instance, **kwargs):
+    reference.invalidate()
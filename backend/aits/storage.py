@@ -0,0 +1,80 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File storage that keeps one copy of each distinct upload, named by its SHA-256"""
+
+    prefix = 'attachments'
+
+    def save(self, name, content, max_length=None):
+        from .models import AttachmentBlob
+
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        extension = os.path.splitext(name)[1][:10].lower()
+
+        # Hash while streaming to a temporary file next to the final location
+        directory = self.path(self.prefix)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temp:
+            try:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    temp.write(chunk)
+            except BaseException:
+                os.unlink(temp.name)
+                raise
+        digest = digest.hexdigest()
+
+        blob_name = f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+        blob_path = self.path(blob_name)
+        try:
+            with transaction.atomic():
+                # Lock the blob row before looking at its file. cleanup_attachments
+                # only unlinks files while holding this lock, and skips blobs
+                # uploaded within its grace period, so a file found here stays
+                blob, created = AttachmentBlob.objects.select_for_update().get_or_create(
+                    name=blob_name,
+                    defaults={'digest': digest, 'size': size}
+                )
+                if not created:
+                    # Recently uploaded blobs are left alone by cleanup until they are referenced
+                    AttachmentBlob.objects.filter(pk=blob.pk).update(last_uploaded_at=timezone.now())
+
+                if not os.path.exists(blob_path):
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(temp.name, self.file_permissions_mode)
+                    os.replace(temp.name, blob_path)
+        finally:
+            if os.path.exists(temp.name):
+                os.unlink(temp.name)
+        return blob_name
+
+
+def get_attachment_storage():
+    # Left to follow MEDIA_ROOT and MEDIA_URL, including when they are overridden
+    return ContentAddressedStorage()
+
+
+def add_reference(name):
+    from .models import AttachmentBlob
+    if name:
+        AttachmentBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+
+def release_reference(name):
+    from .models import AttachmentBlob
+    if name:
+        AttachmentBlob.objects.filter(name=name).update(ref_count=F('ref_count') - 1)
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from ..authentication import create_access_token, user_cache
+from ..models import AcademicRegistrar, Department, Issue, Lecturer, Student, User
+
+
+def make_department(name='Department of Computer Science', faculty='College of Computing'):
+    department, _ = Department.objects.get_or_create(name=name, defaults={'faculty': faculty})
+    return department
+
+
+def make_user(username, role, password='password'):
+    user = User(
+        username=username,
+        email=f'{username}@example.com',
+        first_name=username.capitalize(),
+        last_name='Test',
+        role=role
+    )
+    user.set_password(password)
+    user.save()
+    return user
+
+
+def make_student(username='student', department=None):
+    return Student.objects.create(
+        user=make_user(username, 'student'),
+        college='College of Computing',
+        department=department or make_department(),
+        year_of_study='First Year',
+        course='Computer Science'
+    )
+
+
+def make_lecturer(username='lecturer', department=None):
+    return Lecturer.objects.create(user=make_user(username, 'lecturer'), department=department or make_department())
+
+
+def make_registrar(username='registrar', department=None):
+    return AcademicRegistrar.objects.create(
+        user=make_user(username, 'registrar'),
+        college='College of Computing',
+        department=department or make_department()
+    )
+
+
+def make_issue(student, lecturer=None, **fields):
+    fields.setdefault('title', 'Missing marks')
+    fields.setdefault('category', 'academic')
+    fields.setdefault('description', 'My coursework marks are missing')
+    return Issue.objects.create(student=student, assigned_to=lecturer, **fields)
+
+
+# Fast hashing keeps tests that create many accounts quick
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AITSTestCase(APITestCase):
+    """API test case with empty caches and helpers to act as a user"""
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {create_access_token(user)}')
@@ -0,0 +1,140 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.urls import reverse
+
+from .. import analytics
+from ..models import Issue, IssueStatistic
+from .base import AITSTestCase, make_department, make_issue, make_registrar, make_student
+
+
+def stored_counts():
+    return {
+        (s.dimension, s.value): s.count
+        for s in IssueStatistic.objects.filter(count__gt=0)
+    }
+
+
+def recounted():
+    counts = {}
+    for dimension, field in analytics.DIMENSION_FIELDS.items():
+        for row in Issue.objects.values(field).annotate(count=Count('pk')).order_by():
+            counts[(dimension, analytics.bucket_value(row[field]))] = row['count']
+    return counts
+
+
+class IssueAnalyticsTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.computing = make_department()
+        self.physics = make_department('Department of Physics')
+        self.student = make_student()
+        self.physicist = make_student('physicist', self.physics)
+
+    def assertSummaryMatchesIssues(self):
+        self.assertEqual(stored_counts(), recounted())
+
+    def test_summary_follows_creates_updates_and_deletes(self):
+        first = make_issue(self.student, courseUnit='CSC1100')
+        second = make_issue(self.student, category='examination')
+        make_issue(self.physicist, status='resolved')
+        self.assertSummaryMatchesIssues()
+        self.assertEqual(stored_counts()[('department', str(self.computing.pk))], 2)
+
+        issue = Issue.objects.get(pk=first.pk)
+        issue.status = 'in_progress'
+        issue.courseUnit = 'CSC1200'
+        issue.save()
+        self.assertSummaryMatchesIssues()
+
+        issue.student = self.physicist
+        issue.save()
+        self.assertSummaryMatchesIssues()
+        self.assertEqual(stored_counts()[('department', str(self.physics.pk))], 2)
+
+        second.delete()
+        self.assertSummaryMatchesIssues()
+
+    def test_saving_an_unchanged_issue_leaves_counts_alone(self):
+        issue = make_issue(self.student)
+        before = stored_counts()
+        Issue.objects.get(pk=issue.pk).save()
+        self.assertEqual(stored_counts(), before)
+
+    def test_stale_copies_move_counts_from_the_stored_row(self):
+        issue = make_issue(self.student)
+        first, second = Issue.objects.get(pk=issue.pk), Issue.objects.get(pk=issue.pk)
+        first.status = 'in_progress'
+        first.save()
+        # Loaded as open, but the row it overwrites is in progress
+        second.priority = 'low'
+        second.save()
+        self.assertSummaryMatchesIssues()
+
+    def test_saving_other_fields_skips_the_row_lock(self):
+        issue = make_issue(self.student)
+        issue.title = 'Renamed'
+        with self.assertNumQueries(1):
+            issue.save(update_fields=['title'])
+
+    def test_student_department_changes_move_their_issues(self):
+        make_issue(self.student)
+        make_issue(self.student, category='examination')
+        make_issue(self.physicist)
+        self.student.department = self.physics
+        self.student.save()
+        self.assertSummaryMatchesIssues()
+        self.assertEqual(stored_counts()[('department', str(self.physics.pk))], 3)
+
+        self.student.department = None
+        self.student.save(update_fields=['department'])
+        self.assertSummaryMatchesIssues()
+
+    def test_deleting_a_department_moves_its_issues_to_unspecified(self):
+        make_issue(self.student)
+        make_issue(self.physicist)
+        self.physics.delete()
+        self.assertSummaryMatchesIssues()
+        self.assertEqual(stored_counts()[('department', '')], 1)
+
+    def test_deleting_a_student_removes_their_issues_from_the_summary(self):
+        make_issue(self.student)
+        make_issue(self.physicist)
+        self.physicist.user.delete()
+        self.assertSummaryMatchesIssues()
+        self.assertNotIn(('department', str(self.physics.pk)), stored_counts())
+
+    def test_rebuild_recounts_from_issues(self):
+        make_issue(self.student)
+        make_issue(self.physicist, category='examination')
+        IssueStatistic.objects.update(count=99)
+
+        out = StringIO()
+        call_command('rebuild_issue_statistics', stdout=out)
+        self.assertIn('Rebuilt', out.getvalue())
+        self.assertSummaryMatchesIssues()
+
+    def test_endpoint_labels_buckets_in_constant_queries(self):
+        make_issue(self.student, courseUnit='CSC1100')
+        make_issue(self.physicist)
+        registrar = make_registrar()
+        self.authenticate(registrar.user)
+        url = reverse('registrar-analytics')
+        self.client.get(url)
+
+        with self.assertNumQueries(2):
+            data = self.client.get(url).data
+
+        departments = {row['label']: row['count'] for row in data['department']}
+        self.assertEqual(departments, {'Department of Computer Science': 1, 'Department of Physics': 1})
+        self.assertIn(
+            {'value': 'CSC1100', 'label': 'CSC1100 - Programming Fundamentals', 'count': 1},
+            data['courseUnit']
+        )
+        self.assertIn({'value': None, 'label': 'Unspecified', 'count': 1}, data['courseUnit'])
+
+    def test_only_registrars_see_analytics(self):
+        self.authenticate(self.student.user)
+        self.assertEqual(self.client.get(reverse('registrar-analytics')).status_code, 403)
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from ..models import AttachmentBlob, Issue
+from .base import AITSTestCase, make_issue, make_student
+
+
+class AttachmentStorageTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.student = make_student()
+        self.storage = Issue._meta.get_field('attachment').storage
+
+    def attach(self, content, name='notes.pdf'):
+        return make_issue(self.student, attachment=SimpleUploadedFile(name, content))
+
+    def cleanup(self, grace_hours=0):
+        call_command('cleanup_attachments', grace_hours=grace_hours, stdout=StringIO())
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.attach(b'same content')
+        second = self.attach(b'same content', name='copy.PDF')
+        other = self.attach(b'other content')
+        self.assertEqual(first.attachment.name, second.attachment.name)
+        self.assertNotEqual(first.attachment.name, other.attachment.name)
+        self.assertTrue(first.attachment.name.endswith('.pdf'))
+        self.assertEqual(AttachmentBlob.objects.get(name=first.attachment.name).ref_count, 2)
+        self.assertEqual(len(os.listdir(self.storage.path('attachments'))), 2)
+
+    def test_reference_counts_follow_issues(self):
+        first = self.attach(b'shared')
+        second = self.attach(b'shared')
+        name = first.attachment.name
+        first.delete()
+        self.assertEqual(AttachmentBlob.objects.get(name=name).ref_count, 1)
+
+        issue = Issue.objects.get(pk=second.pk)
+        issue.attachment = SimpleUploadedFile('new.pdf', b'replacement')
+        issue.save()
+        self.assertEqual(AttachmentBlob.objects.get(name=name).ref_count, 0)
+        self.assertEqual(AttachmentBlob.objects.get(name=issue.attachment.name).ref_count, 1)
+
+    def test_cleanup_deletes_only_old_unreferenced_blobs(self):
+        kept = self.attach(b'still used')
+        removed = self.attach(b'no longer used')
+        recent = self.attach(b'just uploaded')
+        removed_name, recent_name = removed.attachment.name, recent.attachment.name
+        removed.delete()
+        recent.delete()
+        AttachmentBlob.objects.exclude(name=recent_name).update(last_uploaded_at=timezone.now() - timedelta(days=2))
+
+        self.cleanup(grace_hours=24)
+        self.assertEqual(
+            set(AttachmentBlob.objects.values_list('name', flat=True)),
+            {kept.attachment.name, recent_name}
+        )
+        self.assertFalse(self.storage.exists(removed_name))
+        self.assertTrue(self.storage.exists(kept.attachment.name))
+
+    def test_upload_restores_a_file_missing_behind_its_row(self):
+        name = self.attach(b'content').attachment.name
+        os.unlink(self.storage.path(name))
+        self.assertEqual(self.attach(b'content').attachment.name, name)
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'content')
+
+    def test_upload_after_cleanup_writes_the_file_again(self):
+        issue = self.attach(b'content')
+        name = issue.attachment.name
+        issue.delete()
+        self.cleanup()
+        self.assertFalse(self.storage.exists(name))
+
+        self.assertEqual(self.attach(b'content').attachment.name, name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(AttachmentBlob.objects.get(name=name).ref_count, 1)
+        # No temporary files are left behind
+        self.assertEqual(os.listdir(self.storage.path('attachments')), [name.split('/')[1]])
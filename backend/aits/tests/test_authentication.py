@@ -0,0 +1,185 @@
+import datetime
+
+import jwt
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..authentication import create_access_token
+from ..models import RefreshToken
+from .base import AITSTestCase, make_issue, make_lecturer, make_student
+
+
+class JWTAuthenticationTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.user = self.student.user
+        self.url = reverse('notification-unread-count')
+
+    def get(self, token):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def encode(self, **claims):
+        exp = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5)
+        claims.setdefault('exp', int(exp.timestamp()))
+        return jwt.encode(claims, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+    def user_queries(self, token):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.get(token).status_code, 200)
+        table = self.user._meta.db_table
+        return [query for query in context if f'FROM "{table}"' in query['sql']]
+
+    def test_user_is_loaded_once_per_process(self):
+        token = create_access_token(self.user)
+        self.assertEqual(len(self.user_queries(token)), 1)
+        self.assertEqual(self.user_queries(token), [])
+
+    def test_role_change_revokes_issued_tokens(self):
+        token = create_access_token(self.user)
+        self.assertEqual(self.get(token).status_code, 200)
+        self.user.role = 'lecturer'
+        self.user.save()
+        response = self.get(token)
+        self.assertEqual(response.status_code, 401)
+
+    def test_deleted_user(self):
+        token = create_access_token(self.user)
+        self.assertEqual(self.get(token).status_code, 200)
+        self.user.delete()
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_expired_token(self):
+        exp = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+        token = self.encode(uid=self.user.pk, user_id=self.user.username, role='student', ver=0,
+                            exp=int(exp.timestamp()))
+        response = self.get(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'], 'Token has expired')
+
+    def test_token_without_uid_is_looked_up_by_username(self):
+        token = self.encode(user_id=self.user.username, role='student')
+        self.assertEqual(self.get(token).status_code, 200)
+
+    def test_forged_role(self):
+        token = self.encode(uid=self.user.pk, user_id=self.user.username, role='registrar', ver=0)
+        self.assertEqual(self.get(token).status_code, 401)
+
+
+class ProfileClaimTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.lecturer = make_lecturer()
+        self.issue = make_issue(make_student(), self.lecturer)
+        self.url = reverse('lecturer-issue-detail', args=[self.issue.pk])
+
+    def get(self, token):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 200)
+        table = self.lecturer._meta.db_table
+        return [query for query in context if f'FROM "{table}" WHERE' in query['sql']]
+
+    def test_views_and_permissions_use_the_claim(self):
+        self.assertEqual(self.get(create_access_token(self.lecturer.user)), [])
+
+    def test_tokens_without_the_claim_look_the_profile_up(self):
+        user = self.lecturer.user
+        token = jwt.encode(
+            {'uid': user.pk, 'user_id': user.username, 'role': 'lecturer', 'ver': user.token_version,
+             'exp': int((timezone.now() + datetime.timedelta(minutes=5)).timestamp())},
+            settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
+        )
+        self.assertEqual(len(self.get(token)), 1)
+
+
+class RefreshTokenTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_student().user
+
+    def login(self):
+        response = self.client.post(
+            reverse('login'), {'userId': self.user.username, 'password': 'password', 'role': 'student'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['refresh']
+
+    def refresh(self, token):
+        return self.client.post(reverse('token-refresh'), {'refresh': token}, format='json')
+
+    def test_login_issues_a_refresh_token_stored_only_as_a_digest(self):
+        refresh = self.login()
+        stored = RefreshToken.objects.get(user=self.user)
+        self.assertNotEqual(stored.token_hash, refresh)
+        self.assertEqual(len(stored.token_hash), 64)
+
+    def test_refresh_rotates_the_token(self):
+        first = self.login()
+        response = self.refresh(first)
+        self.assertEqual(response.status_code, 200)
+        second = response.data['refresh']
+        self.assertNotEqual(second, first)
+
+        # The new access token authenticates
+        response = self.client.get(
+            reverse('notification-unread-count'), HTTP_AUTHORIZATION=f'Bearer {response.data["token"]}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(second).status_code, 200)
+        self.assertEqual(RefreshToken.objects.filter(user=self.user).values('family').distinct().count(), 1)
+
+    def test_reuse_revokes_every_token_from_the_login(self):
+        first = self.login()
+        second = self.refresh(first).data['refresh']
+        other_login = self.login()
+
+        response = self.refresh(first)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['error'], 'Refresh token has already been used')
+        # The token the thief or the user still holds is revoked too
+        self.assertEqual(self.refresh(second).data['error'], 'Invalid refresh token')
+        # Other logins are untouched
+        self.assertEqual(self.refresh(other_login).status_code, 200)
+
+    def test_expired_token(self):
+        refresh = self.login()
+        RefreshToken.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['error'], 'Refresh token has expired')
+
+    def test_role_change_revokes_refresh_tokens(self):
+        refresh = self.login()
+        self.user.role = 'lecturer'
+        self.user.save()
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['error'], 'Refresh token has been revoked')
+
+    def test_inactive_user(self):
+        refresh = self.login()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_unknown_and_missing_tokens(self):
+        self.assertEqual(self.refresh('not-a-token').status_code, 401)
+        response = self.client.post(reverse('token-refresh'), {}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_expired_access_token_does_not_block_refresh(self):
+        refresh = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer expired.token.value')
+        self.assertEqual(self.refresh(refresh).status_code, 200)
+
+    def test_login_clears_expired_tokens(self):
+        self.login()
+        RefreshToken.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.login()
+        self.assertEqual(RefreshToken.objects.filter(user=self.user).count(), 1)
@@ -0,0 +1,30 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TransactionTestCase
+
+from ..models import Issue
+
+
+class BenchmarkIndexesTests(TransactionTestCase):
+
+    def index_names(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Issue._meta.db_table)
+        return {name for name, info in constraints.items() if info['index']}
+
+    def test_refuses_a_database_that_is_not_for_testing(self):
+        with mock.patch('aits.management.commands.benchmark_indexes.is_test_database', return_value=False):
+            with self.assertRaisesMessage(CommandError, '--i-know'):
+                call_command('benchmark_indexes', stdout=StringIO())
+        self.assertIn('issue_created_idx', self.index_names())
+
+    def test_seeds_with_seed_scale_and_restores_indexes(self):
+        out = StringIO()
+        call_command('benchmark_indexes', seed=30, students=5, lecturers=2, repeat=1, stdout=out)
+        self.assertEqual(Issue.objects.filter(student__user__username__startswith='bench-').count(), 30)
+        self.assertIn('=== Summary (median ms) ===', out.getvalue())
+        self.assertTrue({index.name for index in Issue._meta.indexes} <= self.index_names())
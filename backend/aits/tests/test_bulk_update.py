@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.urls import reverse
+
+from ..models import Issue, Notification
+from .base import AITSTestCase, make_issue, make_lecturer, make_registrar, make_student
+from .test_analytics import recounted, stored_counts
+
+
+class BulkIssueUpdateTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.lecturer = make_lecturer()
+        self.issues = [make_issue(self.student, title=f'Issue {i}') for i in range(3)]
+        self.ids = [issue.pk for issue in self.issues]
+        self.authenticate(make_registrar().user)
+        self.url = reverse('registrar-issue-bulk')
+
+    def bulk(self, operation, value, issue_ids=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {
+                'issue_ids': self.ids if issue_ids is None else issue_ids,
+                'operation': operation,
+                'value': value,
+            }, format='json')
+
+    def test_set_status_updates_counts_and_notifies(self):
+        Issue.objects.filter(pk=self.ids[0]).update(status='resolved')
+        Issue.objects.get(pk=self.ids[0]).save()
+        missing = max(self.ids) + 1
+
+        response = self.bulk('set_status', 'resolved', self.ids + [missing, self.ids[1]])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'updated': self.ids[1:], 'unchanged': self.ids[:1], 'missing': [missing]})
+        self.assertEqual(
+            sorted(Issue.objects.values_list('status', flat=True)), ['resolved'] * 3
+        )
+        self.assertEqual(Notification.objects.filter(notification_type='issue_resolved').count(), 2)
+
+    def test_statistics_follow_bulk_changes(self):
+        make_issue(self.student, title='Untouched')
+        self.bulk('set_priority', 'low')
+        self.assertEqual(stored_counts(), recounted())
+        self.bulk('set_status', 'in_progress', self.ids[:2])
+        self.assertEqual(stored_counts(), recounted())
+        self.assertEqual(stored_counts()[('status', 'in_progress')], 2)
+
+    def test_assign_notifies_the_lecturer_and_the_student_once_per_issue(self):
+        response = self.bulk('assign', str(self.lecturer.pk))
+        self.assertEqual(response.data['updated'], self.ids)
+        self.assertEqual(Issue.objects.filter(assigned_to=self.lecturer).count(), 3)
+        # As the registrar's single-issue update, the student hears of the change too
+        self.assertEqual(
+            sorted(Notification.objects.values_list('recipient', 'notification_type', 'issue')),
+            sorted(
+                [(self.lecturer.user.pk, 'issue_assigned', pk) for pk in self.ids]
+                + [(self.student.user.pk, 'issue_updated', pk) for pk in self.ids]
+            )
+        )
+
+        response = self.bulk('assign', str(self.lecturer.pk))
+        self.assertEqual(response.data['unchanged'], self.ids)
+        self.assertEqual(Notification.objects.count(), 6)
+
+    def test_queries_do_not_grow_with_issues(self):
+        # Lock, one bump per old and new bucket, one UPDATE and one notification INSERT,
+        # plus the savepoint around them
+        self.bulk('set_status', 'resolved', self.ids[:1])
+        with self.assertNumQueries(7):
+            self.bulk('set_status', 'resolved', self.ids[1:2])
+
+        self.ids += [make_issue(self.student).pk for _ in range(5)]
+        with self.assertNumQueries(7):
+            self.bulk('set_status', 'resolved')
+
+    def test_invalid_requests_change_nothing(self):
+        for operation, value, issue_ids in [
+            ('set_status', 'archived', None),
+            ('set_priority', 'urgent', None),
+            ('assign', '999', None),
+            ('assign', 'nobody', None),
+            ('delete', 'x', None),
+            ('set_status', 'resolved', []),
+        ]:
+            response = self.bulk(operation, value, issue_ids)
+            self.assertEqual(response.status_code, 400, (operation, value))
+        self.assertFalse(Issue.objects.exclude(status='open').exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_request_size_is_capped(self):
+        issue_ids = list(range(1, settings.API_MAX_BULK_ISSUES + 2))
+        self.assertEqual(self.bulk('set_priority', 'low', issue_ids).status_code, 400)
+
+    def test_only_registrars_may_bulk_update(self):
+        self.authenticate(self.student.user)
+        self.assertEqual(self.bulk('set_status', 'resolved').status_code, 403)
@@ -0,0 +1,137 @@
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import async_views
+from ..authentication import create_access_token
+from ..models import Notification
+from .base import (
+    AITSTestCase, make_department, make_issue, make_lecturer, make_registrar, make_student
+)
+
+
+class ConditionalListTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.lecturer = make_lecturer()
+        self.registrar = make_registrar()
+        self.issue = make_issue(self.student, self.lecturer)
+
+    def etag(self, user, name):
+        self.authenticate(user)
+        response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def etags(self):
+        return {
+            'student': self.etag(self.student.user, 'student-issues'),
+            'lecturer': self.etag(self.lecturer.user, 'lecturer-issues'),
+            'registrar': self.etag(self.registrar.user, 'registrar-issues'),
+            'notifications': self.etag(self.student.user, 'get-notifications'),
+        }
+
+    def assertAllChanged(self, before):
+        after = self.etags()
+        for name in before:
+            self.assertNotEqual(before[name], after[name], name)
+
+    def test_unchanged_lists_are_not_modified(self):
+        for user, name in [
+            (self.student.user, 'student-issues'),
+            (self.lecturer.user, 'lecturer-issues'),
+            (self.registrar.user, 'registrar-issues'),
+            (self.student.user, 'get-notifications'),
+        ]:
+            etag = self.etag(user, name)
+            self.assertTrue(etag.startswith('W/"'))
+            response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, name)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(response.content, b'')
+
+    def test_users_get_different_etags_for_the_same_list(self):
+        other = make_registrar('other')
+        self.assertNotEqual(
+            self.etag(self.registrar.user, 'registrar-issues'),
+            self.etag(other.user, 'registrar-issues')
+        )
+
+    def test_issue_changes_change_the_etag(self):
+        before = self.etags()
+        self.issue.status = 'in_progress'
+        self.issue.save()
+        Notification.objects.create(
+            recipient=self.student.user, issue=self.issue,
+            notification_type='status_change', message='Updated'
+        )
+        self.assertAllChanged(before)
+
+    def test_lecturer_changes_change_the_etag(self):
+        before = self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lecturer.user.first_name = 'Renamed'
+            self.lecturer.user.save()
+        self.assertAllChanged(before)
+
+        before = self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lecturer.department = make_department('Department of Physics')
+            self.lecturer.save()
+        self.assertAllChanged(before)
+
+    def test_student_changes_change_the_etag(self):
+        before = self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.department = make_department('Department of Physics')
+            self.student.save()
+        self.assertAllChanged(before)
+
+    def test_department_changes_change_the_etag(self):
+        before = self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            department = self.student.department
+            department.name = 'Department of Computing'
+            department.save()
+        self.assertAllChanged(before)
+
+    def test_logging_in_keeps_the_etag(self):
+        before = self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lecturer.user.last_login = timezone.now()
+            self.lecturer.user.save(update_fields=['last_login'])
+        self.assertEqual(self.etags(), before)
+
+
+class AsyncConditionalListTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.lecturer = make_lecturer()
+        self.registrar = make_registrar()
+        make_issue(self.student, self.lecturer)
+
+    def test_async_views_send_the_sync_views_etags(self):
+        factory = AsyncRequestFactory()
+        for user, name, view in [
+            (self.student.user, 'student-issues', async_views.student_issues_view),
+            (self.lecturer.user, 'lecturer-issues', async_views.lecturer_issues_view),
+            (self.registrar.user, 'registrar-issues', async_views.registrar_issues_view),
+            (self.lecturer.user, 'get-notifications', async_views.notifications_view),
+        ]:
+            url = reverse(name) + '?page_size=10'
+            self.authenticate(user)
+            sync_response = self.client.get(url)
+            self.assertEqual(sync_response.status_code, 200)
+
+            headers = {'Authorization': f'Bearer {create_access_token(user)}'}
+            async_response = async_to_sync(view)(factory.get(url, headers=headers))
+            self.assertEqual(async_response.status_code, 200, name)
+            self.assertEqual(async_response['ETag'], sync_response['ETag'], name)
+
+            headers['If-None-Match'] = sync_response['ETag']
+            self.assertEqual(async_to_sync(view)(factory.get(url, headers=headers)).status_code, 304, name)
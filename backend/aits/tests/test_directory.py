@@ -0,0 +1,87 @@
+from django.urls import reverse
+
+from .base import AITSTestCase, make_department, make_lecturer, make_registrar, make_student
+
+
+class DirectoryTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.computing = make_department()
+        self.physics = make_department('Department of Physics')
+        self.registrar = make_registrar()
+        self.authenticate(self.registrar.user)
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def usernames(self, name, key, **params):
+        data = self.get(name, **params)
+        rows = data['results'] if isinstance(data, dict) else data
+        return [row[key] for row in rows]
+
+    def test_cached_pages_are_served_without_queries(self):
+        make_student('first')
+        self.get('student-list')
+        with self.assertNumQueries(0):
+            self.get('student-list')
+
+    def test_each_query_string_is_cached_separately(self):
+        make_student('first')
+        make_student('second', self.physics)
+        self.assertEqual(self.usernames('student-list', 'studentNumber'), ['first', 'second'])
+        self.assertEqual(
+            self.usernames('student-list', 'studentNumber', department='Department of Physics'), ['second']
+        )
+        self.assertEqual(
+            self.usernames('student-list', 'studentNumber', department=self.computing.pk), ['first']
+        )
+        self.assertEqual(self.usernames('student-list', 'studentNumber', year='Second Year'), [])
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        make_lecturer('first')
+        # The first request also loads the registrar into the authentication cache
+        self.get('student-list')
+        with self.assertNumQueries(1):
+            self.get('lecturer-list')
+
+        for i in range(5):
+            make_lecturer(f'lecturer{i}', self.physics)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_lecturer('last')
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.usernames('lecturer-list', 'lecturerId')), 7)
+
+    def test_people_changes_orphan_cached_pages(self):
+        lecturer = make_lecturer('first')
+        self.assertEqual(self.usernames('lecturer-list', 'lecturerId'), ['first'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_lecturer('second')
+        self.assertEqual(self.usernames('lecturer-list', 'lecturerId'), ['first', 'second'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lecturer.user.first_name = 'Renamed'
+            lecturer.user.save()
+        self.assertEqual(self.get('lecturer-list')[0]['fullName'], 'Renamed Test')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('lecturer-delete', args=[lecturer.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.usernames('lecturer-list', 'lecturerId'), ['second'])
+
+    def test_pages_follow_a_pk_cursor(self):
+        for i in range(5):
+            make_student(f'student{i}')
+        data = self.get('student-list', page_size=2)
+        seen = [row['studentNumber'] for row in data['results']]
+        while data['next']:
+            data = self.client.get(data['next']).json()
+            seen += [row['studentNumber'] for row in data['results']]
+        self.assertEqual(seen, [f'student{i}' for i in range(5)])
+
+    def test_students_cannot_list_students(self):
+        self.authenticate(make_student().user)
+        self.assertEqual(self.client.get(reverse('student-list')).status_code, 403)
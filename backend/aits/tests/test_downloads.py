@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from ..serializers import IssueSerializer
+from .base import AITSTestCase, make_issue, make_lecturer, make_registrar, make_student
+
+CONTENT = b'0123456789' * 10
+
+
+class AttachmentDownloadTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.student = make_student()
+        self.lecturer = make_lecturer()
+        self.issue = make_issue(
+            self.student,
+            self.lecturer,
+            attachment=SimpleUploadedFile('Marks Appeal (final).pdf', CONTENT)
+        )
+        self.url = reverse('issue-attachment', args=[self.issue.pk])
+
+    def download(self, user, **headers):
+        self.authenticate(user)
+        return self.client.get(self.url, **headers)
+
+    def test_serves_the_uploaded_name(self):
+        response = self.download(self.student.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('Marks Appeal (final).pdf', response['Content-Disposition'])
+        self.assertNotEqual(self.issue.attachment.name, 'Marks Appeal (final).pdf')
+
+        data = IssueSerializer(self.issue).data
+        self.assertEqual(data['attachment_url'], self.url)
+        self.assertEqual(data['attachment_name'], 'Marks Appeal (final).pdf')
+
+    def test_only_people_who_can_see_the_issue_may_download(self):
+        self.assertEqual(self.download(make_student('other').user).status_code, 403)
+        self.assertEqual(self.download(make_lecturer('unassigned').user).status_code, 403)
+        self.assertEqual(self.download(self.lecturer.user).status_code, 200)
+        self.assertEqual(self.download(make_registrar().user).status_code, 200)
+
+        self.client.credentials()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_range_requests(self):
+        response = self.download(self.student.user, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+
+        response = self.download(self.student.user, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-5:])
+
+        response = self.download(self.student.user, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range_mismatch_sends_the_whole_file(self):
+        response = self.download(self.student.user, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_unchanged_attachment_is_not_modified(self):
+        etag = self.download(self.student.user)['ETag']
+        response = self.download(self.student.user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_removing_the_attachment_clears_its_name(self):
+        self.issue.attachment = None
+        self.issue.save()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.attachment_name, '')
+        self.assertEqual(self.download(self.student.user).status_code, 404)
+        self.assertIsNone(IssueSerializer(self.issue).data['attachment_name'])
@@ -0,0 +1,50 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .base import AITSTestCase, make_issue, make_lecturer, make_registrar, make_student
+
+
+class IssueListQueryTests(AITSTestCase):
+    """Issue lists run a fixed number of queries however many issues they return"""
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.lecturer = make_lecturer()
+        self.registrar = make_registrar()
+
+    def count_queries(self, user, url):
+        self.authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assert_constant_queries(self, user, url):
+        make_issue(self.student, self.lecturer)
+        # The first request also loads the user into the authentication cache
+        self.count_queries(user, url)
+        few = self.count_queries(user, url)
+        for _ in range(5):
+            make_issue(self.student, self.lecturer)
+        self.assertEqual(self.count_queries(user, url), few)
+
+    def test_student_issues(self):
+        self.assert_constant_queries(self.student.user, reverse('student-issues'))
+
+    def test_lecturer_issues(self):
+        self.assert_constant_queries(self.lecturer.user, reverse('lecturer-issues'))
+
+    def test_registrar_issues(self):
+        self.assert_constant_queries(self.registrar.user, reverse('registrar-issues'))
+
+    def test_serializes_related_rows(self):
+        issue = make_issue(self.student, self.lecturer)
+        self.authenticate(self.registrar.user)
+        response = self.client.get(reverse('registrar-issues'))
+        row = response.data[0]
+        self.assertEqual(row['issue_id'], issue.pk)
+        self.assertEqual(row['student_name'], self.student.user.get_full_name())
+        self.assertEqual(row['student_department'], self.student.department.name)
+        self.assertEqual(row['assigned_to']['lecturerId'], self.lecturer.user.username)
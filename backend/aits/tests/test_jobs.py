@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Department, Job
+
+calls = []
+
+
+def record_call(value):
+    calls.append(value)
+
+
+def fail():
+    raise ValueError('Job failed')
+
+
+def write_then_fail():
+    Department.objects.create(name='Department of Physics', faculty='College of Science')
+    fail()
+
+
+@override_settings(BACKGROUND_JOBS=True)
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+        # The worker runs inside the test process, so its backends need not be shared
+        self.shared_backends = mock.patch('aits.management.commands.runworker.per_process_backends', return_value=[])
+        self.shared_backends.start()
+        self.addCleanup(self.shared_backends.stop)
+
+    def run_due_jobs(self):
+        call_command('runworker', once=True, stdout=StringIO())
+
+    def test_worker_refuses_per_process_backends(self):
+        self.shared_backends.stop()
+        with self.assertRaisesMessage(CommandError, 'NOTIFICATION_BROKER is aits.events.InProcessBroker'):
+            self.run_due_jobs()
+
+    def test_enqueued_job_runs_on_the_worker(self):
+        job = jobs.enqueue(record_call, value=42)
+        self.assertEqual(job.name, 'aits.tests.test_jobs.record_call')
+        self.assertEqual(calls, [])
+        self.run_due_jobs()
+        job.refresh_from_db()
+        self.assertEqual(calls, [42])
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.attempts, 1)
+
+    def test_future_jobs_wait(self):
+        job = jobs.enqueue(record_call, run_at=timezone.now() + timedelta(minutes=5), value=1)
+        self.run_due_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(calls, [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = jobs.enqueue(fail)
+        self.run_due_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertIn('Job failed', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+
+    def test_job_fails_after_its_last_attempt(self):
+        job = jobs.enqueue(fail)
+        Job.objects.filter(pk=job.pk).update(max_attempts=1)
+        self.run_due_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = jobs.enqueue(record_call, value=1)
+        Job.objects.filter(pk=job.pk).update(status='running', started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        self.run_due_jobs()
+        self.assertEqual(calls, [1])
+
+    def test_failed_attempts_leave_no_writes(self):
+        jobs.enqueue(write_then_fail)
+        self.run_due_jobs()
+        self.assertFalse(Department.objects.exists())
+
+    def test_runs_overtaken_by_a_requeue_do_nothing(self):
+        job = jobs.enqueue(record_call, value=1)
+        stale, = jobs.claim_jobs(1)
+        # Requeued after JOB_TIMEOUT, then claimed and run by another worker
+        Job.objects.filter(pk=job.pk).update(status='queued')
+        self.run_due_jobs()
+        self.assertFalse(jobs.run_job(stale))
+        self.assertEqual(calls, [1])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 2))
+
+    @override_settings(BACKGROUND_JOBS=False)
+    def test_without_background_jobs_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(jobs.enqueue(record_call, value=7))
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [7])
+        self.assertFalse(Job.objects.exists())
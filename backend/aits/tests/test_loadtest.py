@@ -0,0 +1,70 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+from collections import defaultdict
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from ..authentication import user_cache
+from ..management.commands.loadtest import Session
+from ..models import User
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoadtestCommandTests(LiveServerTestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        self.output = os.path.join(output_dir, 'results.json')
+
+    def loadtest(self, **options):
+        out = StringIO()
+        call_command(
+            # The test server shares one SQLite connection between threads, so stay sequential
+            'loadtest', url=self.live_server_url, duration=1, warmup=0.2, concurrency=1,
+            mix='registrar:1', users=1, create_users=True, seed=1,
+            stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_replays_traffic_and_writes_a_report(self):
+        out = self.loadtest(output=self.output)
+        self.assertEqual(User.objects.filter(username__startswith='loadtest-').count(), 3)
+        self.assertIn('TOTAL', out)
+
+        with open(self.output) as f:
+            report = json.load(f)
+        self.assertEqual(report['meta']['mix'], {'registrar': 1.0})
+        self.assertGreater(report['total']['requests'], 0)
+        self.assertIn('GET /registrar/issues', report['endpoints'])
+        self.assertIn('304', report['total']['statuses'])
+        # Nothing in the mix should fail on the server or the connection
+        for status in report['total']['statuses']:
+            self.assertTrue(0 < int(status) < 500, report['total']['statuses'])
+
+        out = self.loadtest(compare=self.output)
+        self.assertIn(f'Compared with {self.output}', out)
+        self.assertEqual(User.objects.filter(username__startswith='loadtest-').count(), 3)
+
+
+class SessionTests(SimpleTestCase):
+
+    def test_sessions_draw_from_their_own_seeded_generator(self):
+        def draws(seed):
+            session = Session('http://127.0.0.1:8000', 1, defaultdict(list), seed)
+            session.issue_ids = list(range(100))
+            return [session.some_issue() for _ in range(20)]
+
+        state = random.getstate()
+        self.assertEqual(draws(1), draws(1))
+        self.assertNotEqual(draws(1), draws(2))
+        # Threads never share the module's generator
+        self.assertEqual(random.getstate(), state)
@@ -0,0 +1,131 @@
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from aits import metrics
+from core.log import BackgroundHandler, JsonFormatter, SamplingFilter, dropped_records, parse_mapping
+
+
+def make_record(message, level=logging.INFO, name='aits.test', **extra):
+    record = logging.LogRecord(name, level, __file__, 1, message, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+class FormattingTests(SimpleTestCase):
+
+    def test_records_are_json_with_their_extra_fields(self):
+        entry = json.loads(JsonFormatter().format(make_record('Saved', issue=7)))
+        self.assertEqual(entry['message'], 'Saved')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'aits.test')
+        self.assertEqual(entry['issue'], 7)
+
+    def test_exceptions_are_included(self):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord('aits', logging.ERROR, __file__, 1, 'Failed', (), True)
+            record.exc_info = sys.exc_info()
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertIn('ValueError: boom', entry['exception'])
+
+    def test_parse_mapping(self):
+        self.assertEqual(parse_mapping('aits=0.5, users=1,bad', float), {'aits': 0.5, 'users': 1.0})
+
+
+class SamplingTests(SimpleTestCase):
+
+    def test_rates_apply_to_child_loggers(self):
+        sample = SamplingFilter({'aits.notifications': 0})
+        self.assertFalse(sample.filter(make_record('Sent', name='aits.notifications.batch')))
+        self.assertTrue(sample.filter(make_record('Sent', name='aits.views')))
+
+    def test_warnings_are_always_kept(self):
+        sample = SamplingFilter({'aits': 0})
+        self.assertTrue(sample.filter(make_record('Slow', logging.WARNING)))
+
+
+class BackgroundHandlerTests(SimpleTestCase):
+
+    def make_handler(self, **kwargs):
+        stream = io.StringIO()
+        handler = BackgroundHandler(stream, **kwargs)
+        handler.setFormatter(JsonFormatter())
+        self.addCleanup(handler.stop)
+        return handler, stream
+
+    def lines(self, stream):
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    def test_records_are_written_by_the_listener(self):
+        handler, stream = self.make_handler()
+        handler.handle(make_record('Hello'))
+        handler.handle(logging.LogRecord('aits', logging.INFO, __file__, 1, 'Issue %s', (5,), None))
+        handler.stop()
+        self.assertEqual([line['message'] for line in self.lines(stream)], ['Hello', 'Issue 5'])
+
+    def test_full_queues_drop_and_later_report_the_count(self):
+        handler, stream = self.make_handler(maxsize=2, report_interval=0)
+        # Queue without a listener so the queue stays full
+        handler.pid = os.getpid()
+        for number in range(5):
+            handler.handle(make_record(f'Record {number}'))
+        self.assertEqual(handler.dropped, 3)
+
+        while not handler.queue.empty():
+            handler.queue.get_nowait()
+        handler.handle(make_record('Record 5'))
+        warning = handler.queue.queue[-1]
+        self.assertEqual(warning.levelname, 'WARNING')
+        self.assertEqual(warning.getMessage(), 'Dropped 3 log records while the queue was full')
+        self.assertEqual((warning.dropped, warning.dropped_total), (3, 3))
+
+        # Reported drops are not reported again
+        handler.queue.get_nowait()
+        handler.handle(make_record('Record 6'))
+        self.assertEqual(handler.queue.qsize(), 2)
+
+    def test_reports_wait_for_the_interval(self):
+        handler, stream = self.make_handler(maxsize=1, report_interval=3600)
+        handler.pid = os.getpid()
+        handler.handle(make_record('Kept'))
+        handler.handle(make_record('Dropped'))
+        handler.reported_at = time.monotonic()
+        handler.queue.get_nowait()
+        handler.handle(make_record('Kept'))
+        self.assertEqual(handler.reported, 0)
+
+    def test_dropped_records_are_exported(self):
+        handler, stream = self.make_handler(maxsize=1)
+        handler.pid = os.getpid()
+        before = dropped_records()
+        handler.handle(make_record('Kept'))
+        handler.handle(make_record('Dropped'))
+        self.assertEqual(dropped_records(), before + 1)
+        lines = metrics.DROPPED_LOGS.render(metrics.DROPPED_LOGS.snapshot())
+        self.assertIn(f'aits_log_records_dropped_total {before + 1}', lines)
+
+    def test_the_listener_starts_once_after_fork(self):
+        handler, stream = self.make_handler()
+        handler.start()
+        handler.stop()
+        # As seen from a forked child, where the parent's listener thread is gone
+        handler.pid = -1
+        start = handler.start
+        with mock.patch.object(handler, 'start', side_effect=start) as restart:
+            threads = [threading.Thread(target=handler.emit, args=(make_record('Hello'),)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(restart.call_count, 1)
+        handler.stop()
+        self.assertEqual(len(self.lines(stream)), 8)
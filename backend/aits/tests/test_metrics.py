@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from aits import metrics
+
+from .base import AITSTestCase, make_registrar
+
+
+class MetricsTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        self.authenticate(make_registrar().user)
+
+    def scrape(self, **headers):
+        # Prometheus sends its own bearer token rather than a user's JWT
+        return Client().get(reverse('metrics'), headers=headers)
+
+    def sample(self, text, line):
+        for row in text.splitlines():
+            if row.startswith(line + ' '):
+                return float(row.rsplit(' ', 1)[1])
+        return None
+
+    @override_settings(METRICS_TOKEN='')
+    def test_scrapes_without_a_token_are_refused_outside_debug(self):
+        self.assertEqual(self.scrape().status_code, 403)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=True)
+    def test_scrapes_without_a_token_are_allowed_under_debug(self):
+        self.assertEqual(self.scrape().status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_the_token_is_required_when_set(self):
+        self.assertEqual(self.scrape().status_code, 401)
+        self.assertEqual(self.scrape(Authorization='Bearer wrong').status_code, 401)
+        self.assertEqual(self.scrape(Authorization='Bearer secret').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requests_are_counted_by_route(self):
+        response = self.client.get(reverse('reference'))
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.client.get(reverse('reference-slash'))
+
+        text = self.scrape(Authorization='Bearer secret').content.decode()
+        self.assertEqual(self.sample(text, 'aits_requests_total{route="/reference",method="GET",status="200"}'), 2)
+        self.assertEqual(self.sample(text, 'aits_request_duration_seconds_count{route="/reference",method="GET"}'), 2)
+
+
+@override_settings(METRICS_TOKEN='secret', METRICS_PUBLISH_INTERVAL=0)
+class SharedMetricsTests(MetricsTests):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        settings = override_settings(METRICS_DIR=self.metrics_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        super().setUp()
+
+    def publish_other_process(self, requests, name='metrics-1-1.json'):
+        labels = ['/reference', 'GET']
+        counts = [0] * (len(metrics.LATENCY_BUCKETS) + 1)
+        counts[0] = requests
+        data = {
+            metrics.REQUESTS.name: [[labels + ['200'], requests]],
+            metrics.LATENCY.name: [[labels, [counts, 0.001 * requests]]],
+        }
+        with open(os.path.join(self.metrics_dir, name), 'w') as f:
+            json.dump(data, f)
+
+    def test_scrapes_sum_every_process(self):
+        self.client.get(reverse('reference'))
+        self.assertTrue(os.path.exists(metrics.store_path()))
+        self.publish_other_process(3)
+
+        text = self.scrape(Authorization='Bearer secret').content.decode()
+        self.assertEqual(self.sample(text, 'aits_requests_total{route="/reference",method="GET",status="200"}'), 4)
+        self.assertEqual(self.sample(text, 'aits_request_duration_seconds_count{route="/reference",method="GET"}'), 4)
+        # Metrics only published by this process are still reported
+        self.assertEqual(self.sample(text, 'aits_request_queries_count{route="/reference",method="GET"}'), 1)
+
+    def test_unreadable_files_are_skipped(self):
+        self.client.get(reverse('reference'))
+        with open(os.path.join(self.metrics_dir, 'metrics-2-2.json'), 'w') as f:
+            f.write('{"aits_requests')
+
+        text = self.scrape(Authorization='Bearer secret').content.decode()
+        self.assertEqual(self.sample(text, 'aits_requests_total{route="/reference",method="GET",status="200"}'), 1)
+
+    def test_exited_processes_are_folded_into_one_file(self):
+        self.client.get(reverse('reference'))
+        self.publish_other_process(3)
+        self.publish_other_process(2, 'metrics-11-1.json')
+        metrics.retire(1)
+        self.publish_other_process(5, 'metrics-1-2.json')
+        metrics.retire(1)
+        metrics.retire(1)
+
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.metrics_dir) if name.endswith('.json')),
+            sorted([metrics.DEAD_FILE, 'metrics-11-1.json', os.path.basename(metrics.store_path())])
+        )
+        text = self.scrape(Authorization='Bearer secret').content.decode()
+        self.assertEqual(self.sample(text, 'aits_requests_total{route="/reference",method="GET",status="200"}'), 11)
+        self.assertEqual(self.sample(text, 'aits_request_duration_seconds_count{route="/reference",method="GET"}'), 11)
@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Job, Notification
+from ..notification_batch import notification_batch
+from ..views import create_notification
+from .base import AITSTestCase, make_issue, make_lecturer, make_student
+
+
+class NotificationBatchTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.lecturer = make_lecturer()
+        self.issue = make_issue(self.student, self.lecturer)
+
+    def notify_both(self):
+        create_notification(self.student.user, 'issue_updated', self.issue, 'Updated')
+        create_notification(self.lecturer.user, 'issue_updated', self.issue, 'Updated')
+
+    def test_inserted_together_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with notification_batch():
+                self.notify_both()
+            self.assertFalse(Notification.objects.exists())
+
+        with CaptureQueriesContext(connection) as context:
+            for callback in callbacks:
+                callback()
+        inserts = [query for query in context if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_nested_blocks_share_the_outer_batch(self):
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                with notification_batch():
+                    create_notification(self.student.user, 'issue_updated', self.issue, 'Updated')
+                    with notification_batch():
+                        create_notification(self.lecturer.user, 'issue_updated', self.issue, 'Updated')
+        inserts = [query for query in context if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_rolled_back_block_leaves_no_notifications(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError):
+                with notification_batch():
+                    self.notify_both()
+                    raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_background_jobs_queue_the_batch(self):
+        with self.settings(BACKGROUND_JOBS=True):
+            with notification_batch():
+                self.notify_both()
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'aits.notification_batch.deliver_notifications')
+        self.assertEqual(len(job.payload['notifications']), 2)
+        self.assertFalse(Notification.objects.exists())
@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .. import events
+from ..processes import per_process_backends
+from ..authentication import create_access_token
+from .base import AITSTestCase, make_student
+
+
+class NotificationStreamTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_student().user
+        self.url = reverse('notification-stream') + f'?token={create_access_token(self.user)}'
+
+    def test_requires_a_valid_token(self):
+        self.assertEqual(self.client.get(reverse('notification-stream')).status_code, 401)
+        self.assertEqual(self.client.get(reverse('notification-stream') + '?token=nope').status_code, 401)
+
+    def test_wsgi_sends_the_count_and_asks_to_reconnect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(
+            response.content.decode(),
+            'retry: 30000\n\nevent: unread_count\ndata: {"count": 0}\n\n'
+        )
+
+    async def test_asgi_streams_published_events(self):
+        response = await self.async_client.get(self.url)
+        self.assertTrue(response.streaming)
+        frames = aiter(response.streaming_content)
+        try:
+            first = await anext(frames)
+            self.assertEqual(first, b'event: unread_count\ndata: {"count": 0}\n\n')
+
+            pending = anext(frames)
+            events.publish(self.user.pk, 'unread_count', {'count': 3})
+            self.assertEqual(await pending, b'event: unread_count\ndata: {"count": 3}\n\n')
+        finally:
+            await frames.aclose()
+
+
+class PostgresBrokerTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(events.PostgresBroker, 'start_listener')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.broker = events.PostgresBroker()
+
+    async def test_delivered_events_reach_local_streams(self):
+        subscription = self.broker.subscribe('user:1')
+        self.broker.deliver('{"channel": "user:1", "event": {"event": "unread_count", "data": {"count": 2}}}')
+        self.broker.deliver('{"channel": "user:2", "event": {"event": "unread_count", "data": {"count": 5}}}')
+        event = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual(event, {'event': 'unread_count', 'data': {'count': 2}})
+        self.assertTrue(subscription.queue.empty())
+        subscription.close()
+
+    def test_streams_in_other_processes_count_as_subscribers(self):
+        self.assertTrue(self.broker.has_subscribers('user:1'))
+
+    def test_oversized_events_are_dropped(self):
+        with self.assertLogs('aits.events', 'WARNING'), mock.patch.object(events, 'connections') as connections:
+            self.broker.publish('user:1', {'event': 'notification', 'data': 'x' * 8000})
+        connections.__getitem__.assert_not_called()
+
+    def test_broker_follows_the_setting(self):
+        with self.settings(NOTIFICATION_BROKER='aits.events.PostgresBroker'):
+            self.assertIsInstance(events.get_broker(), events.PostgresBroker)
+        self.assertNotIsInstance(events.get_broker(), events.PostgresBroker)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'LISTEN/NOTIFY needs Postgres')
+class PostgresBrokerRoundTripTests(TransactionTestCase):
+
+    async def test_published_events_reach_streams_through_postgres(self):
+        broker = events.PostgresBroker()
+        subscription = broker.subscribe('user:1')
+        try:
+            # Give the listener time to connect
+            await asyncio.sleep(1)
+            await asyncio.to_thread(broker.publish, 'user:1', {'event': 'unread_count', 'data': {'count': 1}})
+            event = await asyncio.wait_for(subscription.get(), 5)
+            self.assertEqual(event['data'], {'count': 1})
+        finally:
+            subscription.close()
+
+
+class PerProcessBackendTests(SimpleTestCase):
+
+    def test_default_backends_only_work_in_one_process(self):
+        self.assertEqual(len(per_process_backends()), 2)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}},
+        NOTIFICATION_BROKER='aits.events.PostgresBroker'
+    )
+    def test_shared_backends(self):
+        self.assertEqual(per_process_backends(), [])
@@ -0,0 +1,35 @@
+from django.urls import reverse
+
+from ..models import Notification
+from .base import AITSTestCase, make_issue, make_lecturer, make_student
+
+
+class NotificationPayloadTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.issue = make_issue(self.student, make_lecturer())
+        self.notification = Notification.objects.create(
+            recipient=self.student.user, notification_type='issue_created', issue=self.issue, message='Submitted'
+        )
+        self.authenticate(self.student.user)
+
+    def test_compact_by_default(self):
+        response = self.client.get(reverse('get-notifications'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{
+            'id': self.notification.pk,
+            'notification_type': 'issue_created',
+            'issue': {'issue_id': self.issue.pk, 'title': self.issue.title, 'status': 'open'},
+            'message': 'Submitted',
+            'is_read': False,
+            'created_at': response.data[0]['created_at'],
+        }])
+
+    def test_expand_returns_full_issue(self):
+        response = self.client.get(reverse('get-notifications') + '?expand=true')
+        row = response.data[0]
+        self.assertEqual(row['recipient']['username'], self.student.user.username)
+        self.assertEqual(row['issue']['student_name'], self.student.user.get_full_name())
+        self.assertIn('assigned_to', row['issue'])
@@ -0,0 +1,63 @@
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Issue, Notification
+from .base import AITSTestCase, make_issue, make_lecturer, make_student
+
+
+class KeysetPaginationTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.lecturer = make_lecturer()
+        self.issues = [make_issue(self.student, self.lecturer, title=f'Issue {i}') for i in range(5)]
+        # Equal timestamps make the primary key decide the order
+        Issue.objects.update(created_at=timezone.now())
+        self.authenticate(self.lecturer.user)
+
+    def collect(self, url, key='issue_id'):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row[key] for row in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_pages_follow_the_cursor(self):
+        pages = self.collect(reverse('lecturer-issues') + '?page_size=2')
+        expected = sorted((issue.pk for issue in self.issues), reverse=True)
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+    def test_rows_added_meanwhile_do_not_shift_pages(self):
+        response = self.client.get(reverse('lecturer-issues') + '?page_size=2')
+        make_issue(self.student, self.lecturer, title='Newer')
+        following = self.client.get(response.data['next'])
+        seen = [row['issue_id'] for row in response.data['results'] + following.data['results']]
+        expected = sorted((issue.pk for issue in self.issues), reverse=True)[:4]
+        self.assertEqual(seen, expected)
+
+    def test_without_page_parameters_returns_full_list(self):
+        response = self.client.get(reverse('lecturer-issues'))
+        self.assertEqual(len(response.data), 5)
+
+    def test_page_size_is_clamped(self):
+        with self.settings(API_MAX_PAGE_SIZE=3):
+            response = self.client.get(reverse('lecturer-issues') + '?page_size=100')
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('lecturer-issues') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_student_issues_and_notifications(self):
+        for issue in self.issues:
+            Notification.objects.create(
+                recipient=self.student.user, notification_type='issue_updated', issue=issue, message='Updated'
+            )
+        self.authenticate(self.student.user)
+        issue_pages = self.collect(reverse('student-issues') + '?page_size=3')
+        notification_pages = self.collect(reverse('get-notifications') + '?page_size=3', key='id')
+        self.assertEqual([len(page) for page in issue_pages], [3, 2])
+        self.assertEqual([len(page) for page in notification_pages], [3, 2])
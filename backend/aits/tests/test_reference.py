@@ -0,0 +1,124 @@
+from django.urls import reverse
+
+from .. import reference
+from ..models import Department, Student
+from .base import AITSTestCase, make_department
+
+
+class ReferenceDataTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.computing = make_department()
+        self.url = reverse('reference')
+
+    def get(self, **kwargs):
+        return self.client.get(self.url, **kwargs)
+
+    def test_departments_and_choices(self):
+        make_department('Department of Art', 'College of Arts')
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['version'], reference.get_version())
+        self.assertEqual(
+            [department['name'] for department in data['departments']],
+            ['Department of Art', 'Department of Computer Science']
+        )
+        self.assertEqual(data['departments'][0]['faculty'], 'College of Arts')
+        self.assertIn({'value': 'First Year', 'label': 'First Year'}, data['choices']['years_of_study'])
+        self.assertEqual(data['department_faculties'], reference.DEPARTMENT_FACULTY_MAP)
+
+    def test_departments_are_loaded_once_per_version(self):
+        self.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().status_code, 200)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get()['ETag']
+        self.assertEqual(etag, f'W/"{reference.get_version()}"')
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_versioned_urls_are_cached_for_good(self):
+        self.assertEqual(self.get()['Cache-Control'], 'public, max-age=60')
+        version = reference.get_version()
+        self.assertEqual(self.get(data={'v': version})['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(self.get(data={'v': version - 1})['Cache-Control'], 'public, max-age=60')
+
+    def test_department_writes_move_to_a_new_version(self):
+        etag = self.get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_department('Department of Physics', 'College of Science')
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Department of Physics', [department['name'] for department in response.json()['departments']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.filter(name='Department of Physics').get().delete()
+        names = [department['name'] for department in self.get().json()['departments']]
+        self.assertNotIn('Department of Physics', names)
+
+    def test_get_department_creates_unknown_departments(self):
+        self.assertEqual(reference.get_department(self.computing.name), self.computing)
+        mapped = reference.get_department('Department Of Software Engineering')
+        self.assertEqual(mapped.faculty, 'College of Computing')
+        unmapped = reference.get_department('Department of Physics')
+        self.assertEqual(unmapped.faculty, reference.DEFAULT_FACULTY)
+
+    def test_registration_uses_the_loaded_departments(self):
+        reference.get_departments()
+        response = self.client.post(reverse('register'), {
+            'username': 'new',
+            'email': 'new@example.com',
+            'password': 'password',
+            'role': 'student',
+            'first_name': 'New',
+            'last_name': 'Student',
+            'student_data': {
+                'college': 'College of Computing',
+                'department': self.computing.name,
+                'year_of_study': 'First Year',
+                'course': 'Computer Science',
+            },
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Student.objects.get(user__username='new').department, self.computing)
+
+    def test_departments_are_reloaded_after_max_age(self):
+        reference.get_departments()
+        # Written without signals, as by a process that cannot bump the version
+        Department.objects.filter(pk=self.computing.pk).update(faculty='College of Science')
+        self.assertEqual(reference.get_departments()[1][self.computing.name].faculty, 'College of Computing')
+        with self.settings(REFERENCE_MAX_AGE=0):
+            self.assertEqual(reference.get_departments()[1][self.computing.name].faculty, 'College of Science')
+
+    def test_registration_files_new_departments_under_the_default_faculty(self):
+        with self.assertLogs('aits.reference', 'INFO') as logs:
+            response = self.client.post(reverse('register'), {
+                'username': 'new',
+                'email': 'new@example.com',
+                'password': 'password',
+                'role': 'student',
+                'first_name': 'New',
+                'last_name': 'Student',
+                'student_data': {
+                    'college': 'College of Computing',
+                    'department': 'Department Of Software Engineering',
+                    'year_of_study': 'First Year',
+                    'course': 'Software Engineering',
+                },
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        department = Department.objects.get(name='Department Of Software Engineering')
+        self.assertEqual(department.faculty, reference.DEFAULT_FACULTY)
+        self.assertEqual(logs.records[0].getMessage(), 'Department created')
+        self.assertEqual(logs.records[0].department, department.name)
+
+    def test_choice_error(self):
+        self.assertEqual(
+            reference.choice_error('year of study', 'years_of_study'),
+            'Invalid year of study. Must be one of: First Year, Second Year, Third Year'
+        )
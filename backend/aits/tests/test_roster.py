@@ -0,0 +1,231 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from .. import roster
+from ..models import Department, Lecturer, Student, User
+from .base import AITSTestCase, make_department, make_registrar, make_student
+
+HEADER = 'username,email,password,first_name,last_name,college,department,year_of_study,course\n'
+
+
+def student_row(username, department='Department of Computer Science', **fields):
+    row = {
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'secret',
+        'first_name': username.capitalize(),
+        'last_name': 'Test',
+        'college': 'College of Computing',
+        'department': department,
+        'year_of_study': 'First Year',
+        'course': 'Computer Science',
+        **fields,
+    }
+    return ','.join(row[field] for field in HEADER.strip().split(',')) + '\n'
+
+
+def run(content, format='csv', **options):
+    return roster.import_roster(io.BytesIO(content.encode()), format, **options)
+
+
+class RosterImportTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.department = make_department()
+
+    def test_students_are_created_with_profiles(self):
+        summary = run(HEADER + student_row('first') + student_row('second'), role='student')
+        self.assertEqual((summary['valid'], summary['created'], summary['error_count']), (2, 2, 0))
+        student = Student.objects.select_related('user').get(user__username='first')
+        self.assertEqual(student.department, self.department)
+        self.assertEqual(student.user.role, 'student')
+        self.assertTrue(check_password('secret', student.user.password))
+
+    def test_invalid_rows_are_reported_by_line_and_skipped(self):
+        make_student('taken')
+        content = HEADER + ''.join([
+            student_row('taken', email='taken2@example.com'),
+            student_row('fresh'),
+            student_row('fresh', email='fresh2@example.com'),
+            student_row('badyear', year_of_study='Tenth Year'),
+            student_row('noemail', email=''),
+            student_row('bademail', email='not-an-email'),
+        ])
+        summary = run(content, role='student')
+        self.assertEqual(summary['created'], 1)
+        errors = {error['line']: error['errors'] for error in summary['errors']}
+        self.assertEqual(errors[2], {'username': 'This username is already taken'})
+        self.assertEqual(errors[4], {'username': 'This username is already taken'})
+        self.assertIn('year_of_study', errors[5])
+        self.assertEqual(errors[6], {'email': 'This field is required.'})
+        self.assertEqual(errors[7], {'email': 'Enter a valid email address.'})
+        self.assertEqual(summary['error_count'], 5)
+
+    def test_emails_are_unique_ignoring_case(self):
+        summary = run(HEADER + student_row('first') + student_row('second', email='FIRST@example.com'), role='student')
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(summary['errors'][0]['errors'], {'email': 'This email is already registered'})
+
+    def test_rows_need_a_role(self):
+        summary = run(HEADER + student_row('first'))
+        self.assertEqual(summary['errors'], [{'line': 2, 'errors': {'role': 'Must be one of: student, lecturer'}}])
+
+    def test_unknown_departments_are_created_once(self):
+        content = HEADER + student_row('first', 'Department of Physics') + student_row('second', 'Department of Physics')
+        summary = run(content, role='student')
+        self.assertEqual(summary['departments_created'], ['Department of Physics'])
+        self.assertEqual(Student.objects.filter(department__name='Department of Physics').count(), 2)
+
+    def test_dry_run_creates_nothing(self):
+        summary = run(HEADER + student_row('first', 'Department of Physics'), role='student', dry_run=True)
+        self.assertEqual((summary['valid'], summary['created'], summary['dry_run']), (1, 0, True))
+        self.assertFalse(User.objects.filter(username='first').exists())
+        self.assertFalse(Department.objects.filter(name='Department of Physics').exists())
+
+    def test_ndjson_lecturers_with_registration_field_names(self):
+        content = '\n'.join([
+            json.dumps({'userId': 'lect', 'fullName': 'Ada Lovelace', 'email': 'ada@example.com',
+                        'password': 'secret', 'department': self.department.name}),
+            '',
+            '{"userId": ',
+            '[1, 2]',
+        ])
+        summary = run(content, 'ndjson', role='lecturer')
+        self.assertEqual(summary['created'], 1)
+        lecturer = Lecturer.objects.select_related('user').get(user__username='lect')
+        self.assertEqual((lecturer.user.first_name, lecturer.user.last_name), ('Ada', 'Lovelace'))
+        self.assertEqual([error['line'] for error in summary['errors']], [3, 4])
+        self.assertTrue(summary['errors'][0]['errors']['row'].startswith('Invalid JSON'))
+
+    def test_chunks_are_written_in_batches(self):
+        content = HEADER + ''.join(student_row(f'student{number}') for number in range(5))
+        # Usernames, emails and departments up front, then a savepoint pair and two inserts per chunk
+        with self.assertNumQueries(3 + 3 * 4):
+            summary = run(content, role='student', batch_size=2, workers=1)
+        self.assertEqual(summary['created'], 5)
+
+    def test_accounts_registered_meanwhile_are_reported(self):
+        importer = roster.RosterImport(role='student', workers=1)
+        make_student('late')
+        summary = importer.run(roster.read_rows(io.StringIO(HEADER + student_row('late') + student_row('ok')), 'csv'))
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(summary['errors'][0]['line'], 2)
+
+    def test_errors_reported_are_capped(self):
+        with self.settings(ROSTER_MAX_ERRORS=2):
+            summary = run(HEADER + ''.join(student_row('x', email='') for _ in range(4)), role='student')
+        self.assertEqual((summary['error_count'], len(summary['errors'])), (4, 2))
+
+    @mock.patch.object(roster, 'POOL_THRESHOLD', 2)
+    def test_passwords_are_hashed_in_worker_processes(self):
+        summary = run(HEADER + student_row('first') + student_row('second'), role='student', workers=2)
+        self.assertEqual(summary['created'], 2)
+        # Spawned workers hash with the project's hashers rather than the test's
+        for user in User.objects.filter(username__in=['first', 'second']):
+            self.assertTrue(PBKDF2PasswordHasher().verify('secret', user.password))
+
+    def test_import_shows_in_the_cached_directory(self):
+        self.authenticate(make_registrar().user)
+        self.client.get(reverse('student-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            run(HEADER + student_row('first'), role='student')
+        usernames = [row['studentNumber'] for row in self.client.get(reverse('student-list')).json()]
+        self.assertEqual(usernames, ['first'])
+
+
+class ImportRosterCommandTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        make_department()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def call(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_roster', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_reports_created_and_rejected_rows(self):
+        path = self.write('roster.csv', HEADER + student_row('first') + student_row('first', email='again@example.com'))
+        errors_path = os.path.join(self.directory, 'errors.json')
+        stdout, stderr = self.call(path, '--role', 'student', '--errors', errors_path)
+        self.assertIn('Created 1 accounts', stdout)
+        self.assertIn('1 rows rejected', stdout)
+        self.assertIn('line 3: username: This username is already taken', stderr)
+        with open(errors_path) as f:
+            self.assertEqual(json.load(f)[0]['line'], 3)
+
+    def test_format_follows_the_extension(self):
+        row = {'username': 'lect', 'email': 'lect@example.com', 'password': 'secret', 'first_name': 'Lect',
+               'department': 'Department of Computer Science', 'role': 'lecturer'}
+        stdout, _ = self.call(self.write('roster.jsonl', json.dumps(row) + '\n'))
+        self.assertIn('Created 1 accounts', stdout)
+        self.assertTrue(Lecturer.objects.filter(user__username='lect').exists())
+
+    def test_dry_run(self):
+        stdout, _ = self.call(self.write('roster.csv', HEADER + student_row('first')), '--role', 'student', '--dry-run')
+        self.assertIn('Validated 1 accounts', stdout)
+        self.assertFalse(User.objects.filter(username='first').exists())
+
+
+class RosterEndpointTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        make_department()
+        self.registrar = make_registrar()
+        self.authenticate(self.registrar.user)
+        self.url = reverse('registrar-roster-import')
+
+    def upload(self, content, name='roster.csv', **data):
+        file = SimpleUploadedFile(name, content if isinstance(content, bytes) else content.encode())
+        return self.client.post(self.url, {'file': file, **data}, format='multipart')
+
+    def test_upload_creates_accounts(self):
+        response = self.upload(HEADER + student_row('first'), role='student')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertTrue(Student.objects.filter(user__username='first').exists())
+
+    def test_dry_run_and_rejected_rows_return_ok(self):
+        response = self.upload(HEADER + student_row('first') + student_row('bad', email=''), role='student',
+                               dry_run='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['valid'], response.data['error_count']), (1, 1))
+        self.assertFalse(User.objects.filter(username='first').exists())
+
+    def test_ndjson_is_detected_from_the_file_name(self):
+        row = {'username': 'first', 'email': 'first@example.com', 'password': 'secret', 'first_name': 'First',
+               'college': 'College of Computing', 'department': 'Department of Computer Science',
+               'year_of_study': 'First Year', 'course': 'Computer Science'}
+        response = self.upload(json.dumps(row), 'roster.ndjson', role='student')
+        self.assertEqual(response.status_code, 201)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.post(self.url, {}, format='multipart').status_code, 400)
+        self.assertEqual(self.upload(HEADER, role='registrar').status_code, 400)
+        self.assertEqual(self.upload(HEADER, format='xlsx').status_code, 400)
+        response = self.upload(b'\xff\xfe\x00bad', role='student')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'The roster must be UTF-8 text')
+
+    def test_only_registrars_may_import(self):
+        self.authenticate(make_student().user)
+        self.assertEqual(self.upload(HEADER + student_row('first'), role='student').status_code, 403)
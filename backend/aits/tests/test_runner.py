@@ -0,0 +1,172 @@
+import asyncio
+import os
+import shutil
+import signal
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import runner
+
+
+class RunnerOptionsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.backends = mock.patch('runner.per_process_backends', return_value=[])
+        self.backends.start()
+        self.addCleanup(self.backends.stop)
+        # Serving sets METRICS_DIR for the workers
+        environ = mock.patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def test_default_workers_fit_the_connection_budget(self):
+        with mock.patch.dict(os.environ, {'DB_MAX_CONNECTIONS': '20', 'WEB_THREADS': '4'}), \
+                mock.patch('os.cpu_count', return_value=64):
+            options = runner.parse_args([])
+        self.assertEqual((options.workers, options.threads), (5, 4))
+        self.assertEqual(options.server, 'asgi')
+
+        with mock.patch('os.cpu_count', return_value=2):
+            self.assertEqual(runner.parse_args(['--db-connections', '100']).workers, 2)
+        self.assertEqual(runner.parse_args(['--db-connections', '2']).workers, 1)
+
+    def test_explicit_workers_win(self):
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '3'}):
+            self.assertEqual(runner.parse_args([]).workers, 3)
+        self.assertEqual(runner.parse_args(['--workers', '7', '--server', 'wsgi']).workers, 7)
+
+    def test_per_process_backends_allow_one_worker(self):
+        # The test settings keep the default locmem cache and in-process broker
+        self.backends.stop()
+        with mock.patch('os.cpu_count', return_value=64):
+            self.assertEqual(runner.parse_args(['--db-connections', '100']).workers, 1)
+        self.assertEqual(runner.parse_args(['--workers', '1']).workers, 1)
+        with mock.patch('sys.stderr'), self.assertRaises(SystemExit):
+            runner.parse_args(['--workers', '2'])
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '3'}), mock.patch('sys.stderr'), \
+                self.assertRaises(SystemExit):
+            runner.parse_args([])
+        # Status and reload start no workers
+        self.assertEqual(runner.parse_args(['status', '--workers', '2']).workers, 2)
+
+
+class ProgressTests(SimpleTestCase):
+
+    def test_stall_counts_from_the_latest_response_or_arrival(self):
+        progress = runner.Progress()
+        now = time.time()
+        self.assertEqual(progress.stalled_for(now + 100), 0)
+
+        first = progress.begin()
+        self.assertAlmostEqual(progress.stalled_for(now + 100), 100, delta=1)
+        second = progress.begin()
+        progress.respond(first)
+        progress.responded_at = now + 50
+        self.assertAlmostEqual(progress.stalled_for(now + 100), 50, delta=1)
+
+        progress.respond(second)
+        self.assertEqual(progress.stalled_for(now + 100), 0)
+
+
+class WorkerTests(SimpleTestCase):
+
+    def make_worker(self, **options):
+        defaults = {'server': 'asgi', 'threads': 1, 'max_requests': 0, 'max_requests_jitter': 0}
+        defaults.update(options)
+        return runner.Worker(None, mock.Mock(**defaults), 0)
+
+    def test_wsgi_requests_stop_waiting_when_they_respond(self):
+        worker = self.make_worker(server='wsgi')
+
+        def application(environ, start_response):
+            self.assertEqual(len(worker.progress.waiting), 1)
+            start_response('200 OK', [])
+            self.assertEqual(len(worker.progress.waiting), 0)
+            return [b'ok']
+
+        def failing(environ, start_response):
+            raise ValueError
+
+        self.assertEqual(worker.wrap_wsgi(application)({}, mock.Mock()), [b'ok'])
+        with self.assertRaises(ValueError):
+            worker.wrap_wsgi(failing)({}, mock.Mock())
+        self.assertEqual(worker.progress.waiting, {})
+        self.assertEqual(worker.requests, 2)
+
+    def test_max_requests_stops_the_worker(self):
+        worker = self.make_worker(max_requests=2)
+        worker.server = mock.Mock(should_exit=False)
+        worker.admit()
+        self.assertFalse(worker.server.should_exit)
+        worker.admit()
+        self.assertTrue(worker.stopping)
+        self.assertTrue(worker.server.should_exit)
+
+    def test_asgi_slots_are_held_until_the_response_starts(self):
+        worker = self.make_worker(threads=1)
+        log = []
+        release_stream = asyncio.Event()
+
+        async def application(scope, receive, send):
+            log.append(f'start {scope["path"]}')
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            if scope['path'] == '/stream':
+                await release_stream.wait()
+            await send({'type': 'http.response.body', 'body': b''})
+            log.append(f'end {scope["path"]}')
+
+        async def send(message):
+            await asyncio.sleep(0)
+
+        async def main():
+            counted = worker.wrap_asgi(application)
+            stream = asyncio.create_task(counted({'type': 'http', 'path': '/stream'}, None, send))
+            await asyncio.sleep(0.01)
+            # The open stream has sent its headers, so it no longer holds the only slot
+            await asyncio.wait_for(counted({'type': 'http', 'path': '/list'}, None, send), 1)
+            release_stream.set()
+            await stream
+
+        asyncio.run(main())
+        self.assertEqual(log, ['start /stream', 'start /list', 'end /list', 'end /stream'])
+        self.assertEqual(worker.progress.waiting, {})
+
+
+class HungWorkerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.health_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.health_dir)
+        self.master = runner.Master(mock.Mock(health_dir=self.health_dir, timeout=60))
+        self.master.workers = {101: 0}
+
+    def beat(self, age=0, stalled_for=0):
+        runner.write_json(runner.heartbeat_path(self.health_dir, 101), {
+            'updated_at': time.time() - age, 'stalled_for': stalled_for, 'waiting': 3,
+        })
+
+    def test_kills_silent_and_stalled_workers_only(self):
+        for age, stalled_for, killed in [
+            (1, 0, False),
+            (1, 30, False),
+            (90, 0, True),
+            (1, 61, True),
+            (30, 40, True),
+        ]:
+            self.beat(age, stalled_for)
+            with mock.patch.object(self.master, 'signal_workers') as signal_workers, \
+                    mock.patch.object(runner, 'logger'):
+                self.master.kill_hung_workers()
+            calls = [mock.call([101], signal.SIGKILL)] if killed else []
+            self.assertEqual(signal_workers.call_args_list, calls, (age, stalled_for))
+
+    def test_exited_workers_metrics_are_retired(self):
+        self.master.stopping = True
+        with mock.patch('os.waitpid', side_effect=[(101, 0), (0, 0)]), \
+                mock.patch('aits.metrics.retire') as retire:
+            self.master.reap()
+        retire.assert_called_once_with(101)
+        self.assertEqual(self.master.workers, {})
@@ -0,0 +1,99 @@
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from .base import AITSTestCase, make_department, make_issue, make_registrar, make_student
+
+
+class IssueSearchTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.registrar = make_registrar()
+        self.authenticate(self.registrar.user)
+        self.url = reverse('registrar-issue-search')
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def titles(self, **params):
+        return [issue['title'] for issue in self.search(**params)['results']]
+
+    def test_only_registrars_may_search(self):
+        self.authenticate(self.student.user)
+        self.assertEqual(self.client.get(self.url, {'q': 'marks'}).status_code, 403)
+
+    def test_matches_title_description_and_course_unit(self):
+        make_issue(self.student, title='Missing exam marks', description='Nothing here')
+        make_issue(self.student, title='Appeal', description='My exam was marked twice')
+        make_issue(self.student, title='Timetable', description='Clash', courseUnit='CSC1204')
+        make_issue(self.student, title='Fees', description='Receipt not recorded')
+
+        self.assertEqual(set(self.titles(q='exam')), {'Missing exam marks', 'Appeal'})
+        self.assertEqual(self.titles(q='CSC1204'), ['Timetable'])
+        self.assertEqual(self.titles(q='unrelated'), [])
+
+    @skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'ranking needs Postgres or SQLite FTS5')
+    def test_title_matches_rank_above_description_matches(self):
+        make_issue(self.student, title='Appeal', description='Please check my transcript')
+        make_issue(self.student, title='Transcript error', description='Wrong grade')
+
+        self.assertEqual(self.titles(q='transcript'), ['Transcript error', 'Appeal'])
+
+    def test_without_query_lists_newest_first(self):
+        make_issue(self.student, title='First')
+        make_issue(self.student, title='Second')
+        self.assertEqual(self.titles(), ['Second', 'First'])
+
+    def test_filters_apply_before_ranking(self):
+        other = make_student('other', make_department('Department of Physics'))
+        make_issue(self.student, title='Exam marks', category='academic')
+        make_issue(self.student, title='Exam fees', category='financial', status='resolved')
+        make_issue(other, title='Exam clash')
+
+        self.assertEqual(self.titles(q='exam', category='financial'), ['Exam fees'])
+        self.assertEqual(self.titles(q='exam', status='resolved'), ['Exam fees'])
+        self.assertEqual(self.titles(q='exam', department='Department of Physics'), ['Exam clash'])
+
+    def test_index_follows_edits_and_deletes(self):
+        issue = make_issue(self.student, title='Missing marks', description='Coursework')
+        issue.title = 'Lost certificate'
+        issue.save()
+        self.assertEqual(self.titles(q='marks'), [])
+        self.assertEqual(self.titles(q='certificate'), ['Lost certificate'])
+
+        issue.delete()
+        self.assertEqual(self.titles(q='certificate'), [])
+
+    def test_query_syntax_is_treated_as_words(self):
+        make_issue(self.student, title='Missing marks')
+        self.assertEqual(self.titles(q='marks OR "'), [])
+        self.assertEqual(self.titles(q='missing* -marks'), ['Missing marks'])
+        self.assertEqual(self.titles(q='!!!'), [])
+        with mock.patch('aits.search.connection') as fallback:
+            fallback.vendor = 'other'
+            self.assertEqual(self.titles(q='!!!'), [])
+
+    @override_settings(API_MAX_SEARCH_RESULTS=3)
+    def test_pages_stop_at_the_result_cap(self):
+        for i in range(5):
+            make_issue(self.student, title=f'Exam {i}')
+
+        first = self.search(q='exam', page_size=2)
+        self.assertEqual(len(first['results']), 2)
+        second = self.client.get(first['next']).data
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.client.get(self.url, {'q': 'exam', 'page_size': 2, 'page': 3}).status_code, 404)
+
+    def test_substring_fallback_without_full_text_index(self):
+        make_issue(self.student, title='Missing exam marks')
+        make_issue(self.student, title='Fees')
+        with mock.patch('aits.search.connection') as fallback:
+            fallback.vendor = 'other'
+            self.assertEqual(self.titles(q='exam marks'), ['Missing exam marks'])
@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import F
+
+from ..models import AcademicRegistrar, Department, Issue, Lecturer, Notification, Student, User
+from ..search import search_issues
+from .base import AITSTestCase
+from .test_analytics import recounted, stored_counts
+
+
+class SeedScaleTests(AITSTestCase):
+
+    def seed(self, **options):
+        defaults = {
+            'departments': 3, 'students': 20, 'lecturers': 4, 'registrars': 2, 'issues': 100,
+            'batch_size': 30, 'random_seed': 1,
+        }
+        defaults.update(options)
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('seed_scale', stdout=out, **defaults)
+        return out.getvalue()
+
+    def test_seeds_consistent_data(self):
+        out = self.seed()
+        self.assertIn('Seeded 20 students, 4 lecturers, 2 registrars, 100 issues', out)
+        self.assertEqual(Department.objects.count(), 3)
+        self.assertEqual(Student.objects.count(), 20)
+        self.assertEqual(Lecturer.objects.count(), 4)
+        self.assertEqual(AcademicRegistrar.objects.count(), 2)
+        self.assertEqual(Issue.objects.count(), 100)
+
+        # Only assigned issues move past open, and every issue notified its student
+        self.assertFalse(Issue.objects.filter(assigned_to__isnull=True).exclude(status='open').exists())
+        self.assertEqual(
+            Notification.objects.filter(notification_type='issue_created').count(), 100
+        )
+        self.assertFalse(Issue.objects.filter(updated_at__lt=F('created_at')).exists())
+
+        user = User.objects.get(username='seed-s1')
+        self.assertEqual(user.role, 'student')
+        self.assertTrue(user.check_password('password'))
+        self.assertEqual(stored_counts(), recounted())
+        self.assertEqual(search_issues(Issue.objects.all(), 'seeded').count(), 100)
+
+    def test_seeding_again_adds_rows(self):
+        self.seed()
+        self.seed(prefix='more', students=5, issues=10, departments=0)
+        self.assertEqual(Student.objects.count(), 25)
+        self.assertEqual(Issue.objects.count(), 110)
+        self.assertTrue(User.objects.filter(username__startswith='more-').exists())
+        self.assertEqual(stored_counts(), recounted())
+
+    def test_issues_need_students(self):
+        with self.assertRaises(CommandError):
+            self.seed(students=0)
@@ -0,0 +1,57 @@
+from django.urls import reverse
+
+from .. import notification_counts
+from ..models import Notification
+from ..notification_batch import notification_batch
+from ..views import create_notification
+from .base import AITSTestCase, make_issue, make_student
+
+
+class UnreadCountTests(AITSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.user = self.student.user
+        self.issue = make_issue(self.student)
+        self.authenticate(self.user)
+
+    def notify(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            with notification_batch():
+                for _ in range(count):
+                    create_notification(self.user, 'issue_updated', self.issue, 'Updated')
+
+    def unread_count(self):
+        response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+    def test_counts_once_then_serves_from_cache(self):
+        self.notify(2)
+        self.assertEqual(self.unread_count(), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(notification_counts.get_unread_count(self.user.pk), 2)
+
+    def test_new_notifications_increment_the_cached_count(self):
+        self.assertEqual(self.unread_count(), 0)
+        self.notify(3)
+        with self.assertNumQueries(0):
+            self.assertEqual(notification_counts.get_unread_count(self.user.pk), 3)
+
+    def test_reading_and_deleting_decrement_it(self):
+        self.notify(3)
+        self.assertEqual(self.unread_count(), 3)
+        first, second, _ = Notification.objects.filter(recipient=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('mark-notification-read', args=[first.pk]))
+            # Marking it again must not count twice
+            self.client.post(reverse('mark-notification-read', args=[first.pk]))
+            self.client.delete(reverse('delete-notification', args=[second.pk]))
+        self.assertEqual(self.unread_count(), 1)
+
+    def test_clear_all_resets_it(self):
+        self.notify(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('clear-all-notifications'))
+        self.assertEqual(self.unread_count(), 0)
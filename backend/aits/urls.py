@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     LoginView, 
     RegisterView, 
+    TokenRefreshView,
     StudentIssueCreateView,
     StudentIssueDetailView,
     StudentListView,
@@ -13,6 +15,7 @@ from .views import (
     IssueUpdateView,
     IssueDeleteView,
     AcademicRegistrarIssueListView,
+    AcademicRegistrarIssueSearchView,
     AcademicRegistrarIssueDetailView,
     get_notifications,
     mark_notification_read,
@@ -20,11 +23,31 @@ from .views import (
     clear_all_notifications,
     update_issue_status
 )
-from . import views
+from . import metrics, views
+
+# Under core.asgi the read endpoints answer GET on the async ORM
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+    student_issues_view = async_views.student_issues_view
+    lecturer_issues_view = async_views.lecturer_issues_view
+    registrar_issues_view = async_views.registrar_issues_view
+    notifications_view = async_views.notifications_view
+    unread_count_view = async_views.unread_count_view
+else:
+    student_issues_view = StudentIssueCreateView.as_view()
+    lecturer_issues_view = LecturerIssueListView.as_view()
+    registrar_issues_view = AcademicRegistrarIssueListView.as_view()
+    notifications_view = get_notifications
+    unread_count_view = views.get_unread_count
+
 urlpatterns = [
     # Auth routes
     path('login', LoginView.as_view(), name='login'),
     path('register', RegisterView.as_view(), name='register'),
+    path('token/refresh', TokenRefreshView.as_view(), name='token-refresh'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh-slash'),
+    path('reference', views.get_reference_data, name='reference'),
+    path('reference/', views.get_reference_data, name='reference-slash'),
     
     # Student routes
     path('students', StudentListView.as_view(), name='student-list'),
@@ -35,8 +58,8 @@ urlpatterns = [
     path('lecturers/', LecturerListView.as_view(), name='lecturer-list-slash'),
     path('lecturers/<int:pk>', LecturerUpdateView.as_view(), name='lecturer-update'),
     path('lecturers/<int:pk>/delete', LecturerDeleteView.as_view(), name='lecturer-delete'),
-    path('lecturer/issues', LecturerIssueListView.as_view(), name='lecturer-issues'),
-    path('lecturer/issues/', LecturerIssueListView.as_view(), name='lecturer-issues-slash'),
+    path('lecturer/issues', lecturer_issues_view, name='lecturer-issues'),
+    path('lecturer/issues/', lecturer_issues_view, name='lecturer-issues-slash'),
     path('lecturer/issues/<int:pk>', LecturerIssueDetailView.as_view(), name='lecturer-issue-detail'),
     path('lecturer/issues/<int:pk>/', LecturerIssueDetailView.as_view(), name='lecturer-issue-detail-slash'),
     path('lecturer/issues/<int:pk>/status', update_issue_status, name='lecturer-issue-status-update'),
@@ -44,30 +67,45 @@ urlpatterns = [
     # Issue routes
     path('issues/<int:pk>', StudentIssueDetailView.as_view(), name='issue-detail'),
     path('issues/<int:pk>/', StudentIssueDetailView.as_view(), name='issue-detail-slash'),
-    path('student/issues', StudentIssueCreateView.as_view(), name='student-issues'),
+    path('student/issues', student_issues_view, name='student-issues'),
     path('student/issues/<int:pk>', StudentIssueDetailView.as_view(), name='student-issue-detail'),
     path('issues/<int:pk>/update', IssueUpdateView.as_view(), name='issue-update'),
     path('issues/<int:pk>/delete', IssueDeleteView.as_view(), name='issue-delete'),
-    path('registrar/issues', AcademicRegistrarIssueListView.as_view(), name='registrar-issues'),
+    path('issues/<int:pk>/attachment', views.download_attachment, name='issue-attachment'),
+    path('registrar/issues', registrar_issues_view, name='registrar-issues'),
+    path('registrar/issues/search', AcademicRegistrarIssueSearchView.as_view(), name='registrar-issue-search'),
+    path('registrar/issues/search/', AcademicRegistrarIssueSearchView.as_view(), name='registrar-issue-search-slash'),
+    path('registrar/issues/bulk', views.bulk_update_issues, name='registrar-issue-bulk'),
+    path('registrar/issues/bulk/', views.bulk_update_issues, name='registrar-issue-bulk-slash'),
     path('registrar/issues/<int:pk>', AcademicRegistrarIssueDetailView.as_view(), name='registrar-issue-detail'),
+    path('registrar/roster/import', views.import_roster, name='registrar-roster-import'),
+    path('registrar/roster/import/', views.import_roster, name='registrar-roster-import-slash'),
+    path('registrar/analytics', views.get_issue_analytics, name='registrar-analytics'),
+    path('registrar/analytics/', views.get_issue_analytics, name='registrar-analytics-slash'),
     path('registrar/issues/<int:pk>/', AcademicRegistrarIssueDetailView.as_view(), name='registrar-issue-detail-slash'),
     path('registrar/issues/<int:pk>/status', update_issue_status, name='registrar-issue-status-update'),
     
     # Notification routes
-    path('notifications', get_notifications, name='get-notifications'),
-    path('notifications/', get_notifications, name='get-notifications-slash'),
+    path('notifications', notifications_view, name='get-notifications'),
+    path('notifications/', notifications_view, name='get-notifications-slash'),
     path('notifications/<int:notification_id>/mark-read', mark_notification_read, name='mark-notification-read'),
     path('notifications/<int:notification_id>/mark-read/', mark_notification_read, name='mark-notification-read-slash'),
-    path('notifications/unread-count', views.get_unread_count, name='notification-unread-count'),
-    path('notifications/unread-count/', views.get_unread_count, name='notification-unread-count-slash'),
+    path('notifications/unread-count', unread_count_view, name='notification-unread-count'),
+    path('notifications/unread-count/', unread_count_view, name='notification-unread-count-slash'),
+    path('notifications/stream', views.notification_stream, name='notification-stream'),
+    path('notifications/stream/', views.notification_stream, name='notification-stream-slash'),
     path('notifications/<int:notification_id>/delete', delete_notification, name='delete-notification'),
     path('notifications/clear-all', clear_all_notifications, name='clear-all-notifications'),
     path('notifications/<int:notification_id>/delete/', delete_notification, name='delete-notification-slash'),
     path('notifications/clear-all/', clear_all_notifications, name='clear-all-notifications-slash'),
     
+    # Monitoring
+    path('metrics', metrics.metrics_view, name='metrics'),
+    path('metrics/', metrics.metrics_view, name='metrics-slash'),
+    
     # Keep other existing routes...
     path('login/', LoginView.as_view(), name='login-slash'),
     path('register/', RegisterView.as_view(), name='register-slash'),
-    path('student/issues/', StudentIssueCreateView.as_view(), name='student-issues-slash'),
+    path('student/issues/', student_issues_view, name='student-issues-slash'),
     path('student/issues/<int:pk>/', StudentIssueDetailView.as_view(), name='student-issue-detail-slash'),
 ]
@@ -1,15 +1,20 @@
+import asyncio
+import json
+import logging
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, parser_classes, permission_classes
+from rest_framework.exceptions import APIException, AuthenticationFailed
 from django.contrib.auth.hashers import check_password
 from rest_framework import serializers
 from django.conf import settings
-import jwt
-import traceback
-import datetime
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
 from .models import Issue, Student, Lecturer, User, Notification
@@ -19,11 +24,45 @@ from .serializers import (
     StudentRegistrationSerializer,
     LecturerRegistrationSerializer,
     NotificationSerializer,
+    CompactNotificationSerializer,
     RegistrarRegistrationSerializer,
     StudentSerializer,
-    LecturerSerializer
+    LecturerSerializer,
+    BulkIssueOperationSerializer
 )
 from .permissions import IsStudent, IsLecturer, IsAcademicRegistrar
+from .authentication import (
+    JWTAuthentication, create_access_token, create_refresh_token, get_request_profile_id, rotate_refresh_token
+)
+from .pagination import DirectoryPagination, KeysetPagination, RankedPagination
+from .search import search_issues
+from . import analytics, directory, events, notification_counts, reference, roster
+from .notification_batch import notification_batch
+from .downloads import attachment_response
+from .conditional import (
+    ConditionalListMixin,
+    all_issues_validator,
+    etag_matches,
+    issue_validator,
+    make_etag,
+    not_modified,
+    notification_validator,
+    with_etag,
+)
+
+logger = logging.getLogger(__name__)
+# One record per notification, so this logger is sampled by default
+notification_logger = logging.getLogger('aits.notifications')
+
+
+def get_issue_queryset():
+    """Issues joined with the student and lecturer rows IssueSerializer reads"""
+    return Issue.objects.select_related(
+        'student__user',
+        'student__department',
+        'assigned_to__user',
+        'assigned_to__department',
+    )
 
 
 class LoginView(APIView):
@@ -37,22 +76,13 @@ class LoginView(APIView):
             user = serializer.validated_data['user']
             role = serializer.validated_data['role']
             
-            # Create JWT token that expires in 24 hours
-            now = datetime.datetime.utcnow()
-            exp = now + datetime.timedelta(hours=24)
-            token = jwt.encode(
-                {
-                    'user_id': user.username,
-                    'role': role,
-                    'exp': int(exp.timestamp())
-                },
-                settings.SECRET_KEY,
-                algorithm='HS256'
-            )
+            # Create JWT token carrying the user's pk, role and profile id
+            token = create_access_token(user)
             
             # Return token and user info
             return Response({
                 'token': token,
+                'refresh': create_refresh_token(user),
                 'user': {
                     'userId': user.username,
                     'fullName': f"{user.first_name} {user.last_name}".strip(),
@@ -67,6 +97,25 @@ class LoginView(APIView):
         )
 
 
+class TokenRefreshView(APIView):
+    """Exchange a refresh token for a new access token without checking the password"""
+    # An expired access token in the header must not stop the refresh
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        refresh = request.data.get('refresh')
+        if not refresh:
+            return Response({'error': 'Refresh token is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            token, refresh = rotate_refresh_token(refresh)
+        except AuthenticationFailed as e:
+            return Response({'error': str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response({'token': token, 'refresh': refresh}, status=status.HTTP_200_OK)
+
+
 class RegisterView(APIView):
     """Handle user registration for different roles"""
     permission_classes = [AllowAny]
@@ -74,8 +123,8 @@ class RegisterView(APIView):
     def post(self, request):
         # Get user role from request
         role = request.data.get('role')
-        print("\n=== Registration Request ===")
-        print("Received data:", request.data)
+        # Field names only; the body holds the password
+        logger.debug('Registration request', extra={'role': role, 'fields': sorted(request.data)})
         
         # Choose serializer based on role
         if role == 'student':
@@ -85,7 +134,7 @@ class RegisterView(APIView):
         elif role == 'registrar':
             serializer = RegistrarRegistrationSerializer(data=request.data)
         else:
-            print("Invalid role:", role)
+            logger.info('Registration rejected: invalid role', extra={'role': role})
             return Response(
                 {'errors': {'role': f'Invalid role. Must be one of: student, lecturer, registrar'}},
                 status=status.HTTP_400_BAD_REQUEST
@@ -96,7 +145,7 @@ class RegisterView(APIView):
             try:
                 instance = serializer.save()
                 user = instance.user
-                print("User created successfully:", user.username)
+                logger.info('User registered', extra={'user_id': user.pk, 'username': user.username, 'role': user.role})
                 return Response({
                     'message': 'Registration successful',
                     'user': {
@@ -107,11 +156,10 @@ class RegisterView(APIView):
                     }
                 }, status=status.HTTP_201_CREATED)
             except serializers.ValidationError as e:
-                print("Validation error:", str(e))
+                logger.info('Registration rejected: %s', e, extra={'role': role})
                 return Response({'errors': {'general': str(e)}}, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
-                print("Registration error:", str(e))
-                print("Traceback:", traceback.format_exc())
+                logger.exception('Registration failed', extra={'role': role})
                 return Response(
                     {'errors': {'general': 'Registration failed. Please try again.'}},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -122,10 +170,31 @@ class RegisterView(APIView):
         for field, error_list in serializer.errors.items():
             errors[field] = error_list[0] if isinstance(error_list, list) else error_list
         
-        print("Validation errors:", errors)
+        logger.info('Registration rejected: invalid fields', extra={'role': role, 'fields': sorted(errors)})
         return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def get_reference_data(request):
+    """Departments and choice lists for the registration and issue forms"""
+    version = reference.get_departments()[0]
+    etag = 'W/"%s"' % version
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(reference.as_json())
+    
+    response['ETag'] = etag
+    if request.query_params.get('v') == str(version):
+        # A versioned URL never changes; a department write moves clients to a new one
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
 class StudentIssueCreateView(APIView):
     """Handle creating and listing student issues"""
     permission_classes = [IsAuthenticated, IsStudent]
@@ -134,10 +203,24 @@ class StudentIssueCreateView(APIView):
     def get(self, request):
         try:
             # Get student's issues
-            student = request.user.student_profile
-            issues = Issue.objects.filter(student=student).order_by('-created_at')
+            issues = get_issue_queryset().filter(student_id=get_request_profile_id(request)).order_by('-created_at')
+            
+            # Skip serializing if the client already has the current list
+            etag = make_etag(request, request.user.pk, issue_validator(issues))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            
+            # Return a single page if the client asked for one
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(issues, request, view=self)
+            if page is not None:
+                serializer = IssueSerializer(page, many=True)
+                return with_etag(paginator.get_paginated_response(serializer.data), etag)
+            
             serializer = IssueSerializer(issues, many=True)
-            return Response({'issues': serializer.data})
+            return with_etag(Response({'issues': serializer.data}), etag)
+        except APIException:
+            raise
         except Exception as e:
             return Response({
                 'error': str(e)
@@ -145,21 +228,16 @@ class StudentIssueCreateView(APIView):
     
     def post(self, request):
         try:
-            print("\n=== Creating New Issue ===")
-            print(f"Request data: {request.data}")
-            
             # Get student info
             student = request.user.student_profile
-            print(f"Student: {student}")
             
             # Check if issue should be assigned to a lecturer
             assigned_to = None
             if 'assigned_to' in request.data:
                 try:
                     assigned_to = Lecturer.objects.get(id=request.data['assigned_to'])
-                    print(f"Assigning to lecturer: {assigned_to}")
                 except Lecturer.DoesNotExist:
-                    print(f"Lecturer with ID {request.data['assigned_to']} not found")
+                    logger.info('Issue rejected: unknown lecturer', extra={'lecturer_id': request.data['assigned_to']})
                     return Response({
                         'error': 'Selected lecturer does not exist'
                     }, status=status.HTTP_400_BAD_REQUEST)
@@ -167,8 +245,6 @@ class StudentIssueCreateView(APIView):
             # Create new issue
             serializer = IssueSerializer(data=request.data, context={'request': request})
             if serializer.is_valid():
-                print(f"Serializer is valid. Data: {serializer.validated_data}")
-                
                 # Add student and lecturer info
                 serializer.validated_data['student'] = student
                 if assigned_to:
@@ -178,52 +254,57 @@ class StudentIssueCreateView(APIView):
                 if 'attachment' in request.FILES:
                     serializer.validated_data['attachment'] = request.FILES['attachment']
                 
-                # Save issue
-                issue = serializer.save()
-                print(f"Issue created successfully: {issue}")
-                
-                # Send notification to student
-                create_notification(
-                    recipient=request.user,
-                    notification_type='issue_created',
-                    issue=issue,
-                    message=f'Your issue "{issue.title}" has been submitted successfully.'
-                )
-                
-                # Send notification to lecturer if assigned
-                if assigned_to:
+                # Save issue and queue its notifications in one batch
+                with notification_batch():
+                    issue = serializer.save()
+                    
+                    # Send notification to student
                     create_notification(
-                        recipient=assigned_to.user,
-                        notification_type='issue_assigned',
+                        recipient=request.user,
+                        notification_type='issue_created',
                         issue=issue,
-                        message=f'You have been assigned a new issue: {issue.title}'
+                        message=f'Your issue "{issue.title}" has been submitted successfully.'
                     )
-                    print(f"Notification sent to lecturer: {assigned_to}")
+                    
+                    # Send notification to lecturer if assigned
+                    if assigned_to:
+                        create_notification(
+                            recipient=assigned_to.user,
+                            notification_type='issue_assigned',
+                            issue=issue,
+                            message=f'You have been assigned a new issue: {issue.title}'
+                        )
                 
+                logger.info('Issue created', extra={
+                    'issue_id': issue.pk,
+                    'student_id': student.pk,
+                    'lecturer_id': assigned_to.pk if assigned_to else None,
+                    'category': issue.category,
+                })
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
         except Exception as e:
-            print(f"Error creating issue: {str(e)}")
-            print("Traceback:", traceback.format_exc())
+            logger.exception('Issue creation failed', extra={'user_id': request.user.pk})
             return Response({
                 'error': 'Failed to create issue. Please try again.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class LecturerIssueListView(generics.ListAPIView):
+class LecturerIssueListView(ConditionalListMixin, generics.ListAPIView):
     """Get list of issues assigned to a lecturer"""
     serializer_class = IssueSerializer
     permission_classes = [IsLecturer]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        return Issue.objects.filter(assigned_to=self.request.user.lecturer_profile)
+        return get_issue_queryset().filter(assigned_to_id=get_request_profile_id(self.request))
 
 
 class IssueUpdateView(generics.UpdateAPIView):
     """Update an existing issue"""
-    queryset = Issue.objects.all()
+    queryset = get_issue_queryset()
     serializer_class = IssueSerializer
     permission_classes = [IsAuthenticated]
     
@@ -236,16 +317,18 @@ class IssueUpdateView(generics.UpdateAPIView):
         return [IsAuthenticated()]
     
     def perform_update(self, serializer):
-        issue = serializer.save()
-        
-        # Send notification about update
-        if issue.status == 'resolved':
-            create_notification(
-                recipient=issue.student.user,
-                notification_type='issue_resolved',
-                issue=issue,
-                message=f'Your issue "{issue.title}" has been resolved.'
-            )
+        # Write notifications in one batch, and only if the update commits
+        with notification_batch():
+            issue = serializer.save()
+            
+            # Send notification about update
+            if issue.status == 'resolved':
+                create_notification(
+                    recipient=issue.student.user,
+                    notification_type='issue_resolved',
+                    issue=issue,
+                    message=f'Your issue "{issue.title}" has been resolved.'
+                )
 
 
 class StudentIssueDetailView(generics.RetrieveUpdateAPIView):
@@ -255,27 +338,29 @@ class StudentIssueDetailView(generics.RetrieveUpdateAPIView):
     parser_classes = (MultiPartParser, FormParser, JSONParser)
     
     def get_queryset(self):
-        return Issue.objects.filter(student=self.request.user.student_profile)
+        return get_issue_queryset().filter(student_id=get_request_profile_id(self.request))
     
     def perform_update(self, serializer):
-        issue = serializer.save()
-        
-        # Send notification if issue is updated
-        create_notification(
-            recipient=self.request.user,
-            notification_type='issue_updated',
-            issue=issue,
-            message=f'Your issue "{issue.title}" has been updated.'
-        )
-        
-        # Notify lecturer if assigned
-        if issue.assigned_to:
+        # Write notifications in one batch, and only if the update commits
+        with notification_batch():
+            issue = serializer.save()
+            
+            # Send notification if issue is updated
             create_notification(
-                recipient=issue.assigned_to.user,
+                recipient=self.request.user,
                 notification_type='issue_updated',
                 issue=issue,
-                message=f'Issue "{issue.title}" has been updated by the student.'
+                message=f'Your issue "{issue.title}" has been updated.'
             )
+            
+            # Notify lecturer if assigned
+            if issue.assigned_to:
+                create_notification(
+                    recipient=issue.assigned_to.user,
+                    notification_type='issue_updated',
+                    issue=issue,
+                    message=f'Issue "{issue.title}" has been updated by the student.'
+                )
 
 
 class LecturerIssueDetailView(generics.RetrieveUpdateAPIView):
@@ -284,86 +369,274 @@ class LecturerIssueDetailView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsLecturer]
     
     def get_queryset(self):
-        return Issue.objects.filter(assigned_to=self.request.user.lecturer_profile)
+        return get_issue_queryset().filter(assigned_to_id=get_request_profile_id(self.request))
     
     def perform_update(self, serializer):
-        issue = serializer.save()
-        
-        # Send notification about status change
-        if issue.status == 'resolved':
-            create_notification(
-                recipient=issue.student.user,
-                notification_type='issue_resolved',
-                issue=issue,
-                message=f'Your issue "{issue.title}" has been resolved by {self.request.user.get_full_name()}.'
-            )
-        else:
-            create_notification(
-                recipient=issue.student.user,
-                notification_type='issue_updated',
-                issue=issue,
-                message=f'Your issue "{issue.title}" has been updated by {self.request.user.get_full_name()}.'
-            )
+        # Write notifications in one batch, and only if the update commits
+        with notification_batch():
+            issue = serializer.save()
+            
+            # Send notification about status change
+            if issue.status == 'resolved':
+                create_notification(
+                    recipient=issue.student.user,
+                    notification_type='issue_resolved',
+                    issue=issue,
+                    message=f'Your issue "{issue.title}" has been resolved by {self.request.user.get_full_name()}.'
+                )
+            else:
+                create_notification(
+                    recipient=issue.student.user,
+                    notification_type='issue_updated',
+                    issue=issue,
+                    message=f'Your issue "{issue.title}" has been updated by {self.request.user.get_full_name()}.'
+                )
 
 
-class AcademicRegistrarIssueListView(generics.ListAPIView):
+class AcademicRegistrarIssueListView(ConditionalListMixin, generics.ListAPIView):
     """Get list of all issues for registrar"""
-    queryset = Issue.objects.all()
+    queryset = get_issue_queryset()
     serializer_class = IssueSerializer
     permission_classes = [IsAcademicRegistrar]
+    pagination_class = KeysetPagination
+    
+    def get_validator(self):
+        return all_issues_validator()
+
+
+class AcademicRegistrarIssueSearchView(generics.ListAPIView):
+    """Full-text search over all issues for registrar, best matches first"""
+    serializer_class = IssueSerializer
+    permission_classes = [IsAcademicRegistrar]
+    pagination_class = RankedPagination
+    
+    def get_queryset(self):
+        params = self.request.query_params
+        issues = get_issue_queryset()
+        
+        # Apply the filters in the database before ranking
+        if params.get('category'):
+            issues = issues.filter(category=params['category'])
+        if params.get('status'):
+            issues = issues.filter(status=params['status'])
+        if params.get('department'):
+            issues = issues.filter(student__department__name=params['department'])
+        
+        query = params.get('q', '').strip()
+        if not query:
+            return issues.order_by('-created_at', '-pk')
+        return search_issues(issues, query).order_by('-rank', '-created_at', '-pk')
+
+
+@api_view(['GET'])
+@permission_classes([IsAcademicRegistrar])
+def get_issue_analytics(request):
+    """Get issue counts by status, category, priority, department and course unit"""
+    return Response(analytics.get_summary())
 
 
 class AcademicRegistrarIssueDetailView(generics.RetrieveUpdateAPIView):
     """View and update any issue as registrar"""
     serializer_class = IssueSerializer
     permission_classes = [IsAcademicRegistrar]
-    queryset = Issue.objects.all()
+    queryset = get_issue_queryset()
     
     def perform_update(self, serializer):
-        issue = serializer.save()
-        
-        # Send notifications about changes
-        if issue.status == 'resolved':
-            # Notify student
-            create_notification(
-                recipient=issue.student.user,
-                notification_type='issue_resolved',
-                issue=issue,
-                message=f'Your issue "{issue.title}" has been resolved by the registrar.'
-            )
+        # Write notifications in one batch, and only if the update commits
+        with notification_batch():
+            issue = serializer.save()
             
-            # Notify lecturer if assigned
-            if issue.assigned_to:
+            # Send notifications about changes
+            if issue.status == 'resolved':
+                # Notify student
                 create_notification(
-                    recipient=issue.assigned_to.user,
+                    recipient=issue.student.user,
                     notification_type='issue_resolved',
                     issue=issue,
-                    message=f'Issue "{issue.title}" has been resolved by the registrar.'
+                    message=f'Your issue "{issue.title}" has been resolved by the registrar.'
                 )
-        else:
-            # Notify about other updates
-            create_notification(
+            
+                # Notify lecturer if assigned
+                if issue.assigned_to:
+                    create_notification(
+                        recipient=issue.assigned_to.user,
+                        notification_type='issue_resolved',
+                        issue=issue,
+                        message=f'Issue "{issue.title}" has been resolved by the registrar.'
+                    )
+            else:
+                # Notify about other updates
+                create_notification(
+                    recipient=issue.student.user,
+                    notification_type='issue_updated',
+                    issue=issue,
+                    message=f'Your issue "{issue.title}" has been updated by the registrar.'
+                )
+
+
+# Issue column written by each bulk operation
+BULK_OPERATION_FIELDS = {
+    'assign': 'assigned_to',
+    'set_status': 'status',
+    'set_priority': 'priority',
+}
+
+
+def bulk_change_notifications(issue, operation, value):
+    """Build the notifications the registrar's single-issue update sends, plus the new lecturer's on assignment"""
+    if operation == 'assign':
+        return [
+            Notification(
+                recipient=value.user,
+                notification_type='issue_assigned',
+                issue=issue,
+                message=f'You have been assigned a new issue: {issue.title}'
+            ),
+            Notification(
                 recipient=issue.student.user,
                 notification_type='issue_updated',
                 issue=issue,
                 message=f'Your issue "{issue.title}" has been updated by the registrar.'
+            ),
+        ]
+    
+    if operation == 'set_status' and value == 'resolved':
+        notifications = [Notification(
+            recipient=issue.student.user,
+            notification_type='issue_resolved',
+            issue=issue,
+            message=f'Your issue "{issue.title}" has been resolved by the registrar.'
+        )]
+        if issue.assigned_to:
+            notifications.append(Notification(
+                recipient=issue.assigned_to.user,
+                notification_type='issue_resolved',
+                issue=issue,
+                message=f'Issue "{issue.title}" has been resolved by the registrar.'
+            ))
+        return notifications
+    
+    return [Notification(
+        recipient=issue.student.user,
+        notification_type='issue_updated',
+        issue=issue,
+        message=f'Your issue "{issue.title}" has been updated by the registrar.'
+    )]
+
+
+@api_view(['POST'])
+@permission_classes([IsAcademicRegistrar])
+def bulk_update_issues(request):
+    """Assign, set the status of, or set the priority of many issues at once"""
+    serializer = BulkIssueOperationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    
+    operation = serializer.validated_data['operation']
+    value = serializer.validated_data['value']
+    issue_ids = serializer.validated_data['issue_ids']
+    field = BULK_OPERATION_FIELDS[operation]
+    
+    try:
+        with notification_batch() as batch:
+            issues = list(
+                Issue.objects.filter(pk__in=issue_ids)
+                .select_related('student__user', 'assigned_to__user')
+                .select_for_update(of=('self',))
+                .order_by('pk')
             )
+            
+            # Leave issues that already have the value untouched
+            column = 'assigned_to_id' if operation == 'assign' else field
+            new_value = value.pk if operation == 'assign' else value
+            changed = [issue for issue in issues if getattr(issue, column) != new_value]
+            
+            if changed:
+                # One UPDATE skips save() and its signals, so record the statistics here
+                analytics.issues_updated(changed, field, value)
+                Issue.objects.filter(pk__in=[issue.pk for issue in changed]).update(
+                    **{field: value, 'updated_at': timezone.now()}
+                )
+                for issue in changed:
+                    setattr(issue, field, value)
+                    for notification in bulk_change_notifications(issue, operation, value):
+                        batch.add(notification)
+        
+        found = {issue.pk for issue in issues}
+        updated = [issue.pk for issue in changed]
+        return Response({
+            'updated': updated,
+            'unchanged': sorted(found.difference(updated)),
+            'missing': [pk for pk in issue_ids if pk not in found]
+        })
+    
+    except Exception as e:
+        return Response({
+            'error': 'Failed to update issues'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAcademicRegistrar])
+@parser_classes([MultiPartParser])
+def import_roster(request):
+    """Create student and lecturer accounts from an uploaded CSV or NDJSON roster"""
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'Upload the roster in the file field'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    role = request.data.get('role') or None
+    if role is not None and role not in roster.ROLE_FIELDS:
+        return Response({'error': 'Role must be student or lecturer'}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = request.data.get('format') or roster.detect_format(upload.name, upload.content_type)
+    if file_format not in roster.FORMATS:
+        return Response({'error': 'Format must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        summary = roster.import_roster(
+            upload.file,
+            file_format,
+            role=role,
+            dry_run=request.data.get('dry_run') in ('true', '1')
+        )
+    except UnicodeDecodeError:
+        return Response({'error': 'The roster must be UTF-8 text'}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.exception('Roster import failed', extra={'user_id': request.user.pk})
+        return Response({
+            'error': 'Failed to import roster'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    logger.info('Roster imported', extra={
+        'user_id': request.user.pk,
+        'accounts_created': summary['created'],
+        'rows_rejected': summary['error_count'],
+    })
+    return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK)
 
 
 class IssueDeleteView(generics.DestroyAPIView):
     """Delete an issue"""
-    queryset = Issue.objects.all()
+    queryset = get_issue_queryset()
     serializer_class = IssueSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         # Only allow users to delete their own issues
         if self.request.user.role == 'student':
-            return Issue.objects.filter(student=self.request.user.student_profile)
+            return get_issue_queryset().filter(student_id=get_request_profile_id(self.request))
         elif self.request.user.role == 'registrar':
-            return Issue.objects.all()
+            return get_issue_queryset()
         return Issue.objects.none()
     
+    def perform_destroy(self, instance):
+        # Deleting the issue cascades to its notifications, so recount their recipients
+        recipient_ids = set(
+            instance.notifications.filter(is_read=False).values_list('recipient_id', flat=True)
+        )
+        instance.delete()
+        notification_counts.reset_unread_counts(recipient_ids)
+    
     def destroy(self, request, *args, **kwargs):
         try:
             return super().destroy(request, *args, **kwargs)
@@ -373,15 +646,51 @@ class IssueDeleteView(generics.DestroyAPIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def get_notification_queryset(user, expand=False):
+    """A user's notifications, newest first, loading only what the serializer needs"""
+    notifications = Notification.objects.filter(recipient=user).order_by('-created_at')
+    
+    # Compact rows only need the issue summary unless the client asks for more
+    if expand:
+        return notifications.select_related(
+            'recipient',
+            'issue__student__user',
+            'issue__student__department',
+            'issue__assigned_to__user',
+            'issue__assigned_to__department',
+        )
+    return notifications.select_related('issue').only(
+        'id', 'notification_type', 'message', 'is_read', 'created_at',
+        'issue__issue_id', 'issue__title', 'issue__status',
+    )
+
+
 # Notification related views
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_notifications(request):
-    """Get user's notifications"""
+    """Get user's notifications, with full issue details if ?expand=true"""
     try:
-        notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        # Skip serializing if the client already has the current list
+        etag = make_etag(request, request.user.pk, notification_validator(request.user))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        expand = request.query_params.get('expand') == 'true'
+        notifications = get_notification_queryset(request.user, expand)
+        serializer_class = NotificationSerializer if expand else CompactNotificationSerializer
+        
+        # Return a single page if the client asked for one
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(notifications, request)
+        if page is not None:
+            serializer = serializer_class(page, many=True)
+            return with_etag(paginator.get_paginated_response(serializer.data), etag)
+        
+        serializer = serializer_class(notifications, many=True)
+        return with_etag(Response(serializer.data), etag)
+    except APIException:
+        raise
     except Exception as e:
         return Response({
             'error': 'Failed to fetch notifications'
@@ -394,8 +703,10 @@ def mark_notification_read(request, notification_id):
     """Mark a notification as read"""
     try:
         notification = Notification.objects.get(id=notification_id, recipient=request.user)
-        notification.is_read = True
-        notification.save()
+        if not notification.is_read:
+            notification.is_read = True
+            notification.save(update_fields=['is_read'])
+            notification_counts.adjust_unread_count(request.user.pk, -1)
         return Response({'status': 'success'})
     except Notification.DoesNotExist:
         return Response({
@@ -412,7 +723,7 @@ def mark_notification_read(request, notification_id):
 def get_unread_count(request):
     """Get count of unread notifications"""
     try:
-        count = Notification.objects.filter(recipient=request.user, is_read=False).count()
+        count = notification_counts.get_unread_count(request.user.pk)
         return Response({'count': count})
     except Exception as e:
         return Response({
@@ -427,6 +738,8 @@ def delete_notification(request, notification_id):
     try:
         notification = Notification.objects.get(id=notification_id, recipient=request.user)
         notification.delete()
+        if not notification.is_read:
+            notification_counts.adjust_unread_count(request.user.pk, -1)
         return Response({'status': 'success'})
     except Notification.DoesNotExist:
         return Response({
@@ -444,6 +757,7 @@ def clear_all_notifications(request):
     """Delete all notifications for a user"""
     try:
         Notification.objects.filter(recipient=request.user).delete()
+        notification_counts.set_unread_count(request.user.pk, 0)
         return Response({'status': 'success'})
     except Exception as e:
         return Response({
@@ -452,20 +766,94 @@ def clear_all_notifications(request):
 
 
 def create_notification(recipient, notification_type, issue, message):
-    """Helper function to create a new notification"""
+    """Helper function to create a new notification
+    
+    Inside a notification_batch() block the notification is only queued and is
+    inserted with the rest of the batch once the block commits.
+    """
     try:
-        notification = Notification.objects.create(
+        notification = Notification(
             recipient=recipient,
             notification_type=notification_type,
             issue=issue,
             message=message
         )
+        with notification_batch() as batch:
+            batch.add(notification)
+        notification_logger.info('Notification queued', extra={
+            'recipient_id': recipient.pk,
+            'notification_type': notification_type,
+            'issue_id': issue.pk,
+        })
         return notification
     except Exception as e:
-        print(f"Error creating notification: {str(e)}")
+        notification_logger.exception('Notification failed', extra={
+            'recipient_id': recipient.pk,
+            'notification_type': notification_type,
+        })
         return None
 
 
+async def notification_stream(request):
+    """Stream new notifications and unread counts as Server-Sent Events"""
+    # EventSource cannot set headers, so the token may also come as ?token=
+    token = request.GET.get('token')
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(auth_header) == 2 and auth_header[0].lower() == 'bearer':
+        token = auth_header[1]
+    if not token:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    
+    try:
+        user, _ = await JWTAuthentication().aauthenticate_token(token)
+    except AuthenticationFailed as e:
+        return JsonResponse({'error': str(e.detail)}, status=401)
+    
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(
+            notification_events(user.pk),
+            content_type='text/event-stream'
+        )
+    else:
+        # WSGI servers buffer an async stream until it ends, which this one never
+        # does, so send the current count and have EventSource reconnect later
+        count = await notification_counts.aget_unread_count(user.pk)
+        response = HttpResponse(
+            f'retry: {settings.NOTIFICATION_STREAM_WSGI_RETRY * 1000}\n\n'
+            + format_event('unread_count', {'count': count}),
+            content_type='text/event-stream'
+        )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def notification_events(user_id):
+    """Yield SSE frames for a user until the client disconnects"""
+    subscription = events.subscribe(user_id)
+    try:
+        count = await notification_counts.aget_unread_count(user_id)
+        yield format_event('unread_count', {'count': count})
+        
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(),
+                    timeout=settings.NOTIFICATION_STREAM_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                # Comment frames keep idle connections open through proxies
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event['event'], event['data'])
+    finally:
+        subscription.close()
+
+
+def format_event(event_type, data):
+    return f'event: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+
 # Issue management views
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -488,7 +876,7 @@ def create_issue(request):
 def update_issue(request, issue_id):
     """Update an existing issue"""
     try:
-        issue = Issue.objects.get(pk=issue_id)
+        issue = get_issue_queryset().get(pk=issue_id)
         serializer = IssueSerializer(issue, data=request.data, partial=True)
         
         if serializer.is_valid():
@@ -525,29 +913,48 @@ def update_issue(request, issue_id):
 
 
 # Student and Lecturer management views
-class StudentListView(generics.ListAPIView):
-    """Get list of all students"""
+def filter_by_department(queryset, department):
+    """Filter profiles by department id or name"""
+    if not department:
+        return queryset
+    if department.isdigit():
+        return queryset.filter(department_id=int(department))
+    return queryset.filter(department__name__iexact=department)
+
+
+class StudentListView(directory.CachedDirectoryMixin, generics.ListAPIView):
+    """Get list of all students, optionally filtered by ?department= and ?year="""
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated, IsAcademicRegistrar | IsLecturer]
+    pagination_class = DirectoryPagination
+    directory_name = 'students'
     
     def get_queryset(self):
-        return Student.objects.all()
+        students = Student.objects.select_related('user', 'department').order_by('pk')
+        students = filter_by_department(students, self.request.query_params.get('department'))
+        year = self.request.query_params.get('year')
+        if year:
+            students = students.filter(year_of_study=year)
+        return students
 
 
-class LecturerListView(generics.ListAPIView):
-    """Get list of all lecturers"""
+class LecturerListView(directory.CachedDirectoryMixin, generics.ListAPIView):
+    """Get list of all lecturers, optionally filtered by ?department="""
     serializer_class = LecturerSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = DirectoryPagination
+    directory_name = 'lecturers'
     
     def get_queryset(self):
-        return Lecturer.objects.all()
+        lecturers = Lecturer.objects.select_related('user', 'department').order_by('pk')
+        return filter_by_department(lecturers, self.request.query_params.get('department'))
 
 
 class LecturerUpdateView(generics.UpdateAPIView):
     """Update lecturer details"""
     serializer_class = LecturerSerializer
     permission_classes = [IsAuthenticated, IsAcademicRegistrar]
-    queryset = Lecturer.objects.all()
+    queryset = Lecturer.objects.select_related('user', 'department')
     
     def perform_update(self, serializer):
         serializer.save()
@@ -568,12 +975,52 @@ def home(request):
     return render(request, 'home.html')
 
 
+def can_view_issue(user, issue):
+    """Check whether a user may see an issue and its attachment"""
+    if user.role == 'registrar':
+        return True
+    if user.role == 'student':
+        return issue.student.user_id == user.pk
+    if user.role == 'lecturer':
+        return issue.assigned_to is not None and issue.assigned_to.user_id == user.pk
+    return False
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_attachment(request, pk):
+    """Serve an issue's attachment to the users allowed to see the issue"""
+    try:
+        issue = Issue.objects.select_related('student', 'assigned_to').get(pk=pk)
+    except Issue.DoesNotExist:
+        return Response({
+            'error': 'Issue not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if not can_view_issue(request.user, issue):
+        return Response({
+            'error': 'You do not have permission to view this attachment'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if not issue.attachment:
+        return Response({
+            'error': 'Issue has no attachment'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        return attachment_response(request._request, issue.attachment, issue.get_attachment_name())
+    except FileNotFoundError:
+        return Response({
+            'error': 'Attachment file is missing'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
 def update_issue_status(request, pk):
     """Update the status of an issue"""
     try:
-        issue = Issue.objects.get(pk=pk)
+        issue = get_issue_queryset().get(pk=pk)
         new_status = request.data.get('status')
         
         if not new_status:
@@ -2,6 +2,10 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+runner.py serves the API through it by default, as does
+``uvicorn core.asgi:application``. That enables the notifications/stream
+endpoint, which holds connections open without a thread each, and the async
+implementations of the notification and issue list reads.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -12,5 +16,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
+# Each ASGI request runs in a fresh thread, so persistent connections would only pile up
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
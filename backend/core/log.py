@@ -0,0 +1,165 @@
+"""
+Structured logging that keeps log I/O off the request path.
+
+Records are queued by BackgroundHandler and written as JSON lines by a
+listener thread, so a slow or contended stdout never holds up a request.
+When the queue is full, records are dropped instead of blocking; the count
+is logged once the queue has room again and exported at /metrics.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import weakref
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed through extra=
+RESERVED_ATTRS = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+_background_handlers = weakref.WeakSet()
+
+
+def parse_mapping(value, convert=str):
+    """Parse "name=value,other=value" as used by LOG_LEVELS and LOG_SAMPLE_RATES"""
+    mapping = {}
+    for item in value.split(','):
+        if '=' in item:
+            name, _, setting = item.partition('=')
+            mapping[name.strip()] = convert(setting.strip())
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the message, its context and any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of the INFO and DEBUG records of noisy loggers
+
+    rates maps a logger name to the share of its records to keep, and applies
+    to its child loggers too. Warnings and errors always pass.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+def dropped_records():
+    """Records this process's BackgroundHandlers have dropped since it started"""
+    return sum(handler.dropped for handler in list(_background_handlers))
+
+
+class BackgroundHandler(logging.handlers.QueueHandler):
+    """Queue records for a listener thread that writes them to a stream"""
+
+    def __init__(self, stream=None, maxsize=10000, report_interval=60):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self.listener = None
+        self.pid = None
+        self.dropped = 0
+        self.reported = 0
+        self.reported_at = 0
+        self.report_interval = report_interval  # Least seconds between reports of dropped records
+        _background_handlers.add(self)
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread
+        self.target.setFormatter(fmt)
+
+    def start(self):
+        # Threads do not survive fork(), so each worker process starts its own
+        # and counts only its own drops
+        self.pid = os.getpid()
+        self.dropped = self.reported = 0
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self.listener and self.pid == os.getpid():
+            self.report_dropped()
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        # Merge the arguments now, as they may change once the caller moves on,
+        # but leave the JSON formatting to the listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def report_dropped(self):
+        """Queue a warning with the records dropped since the last one"""
+        dropped = self.dropped - self.reported
+        if not dropped:
+            return
+        record = logging.makeLogRecord({
+            'name': __name__,
+            'levelno': logging.WARNING,
+            'levelname': logging.getLevelName(logging.WARNING),
+            'msg': f'Dropped {dropped} log records while the queue was full',
+            'dropped': dropped,
+            'dropped_total': self.dropped,
+        })
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            return
+        self.reported += dropped
+        self.reported_at = time.monotonic()
+
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            # handle() already holds this lock, which logging also resets after
+            # fork, but emit() may be called without it
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped > self.reported and time.monotonic() - self.reported_at >= self.report_interval:
+            self.report_dropped()
@@ -4,6 +4,8 @@ import dj_database_url
 
 from dotenv import load_dotenv
 
+from core.log import parse_mapping
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,7 +49,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.WhiteNoiseMiddleware',
+    'aits.metrics.metrics_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -97,7 +100,8 @@ DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
     DATABASES['default'] = dj_database_url.config(
         default=DATABASE_URL,
-        conn_max_age=600,
+        # Seconds to keep connections open; asgi.py sets 0, as ASGI requests cannot reuse them
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 600)),
         conn_health_checks=True,
     )
 
@@ -144,6 +148,10 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Set to an internal nginx location (e.g. '/protected-media/') that aliases MEDIA_ROOT
+# to have the proxy send attachment bytes after the API has checked permissions
+ATTACHMENT_ACCEL_REDIRECT_PREFIX = os.environ.get('ATTACHMENT_ACCEL_REDIRECT_PREFIX', '')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -186,6 +194,7 @@ CORS_ALLOW_HEADERS = [
 CORS_EXPOSE_HEADERS = [
     'content-type',
     'authorization',
+    'server-timing',
 ]
 
 CSRF_TRUSTED_ORIGINS = [
@@ -210,7 +219,99 @@ REST_FRAMEWORK = {
 # JWT settings
 JWT_SECRET_KEY = SECRET_KEY  # Using Django's secret key for JWT
 JWT_ALGORITHM = 'HS256'
-JWT_ACCESS_TOKEN_LIFETIME = 24 * 60 * 60  # 24 hours in seconds
+# Access tokens are short-lived; clients renew them at /token/refresh without the password
+JWT_ACCESS_TOKEN_LIFETIME = int(os.environ.get('JWT_ACCESS_TOKEN_LIFETIME', 15 * 60))  # 15 minutes in seconds
+JWT_REFRESH_TOKEN_LIFETIME = int(os.environ.get('JWT_REFRESH_TOKEN_LIFETIME', 30 * 24 * 60 * 60))  # 30 days
+JWT_USER_CACHE_SIZE = int(os.environ.get('JWT_USER_CACHE_SIZE', 10000))  # Users kept per process
+JWT_USER_CACHE_TTL = int(os.environ.get('JWT_USER_CACHE_TTL', 60))  # Seconds before a user is reloaded
+
+# Cache used for unread notification counts and the directory and reference data
+# versions. locmem is per process, so several workers or runworker need a shared
+# cache, e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'aits'),
+    }
+}
+UNREAD_COUNT_CACHE_TIMEOUT = int(os.environ.get('UNREAD_COUNT_CACHE_TIMEOUT', 60 * 60))
+DIRECTORY_CACHE_TIMEOUT = int(os.environ.get('DIRECTORY_CACHE_TIMEOUT', 5 * 60))
+REFERENCE_MAX_AGE = 5 * 60  # Seconds a process keeps its departments without a version change
+
+# Pub/sub used to push notifications to open streams. The in-process broker only
+# reaches streams served by the same process; aits.events.PostgresBroker reaches
+# every process through LISTEN/NOTIFY, at one extra connection per process
+NOTIFICATION_BROKER = os.environ.get('NOTIFICATION_BROKER', 'aits.events.InProcessBroker')
+NOTIFICATION_STREAM_KEEPALIVE = 15  # Seconds between keep-alive comments
+NOTIFICATION_STREAM_WSGI_RETRY = 30  # Seconds between stream reconnects when served under WSGI
+
+# Serve the notification and issue list reads from async views. core/asgi.py turns
+# this on; under WSGI every async view would need its own event loop per request
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Background jobs. When off, jobs run in-process right after commit. When on, they
+# are queued for manage.py runworker, which refuses to start unless the cache and
+# NOTIFICATION_BROKER are shared with the web processes
+BACKGROUND_JOBS = os.environ.get('BACKGROUND_JOBS', 'False') == 'True'
+JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 4))
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 5  # Seconds before the first retry, doubled on each attempt
+JOB_TIMEOUT = 10 * 60  # Seconds before a running job no worker holds any more is requeued
+
+# Keyset pagination for issue and notification lists
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 200))
+API_MAX_SEARCH_RESULTS = 1000  # Deepest result reachable by paging through a search
+API_MAX_BULK_ISSUES = 500  # Most issues a registrar can change in one bulk request
+
+# Bulk roster imports (manage.py import_roster and registrar/roster/import)
+ROSTER_IMPORT_BATCH_SIZE = 1000  # Accounts validated, hashed and inserted together
+ROSTER_IMPORT_WORKERS = int(os.environ.get('ROSTER_IMPORT_WORKERS', os.cpu_count() or 1))  # Password hashing processes
+ROSTER_MAX_ERRORS = 1000  # Row errors reported back; the rest are only counted
+
+# Per-route latency, SQL and serializer timings, served at /metrics for Prometheus.
+# Scrapes must send METRICS_TOKEN as a bearer token; without one /metrics only
+# answers under DEBUG. Each process counts its own requests unless METRICS_DIR
+# is set, which runner.py does, so that a scrape of any worker covers them all
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_DIR = os.environ.get('METRICS_DIR', '')  # Where processes publish their metrics for each other
+METRICS_PUBLISH_INTERVAL = 5  # Seconds between a process's publishes to METRICS_DIR
+
+# JSON logs written to stdout by a background thread. LOG_LEVELS sets per-logger
+# levels and LOG_SAMPLE_RATES keeps a share of a noisy logger's INFO and DEBUG
+# records, e.g. LOG_LEVELS="aits.views=DEBUG" LOG_SAMPLE_RATES="aits.notifications=0.1"
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_LEVELS = parse_mapping(os.environ.get('LOG_LEVELS', ''))
+LOG_SAMPLE_RATES = {
+    'aits.notifications': 0.1,
+    **parse_mapping(os.environ.get('LOG_SAMPLE_RATES', ''), float),
+}
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.log.JsonFormatter'},
+    },
+    'filters': {
+        'sample': {'()': 'core.log.SamplingFilter', 'rates': LOG_SAMPLE_RATES},
+    },
+    'handlers': {
+        'background': {
+            'class': 'core.log.BackgroundHandler',
+            'formatter': 'json',
+            'filters': ['sample'],
+        },
+    },
+    'root': {'handlers': ['background'], 'level': 'WARNING'},
+    'loggers': {
+        # No handlers of its own, so Django's records are not also written to the console
+        'django': {'handlers': [], 'level': 'INFO'},
+        'aits': {'level': LOG_LEVEL},
+        'users': {'level': LOG_LEVEL},
+        **{name: {'level': level} for name, level in LOG_LEVELS.items()},
+    },
+}
 
 # Ensure APPEND_SLASH is False to prevent Django from redirecting URLs
 APPEND_SLASH = False
\ No newline at end of file
@@ -1,10 +1,9 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 
+# Attachments are served by aits' issues/<pk>/attachment endpoint, not from MEDIA_URL
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('aits.urls')),
     path('notifications/', include('notifications.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+]
\ No newline at end of file
@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+unread_count_view = views.get_unread_count
+if settings.ASYNC_READ_VIEWS:
+    from aits.async_views import read_async, unread_count
+    unread_count_view = read_async(unread_count, views.get_unread_count)
+
 urlpatterns = [
     # ... existing urls ...
-    path('unread-count/', views.get_unread_count, name='notification-unread-count'),
+    path('unread-count/', unread_count_view, name='notification-unread-count'),
 ] 
\ No newline at end of file
@@ -0,0 +1,556 @@
+"""
+Pre-forking production server.
+
+The master process binds the listening socket and forks WEB_CONCURRENCY
+workers, which import the application themselves, so a reload picks up new
+code. Workers serve the ASGI application under uvicorn, which holds the
+notification stream open without a thread and runs the async list views.
+WEB_SERVER=wsgi serves the WSGI application under waitress instead.
+
+    python runner.py            start the master
+    python runner.py reload     start fresh workers, then drain the old ones (SIGHUP)
+    python runner.py status     print the per-worker health report (also SIGUSR1)
+
+Each worker works on at most WEB_THREADS requests at a time, and each of those
+can hold a database connection. By default the master starts no more workers
+than fit WEB_THREADS connections each into DB_MAX_CONNECTIONS, the connections
+the web service may hold in total.
+
+Several workers need the cache and NOTIFICATION_BROKER shared between processes
+(see aits/processes.py). Until both are, the master starts one worker and
+refuses a larger WEB_CONCURRENCY.
+
+Workers exit after serving WEB_MAX_REQUESTS requests, plus a random jitter so
+they do not all restart together, and the master replaces them. Each worker
+writes a heartbeat file to WEB_HEALTH_DIR recording when one of its requests
+last started a response. The master kills any worker whose heartbeat is older
+than WEB_TIMEOUT, or whose requests have waited that long without any of them
+starting a response.
+
+The waitress worker drives waitress's event loop itself, so it relies on
+internals of the waitress version pinned in requirements.txt.
+
+serve.py remains the single-process entry point for platforms without fork().
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger('runner')
+
+HEARTBEAT_INTERVAL = 2  # Seconds between worker heartbeats
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def default_workers(db_connections, threads):
+    # One worker per CPU, but never more than the database connections allow
+    return max(1, min(os.cpu_count() or 1, db_connections // threads))
+
+
+def per_process_backends():
+    # Reads the settings only; Django is set up in each worker after fork
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    from aits.processes import per_process_backends
+
+    return per_process_backends()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', nargs='?', default='serve', choices=['serve', 'reload', 'status'])
+    parser.add_argument('--host', default=os.environ.get('WEB_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=env_int('WEB_PORT', 8000))
+    parser.add_argument('--server', default=os.environ.get('WEB_SERVER', 'asgi'), choices=['asgi', 'wsgi'])
+    parser.add_argument('--db-connections', type=int, default=env_int('DB_MAX_CONNECTIONS', 20),
+                        help='Database connections all workers together may hold')
+    parser.add_argument('--workers', type=int, default=os.environ.get('WEB_CONCURRENCY'),
+                        help='Defaults to one per CPU, within the database connection budget')
+    parser.add_argument('--threads', type=int, default=env_int('WEB_THREADS', 4),
+                        help='Requests each worker works on at once')
+    parser.add_argument('--max-requests', type=int, default=env_int('WEB_MAX_REQUESTS', 5000),
+                        help='Recycle a worker after this many requests, 0 to disable')
+    parser.add_argument('--max-requests-jitter', type=int, default=env_int('WEB_MAX_REQUESTS_JITTER', 500))
+    parser.add_argument('--graceful-timeout', type=int, default=env_int('WEB_GRACEFUL_TIMEOUT', 30),
+                        help='Seconds a stopping worker may spend finishing its requests')
+    parser.add_argument('--timeout', type=int, default=env_int('WEB_TIMEOUT', 60),
+                        help='Seconds without a heartbeat or a started response before a worker is killed')
+    parser.add_argument('--health-dir', default=os.environ.get(
+        'WEB_HEALTH_DIR', os.path.join(tempfile.gettempdir(), 'aits-runner')))
+    options = parser.parse_args(argv)
+    options.per_process = []
+    if options.command == 'serve':
+        # Workers publish their metrics here so any of them can answer /metrics for all;
+        # set before the settings are first read below, which the workers inherit
+        os.environ.setdefault('METRICS_DIR', os.path.join(options.health_dir, 'metrics'))
+        options.per_process = per_process_backends()
+    if options.workers is None:
+        options.workers = 1 if options.per_process else default_workers(options.db_connections, options.threads)
+    else:
+        options.workers = int(options.workers)
+        if options.workers > 1 and options.per_process:
+            parser.error(
+                f'{options.workers} workers need backends shared between processes: ' + '; '.join(options.per_process)
+            )
+    return options
+
+
+def memory_usage_kb():
+    """Resident memory of this process"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def write_json(path, data):
+    # Write then rename so readers never see a partial file
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def heartbeat_path(health_dir, pid):
+    return os.path.join(health_dir, f'worker-{pid}.json')
+
+
+class Progress:
+    """Requests a worker has taken on but not started a response to"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiting = {}  # token -> arrival time
+        self.responded_at = time.time()
+
+    def begin(self):
+        token = object()
+        with self.lock:
+            self.waiting[token] = time.time()
+        return token
+
+    def respond(self, token):
+        with self.lock:
+            if self.waiting.pop(token, None) is not None:
+                self.responded_at = time.time()
+
+    def stalled_for(self, now):
+        """Seconds requests have been waiting without any of them starting a response"""
+        with self.lock:
+            if not self.waiting:
+                return 0
+            return max(now - max(self.responded_at, min(self.waiting.values())), 0)
+
+
+class Worker:
+    """One forked process serving requests from the shared socket"""
+
+    def __init__(self, sock, options, generation):
+        self.sock = sock
+        self.options = options
+        self.generation = generation
+        self.started_at = time.time()
+        self.requests = 0
+        self.max_requests = 0
+        if options.max_requests:
+            self.max_requests = options.max_requests + random.randint(0, options.max_requests_jitter)
+        self.stopping = False
+        self.state = 'booting'
+        self.lock = threading.Lock()
+        self.progress = Progress()
+        self.server = None
+
+    def heartbeat(self):
+        now = time.time()
+        write_json(heartbeat_path(self.options.health_dir, os.getpid()), {
+            'pid': os.getpid(),
+            'generation': self.generation,
+            'server': self.options.server,
+            'state': self.state,
+            'started_at': self.started_at,
+            'updated_at': now,
+            'requests': self.requests,
+            'max_requests': self.max_requests,
+            'threads': self.options.threads,
+            'waiting': len(self.progress.waiting),
+            'responded_at': self.progress.responded_at,
+            'stalled_for': self.progress.stalled_for(now),
+            'memory_kb': memory_usage_kb(),
+        })
+
+    def stop(self, *args):
+        self.stopping = True
+        if self.options.server == 'asgi' and self.server is not None:
+            self.server.should_exit = True
+
+    def admit(self):
+        """Count a new request and start waiting for its response"""
+        with self.lock:
+            self.requests += 1
+            if self.max_requests and self.requests >= self.max_requests:
+                self.stop()
+        return self.progress.begin()
+
+    def wrap_wsgi(self, application):
+        def counted(environ, start_response):
+            token = self.admit()
+
+            def started(status, headers, exc_info=None):
+                self.progress.respond(token)
+                return start_response(status, headers, exc_info)
+
+            try:
+                return application(environ, started)
+            finally:
+                self.progress.respond(token)
+        return counted
+
+    def wrap_asgi(self, application):
+        import asyncio
+
+        # Bound the requests being worked on, and so the database connections
+        slots = asyncio.Semaphore(self.options.threads)
+
+        async def counted(scope, receive, send):
+            if scope['type'] != 'http':
+                return await application(scope, receive, send)
+            token = self.admit()
+            await slots.acquire()
+            holding = True
+
+            def release():
+                nonlocal holding
+                if holding:
+                    holding = False
+                    slots.release()
+                    self.progress.respond(token)
+
+            async def started(message):
+                # A streamed response gives up its slot once its headers are sent
+                if message['type'] == 'http.response.start':
+                    release()
+                await send(message)
+
+            try:
+                await application(scope, receive, started)
+            finally:
+                release()
+        return counted
+
+    def is_drained(self):
+        dispatcher = self.server.task_dispatcher
+        if dispatcher.queue or dispatcher.active_count:
+            return False
+        return not any(
+            channel.requests or channel.total_outbufs_len
+            for channel in list(self.server.active_channels.values())
+        )
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        self.heartbeat()
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+        if self.options.server == 'asgi':
+            self.run_asgi()
+        else:
+            self.run_wsgi()
+
+        # Leave the final totals for the master to fold in once this worker exits
+        from aits import metrics
+
+        metrics.publish(force=True)
+
+        try:
+            os.unlink(heartbeat_path(self.options.health_dir, os.getpid()))
+        except OSError:
+            pass
+
+    def run_asgi(self):
+        import asyncio
+        import uvicorn
+        from core.asgi import application
+
+        self.server = uvicorn.Server(uvicorn.Config(
+            self.wrap_asgi(application),
+            interface='asgi3',
+            lifespan='off',
+            log_config=None,
+            server_header=False,
+            timeout_graceful_shutdown=self.options.graceful_timeout,
+        ))
+
+        async def beat():
+            while True:
+                if self.server.should_exit:
+                    self.state = 'draining'
+                self.heartbeat()
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+        async def serve():
+            # Beating from the event loop shows when the loop itself is blocked
+            heartbeat = asyncio.create_task(beat())
+            try:
+                self.state = 'serving'
+                await self.server.serve(sockets=[self.sock])
+            finally:
+                heartbeat.cancel()
+
+        # uvicorn handles SIGTERM and SIGINT itself while serving
+        asyncio.run(serve())
+
+    def run_wsgi(self):
+        from waitress.server import create_server
+        from core.wsgi import application
+
+        self.server = create_server(
+            self.wrap_wsgi(application),
+            sockets=[self.sock],
+            threads=self.options.threads,
+            ident='aits'
+        )
+        self.state = 'serving'
+        next_heartbeat = 0
+        deadline = None
+
+        while True:
+            self.server.asyncore.loop(timeout=1, map=self.server._map, count=1)
+            now = time.time()
+
+            if self.stopping and deadline is None:
+                # Stop accepting; other workers keep the shared socket open
+                self.state = 'draining'
+                deadline = now + self.options.graceful_timeout
+                self.server.del_channel()
+                self.sock.close()
+            if deadline is not None and (self.is_drained() or now >= deadline):
+                break
+            if now >= next_heartbeat:
+                self.heartbeat()
+                next_heartbeat = now + HEARTBEAT_INTERVAL
+
+        self.server.task_dispatcher.shutdown(cancel_pending=False, timeout=1)
+
+
+class Master:
+    """Keep the configured number of workers running and handle control signals"""
+
+    def __init__(self, options):
+        self.options = options
+        self.workers = {}  # pid -> generation
+        self.generation = 0
+        self.signals = []
+        self.stopping = False
+
+    def bind(self):
+        sock = socket.socket(socket.AF_INET6 if ':' in self.options.host else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.options.host, self.options.port))
+        sock.listen(1024)
+        sock.set_inheritable(True)
+        return sock
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = self.generation
+            return
+        # Child
+        exit_code = 0
+        try:
+            Worker(self.sock, self.options, self.generation).run()
+        except Exception:
+            logger.exception('Worker %s failed', os.getpid())
+            exit_code = 1
+        finally:
+            logging.shutdown()
+            os._exit(exit_code)
+
+    def signal_workers(self, pids, signum):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def current_workers(self):
+        return [pid for pid, generation in self.workers.items() if generation == self.generation]
+
+    def reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            self.workers.pop(pid, None)
+            try:
+                os.unlink(heartbeat_path(self.options.health_dir, pid))
+            except OSError:
+                pass
+            self.retire_metrics(pid)
+            if not self.stopping:
+                logger.info('Worker %s exited with status %s', pid, os.waitstatus_to_exitcode(status))
+
+    def retire_metrics(self, pid):
+        # Keep an exited worker's totals while dropping its file
+        from aits import metrics
+
+        try:
+            metrics.retire(pid)
+        except Exception:
+            logger.exception('Could not fold the metrics of worker %s', pid)
+
+    def kill_hung_workers(self):
+        now = time.time()
+        timeout = self.options.timeout
+        for pid in list(self.workers):
+            beat = read_json(heartbeat_path(self.options.health_dir, pid))
+            if not beat:
+                continue
+            silent = now - beat['updated_at']
+            if silent > timeout:
+                logger.warning('Worker %s missed its heartbeat for %ds, killing it', pid, silent)
+                self.signal_workers([pid], signal.SIGKILL)
+            elif beat['stalled_for'] and beat['stalled_for'] + silent > timeout:
+                # The loop is alive but every request it handed out is stuck
+                logger.warning(
+                    'Worker %s has had %s requests waiting %ds without a response, killing it',
+                    pid, beat['waiting'], beat['stalled_for'] + silent
+                )
+                self.signal_workers([pid], signal.SIGKILL)
+
+    def reload(self):
+        """Start a new generation of workers and let the old one drain"""
+        old = list(self.workers)
+        self.generation += 1
+        logger.info('Reloading: starting generation %s', self.generation)
+        for _ in range(self.options.workers):
+            self.spawn()
+        self.signal_workers(old, signal.SIGTERM)
+
+    def report(self):
+        logger.info('%s', json.dumps(health_report(self.options.health_dir), indent=2))
+
+    def handle_signals(self):
+        while self.signals:
+            signum = self.signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                self.stopping = True
+            elif signum == signal.SIGHUP:
+                self.reload()
+            elif signum == signal.SIGUSR1:
+                self.report()
+
+    def clear_metrics(self):
+        metrics_dir = os.environ['METRICS_DIR']
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            if name.startswith('metrics-'):
+                os.unlink(os.path.join(metrics_dir, name))
+
+    def run(self):
+        os.makedirs(self.options.health_dir, exist_ok=True)
+        self.clear_metrics()
+        write_json(os.path.join(self.options.health_dir, 'master.json'), {
+            'pid': os.getpid(),
+            'started_at': time.time(),
+            'server': self.options.server,
+            'workers': self.options.workers,
+            'threads': self.options.threads,
+            'db_connections': self.options.db_connections,
+        })
+        self.sock = self.bind()
+        logger.info(
+            'Listening on %s:%s with %s %s workers x %s threads',
+            self.options.host, self.options.port, self.options.workers, self.options.server, self.options.threads
+        )
+        if self.options.per_process:
+            logger.info('Starting one worker, as %s', '; '.join(self.options.per_process))
+        if self.options.workers * self.options.threads > self.options.db_connections:
+            logger.warning(
+                '%s workers x %s threads can open more than the %s database connections allowed',
+                self.options.workers, self.options.threads, self.options.db_connections
+            )
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(signum, lambda signum, frame: self.signals.append(signum))
+
+        while not self.stopping:
+            self.handle_signals()
+            self.reap()
+            for _ in range(self.options.workers - len(self.current_workers())):
+                self.spawn()
+            self.kill_hung_workers()
+            time.sleep(1)
+
+        logger.info('Shutting down %s workers', len(self.workers))
+        self.signal_workers(list(self.workers), signal.SIGTERM)
+        deadline = time.time() + self.options.graceful_timeout + HEARTBEAT_INTERVAL
+        while self.workers and time.time() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        self.signal_workers(list(self.workers), signal.SIGKILL)
+        self.sock.close()
+        os.unlink(os.path.join(self.options.health_dir, 'master.json'))
+
+
+def health_report(health_dir):
+    master = read_json(os.path.join(health_dir, 'master.json'))
+    now = time.time()
+    workers = []
+    for name in sorted(os.listdir(health_dir)) if os.path.isdir(health_dir) else []:
+        if name.startswith('worker-') and name.endswith('.json'):
+            beat = read_json(os.path.join(health_dir, name))
+            if beat:
+                beat['uptime'] = round(now - beat['started_at'], 1)
+                beat['heartbeat_age'] = round(now - beat['updated_at'], 1)
+                workers.append(beat)
+    return {'master': master, 'workers': workers}
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(process)d] %(message)s')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    options = parse_args(argv)
+
+    if options.command == 'status':
+        print(json.dumps(health_report(options.health_dir), indent=2))
+        return
+    if options.command == 'reload':
+        master = read_json(os.path.join(options.health_dir, 'master.json'))
+        if not master:
+            sys.exit('No running master found in %s' % options.health_dir)
+        os.kill(master['pid'], signal.SIGHUP)
+        return
+
+    Master(options).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,23 +4,19 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
-from aits.models import User, Student, Lecturer, AcademicRegistrar, Department
-import traceback
+from aits import reference
+from aits.models import User, Student, Lecturer, AcademicRegistrar
+from aits.reference import DEPARTMENT_FACULTY_MAP
+import logging
 
-# Map departments to their faculties
-DEPARTMENT_FACULTY_MAP = {
-    'Department of Computer Science': 'College of Computing',
-    'Department Of Software Engineering': 'College of Computing',
-    'Department of Library And Information System': 'College Of Humanity And Social Sciences',
-    'Department Of Information Technology': 'College of Computing'
-}
+logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register_user(request):
     data = request.data
-    print("\n=== Registration Request ===")
-    print("Received data:", data)
+    # Field names only; the body holds the password
+    logger.debug('Registration request', extra={'role': data.get('role'), 'fields': sorted(data)})
     
     role = data.get('role')
     
@@ -29,7 +25,7 @@ def register_user(request):
         required_fields = ['fullName', 'email', 'userId', 'password', 'confirmPassword']
         missing_fields = [field for field in required_fields if field not in data]
         if missing_fields:
-            print("Missing required fields:", missing_fields)
+            logger.info('Registration rejected: missing fields', extra={'role': role, 'fields': missing_fields})
             return Response(
                 {'errors': {field: 'This field is required.' for field in missing_fields}},
                 status=status.HTTP_400_BAD_REQUEST
@@ -52,24 +48,23 @@ def register_user(request):
         required_fields = ['username', 'email', 'password', 'role', 'first_name', 'last_name']
         missing_fields = [field for field in required_fields if field not in data]
         if missing_fields:
-            print("Missing required fields:", missing_fields)
+            logger.info('Registration rejected: missing fields', extra={'role': role, 'fields': missing_fields})
             return Response(
                 {'errors': {field: 'This field is required.' for field in missing_fields}},
                 status=status.HTTP_400_BAD_REQUEST
             )
     
     # Validate role
-    if data['role'] not in dict(User.ROLES):
-        print("Invalid role:", data['role'])
-        print("Valid roles:", dict(User.ROLES))
+    if data['role'] not in reference.CHOICES['roles']:
+        logger.info('Registration rejected: invalid role', extra={'role': data['role']})
         return Response(
-            {'errors': {'role': f'Invalid role. Must be one of: {", ".join(dict(User.ROLES).keys())}'}},
+            {'errors': {'role': reference.choice_error('role', 'roles')}},
             status=status.HTTP_400_BAD_REQUEST
         )
     
     # Check if email already exists
     if User.objects.filter(email=data['email']).exists():
-        print("Email already exists:", data['email'])
+        logger.info('Registration rejected: email exists', extra={'role': data['role']})
         return Response(
             {'errors': {'email': 'Email already exists.'}}, 
             status=status.HTTP_400_BAD_REQUEST
@@ -77,14 +72,13 @@ def register_user(request):
     
     # Check if username already exists
     if User.objects.filter(username=data['username']).exists():
-        print("Username already exists:", data['username'])
+        logger.info('Registration rejected: username exists', extra={'role': data['role']})
         return Response(
             {'errors': {'username': 'Username already exists.'}}, 
             status=status.HTTP_400_BAD_REQUEST
         )
     
     try:
-        print("\n=== Creating Base User ===")
         # Create base user
         user = User.objects.create(
             username=data['username'],
@@ -94,35 +88,25 @@ def register_user(request):
             role=data['role'],
             password=make_password(data['password'])
         )
-        print("Base user created successfully:", user.username)
         
         # Handle role-specific data
         if data['role'] == 'lecturer' and 'lecturer_data' in data:
             lecturer_data = data['lecturer_data']
-            print("\n=== Processing Lecturer Data ===")
-            print("Lecturer data:", lecturer_data)
             
             # Get or create department
             department_name = lecturer_data['department']
-            print("\nProcessing department:", department_name)
-            print("Department faculty map:", DEPARTMENT_FACULTY_MAP)
             
             faculty = DEPARTMENT_FACULTY_MAP.get(department_name)
             if not faculty:
                 raise ValueError(f"Invalid department: {department_name}")
                 
-            department, created = Department.objects.get_or_create(
-                name=department_name,
-                defaults={'faculty': faculty}
-            )
-            print(f"Department {'created' if created else 'retrieved'}:", department.name)
+            department = reference.get_department(department_name, faculty)
             
-            print("\nCreating lecturer profile...")
             lecturer = Lecturer.objects.create(
                 user=user,
                 department=department
             )
-            print("Lecturer profile created successfully")
+            logger.info('User registered', extra={'user_id': user.pk, 'username': user.username, 'role': user.role})
             
             # Return lecturer-specific response
             return Response({
@@ -137,38 +121,24 @@ def register_user(request):
             
         elif data['role'] == 'student' and 'student_data' in data:
             student_data = data['student_data']
-            print("\n=== Processing Student Data ===")
-            print("Student data:", student_data)
             
             # Validate student-specific fields
-            print("\nValidating student fields:")
-            print("College choices:", dict(Student.COLLEGE_CHOICES))
-            print("Course choices:", dict(Student.COURSE_CHOICES))
-            print("Year choices:", dict(Student.YEAR_CHOICES))
-            
-            if not student_data.get('college') in dict(Student.COLLEGE_CHOICES):
-                raise ValueError(f"Invalid college. Must be one of: {', '.join(dict(Student.COLLEGE_CHOICES).keys())}")
-            if not student_data.get('course') in dict(Student.COURSE_CHOICES):
-                raise ValueError(f"Invalid course. Must be one of: {', '.join(dict(Student.COURSE_CHOICES).keys())}")
-            if not student_data.get('year_of_study') in dict(Student.YEAR_CHOICES):
-                raise ValueError(f"Invalid year of study. Must be one of: {', '.join(dict(Student.YEAR_CHOICES).keys())}")
+            if not student_data.get('college') in reference.CHOICES['colleges']:
+                raise ValueError(reference.choice_error('college', 'colleges'))
+            if not student_data.get('course') in reference.CHOICES['courses']:
+                raise ValueError(reference.choice_error('course', 'courses'))
+            if not student_data.get('year_of_study') in reference.CHOICES['years_of_study']:
+                raise ValueError(reference.choice_error('year of study', 'years_of_study'))
             
             # Get or create department
             department_name = student_data['department']
-            print("\nProcessing department:", department_name)
-            print("Department faculty map:", DEPARTMENT_FACULTY_MAP)
             
             faculty = DEPARTMENT_FACULTY_MAP.get(department_name)
             if not faculty:
                 raise ValueError(f"Invalid department: {department_name}")
                 
-            department, created = Department.objects.get_or_create(
-                name=department_name,
-                defaults={'faculty': faculty}
-            )
-            print(f"Department {'created' if created else 'retrieved'}:", department.name)
+            department = reference.get_department(department_name, faculty)
             
-            print("\nCreating student profile...")
             Student.objects.create(
                 user=user,
                 college=student_data['college'],
@@ -176,52 +146,36 @@ def register_user(request):
                 year_of_study=student_data['year_of_study'],
                 course=student_data['course']
             )
-            print("Student profile created successfully")
             
         elif data['role'] == 'registrar' and 'registrar_data' in data:
             registrar_data = data['registrar_data']
-            print("\n=== Processing Registrar Data ===")
-            print("Registrar data:", registrar_data)
             
             # Validate registrar-specific fields
-            print("\nValidating registrar fields:")
-            print("College choices:", dict(AcademicRegistrar.COLLEGE_CHOICES))
-            
-            if not registrar_data.get('college') in dict(AcademicRegistrar.COLLEGE_CHOICES):
-                raise ValueError(f"Invalid college. Must be one of: {', '.join(dict(AcademicRegistrar.COLLEGE_CHOICES).keys())}")
+            if not registrar_data.get('college') in reference.CHOICES['registrar_colleges']:
+                raise ValueError(reference.choice_error('college', 'registrar_colleges'))
             
             # Get or create department
             department_name = registrar_data['department']
-            print("\nProcessing department:", department_name)
-            print("Department faculty map:", DEPARTMENT_FACULTY_MAP)
             
             faculty = DEPARTMENT_FACULTY_MAP.get(department_name)
             if not faculty:
                 raise ValueError(f"Invalid department: {department_name}")
                 
-            department, created = Department.objects.get_or_create(
-                name=department_name,
-                defaults={'faculty': faculty}
-            )
-            print(f"Department {'created' if created else 'retrieved'}:", department.name)
+            department = reference.get_department(department_name, faculty)
             
-            print("\nCreating registrar profile...")
             AcademicRegistrar.objects.create(
                 user=user,
                 college=registrar_data['college'],
                 department=department
             )
-            print("Registrar profile created successfully")
         
-        print("\n=== Registration Successful ===")
+        logger.info('User registered', extra={'user_id': user.pk, 'username': user.username, 'role': user.role})
         return Response(
             {'message': 'User registered successfully.'}, 
             status=status.HTTP_201_CREATED
         )
     except Exception as e:
-        print("\n=== Registration Error ===")
-        print("Error:", str(e))
-        print("Traceback:", traceback.format_exc())
+        logger.exception('Registration failed', extra={'role': data['role']})
         try:
             # If any error occurs during user creation, delete the user if it was created
             if 'user' in locals():
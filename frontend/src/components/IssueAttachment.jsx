@@ -0,0 +1,59 @@
+import React, { useState, useEffect } from 'react';
+import { getAttachment } from '../services/api';
+
+// Shows an issue attachment from an object URL, as <img> and <a> cannot send the token
+const IssueAttachment = ({ url, name, linkText = '📎 Download Attachment' }) => {
+  const [attachment, setAttachment] = useState(null);
+  const [error, setError] = useState('');
+
+  useEffect(() => {
+    let objectUrl = null;
+    let cancelled = false;
+
+    getAttachment(url)
+      .then((blob) => {
+        if (cancelled) return;
+        objectUrl = URL.createObjectURL(blob);
+        setAttachment({ url: objectUrl, isImage: blob.type.startsWith('image/') });
+      })
+      .catch((err) => {
+        console.error('Error fetching attachment:', err);
+        if (!cancelled) setError('Failed to load the attachment.');
+      });
+
+    return () => {
+      cancelled = true;
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+    };
+  }, [url]);
+
+  if (error) {
+    return <div className="error-message">{error}</div>;
+  }
+
+  if (!attachment) {
+    return <p>Loading attachment...</p>;
+  }
+
+  if (attachment.isImage) {
+    return (
+      <img 
+        src={attachment.url} 
+        alt={name || 'Issue attachment'} 
+        style={{ maxWidth: '100%', maxHeight: '300px', objectFit: 'contain', borderRadius: '4px' }} 
+      />
+    );
+  }
+
+  return (
+    <a 
+      href={attachment.url} 
+      download={name || true} 
+      className="attachment-link"
+    >
+      {linkText}
+    </a>
+  );
+};
+
+export default IssueAttachment;
@@ -3,6 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { getIssueById, assignIssueToLecturer, updateIssueStatus, deleteIssue, getLecturers as fetchLecturers, getRegistrarIssueById } from '../services/api';
 import UserProfile from './UserProfile';
 import NotificationBadge from './NotificationBadge';
+import IssueAttachment from './IssueAttachment';
 import '../styles/Dashboard.css';
 import '../styles/IssueDetail.css';
 
@@ -358,22 +359,7 @@ const IssueDetail = () => {
             {issue.attachment_url && (
               <div className="issue-section">
                 <h2>Attachment</h2>
-                {issue.attachment_url.match(/\.(jpg|jpeg|png|gif)$/i) ? (
-                  <img 
-                    src={issue.attachment_url} 
-                    alt="Issue attachment" 
-                    style={{ maxWidth: '100%', maxHeight: '300px', objectFit: 'contain', borderRadius: '4px' }} 
-                  />
-                ) : (
-                  <a 
-                    href={issue.attachment_url} 
-                    target="_blank" 
-                    rel="noopener noreferrer" 
-                    className="attachment-link"
-                  >
-                    📎 Download Attachment
-                  </a>
-                )}
+                <IssueAttachment url={issue.attachment_url} name={issue.attachment_name} />
               </div>
             )}
 
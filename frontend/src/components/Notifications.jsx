@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import UserProfile from './UserProfile';
 import NotificationBadge from './NotificationBadge';
-import { getNotifications } from '../services/api';
+import { getNotifications, deleteNotification, clearAllNotifications } from '../services/api';
 import { useNotifications } from '../context/NotificationContext';
 import '../styles/Notifications.css';
 
@@ -58,69 +58,35 @@ const Notifications = () => {
     });
   };
 
-  const deleteNotification = async (notificationId) => {
-    try {
-      const token = localStorage.getItem('token');
-      if (!token) {
-        throw new Error('No authentication token found');
-      }
-
-      const response = await fetch(`https://group-d-2025-production.up.railway.app/api/notifications/${notificationId}/delete/`, {
-        method: 'DELETE',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json',
-        },
-      });
-
-      if (!response.ok) {
-        if (response.status === 401) {
-          localStorage.removeItem('token');
-          localStorage.removeItem('user');
-          navigate('/login');
-          throw new Error('Session expired. Please login again.');
-        }
-        throw new Error('Failed to delete notification');
-      }
+  // The api client has already tried to refresh the session before this
+  const handleError = (err, fallback) => {
+    if (err.message === 'Authentication required. Please log in again.') {
+      localStorage.removeItem('user');
+      navigate('/login');
+      return;
+    }
+    setError(err.error || err.message || fallback);
+  };
 
+  const handleDelete = async (notificationId) => {
+    try {
+      await deleteNotification(notificationId);
       setNotifications(prevNotifications =>
         prevNotifications.filter(notification => notification.id !== notificationId)
       );
     } catch (err) {
       console.error('Error deleting notification:', err);
-      setError(err.message);
+      handleError(err, 'Failed to delete notification');
     }
   };
 
-  const clearAllNotifications = async () => {
+  const handleClearAll = async () => {
     try {
-      const token = localStorage.getItem('token');
-      if (!token) {
-        throw new Error('No authentication token found');
-      }
-
-      const response = await fetch('https://group-d-2025-production.up.railway.app/api/notifications/clear-all/', {
-        method: 'DELETE',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json',
-        },
-      });
-
-      if (!response.ok) {
-        if (response.status === 401) {
-          localStorage.removeItem('token');
-          localStorage.removeItem('user');
-          navigate('/login');
-          throw new Error('Session expired. Please login again.');
-        }
-        throw new Error('Failed to clear notifications');
-      }
-
+      await clearAllNotifications();
       setNotifications([]);
     } catch (err) {
       console.error('Error clearing notifications:', err);
-      setError(err.message);
+      handleError(err, 'Failed to clear notifications');
     }
   };
 
@@ -206,7 +172,7 @@ const Notifications = () => {
             <div className="page-header">
               <h1>Notifications</h1>
               {notifications.length > 0 && (
-                <button onClick={clearAllNotifications} className="clear-all-btn">
+                <button onClick={handleClearAll} className="clear-all-btn">
                   Clear All
                 </button>
               )}
@@ -246,7 +212,7 @@ const Notifications = () => {
                       className="delete-btn"
                       onClick={(e) => {
                         e.stopPropagation();
-                        deleteNotification(notification.id);
+                        handleDelete(notification.id);
                       }}
                     >
                       ✕
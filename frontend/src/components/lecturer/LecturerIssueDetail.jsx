@@ -3,6 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { getIssueById, updateIssueStatus } from '../../services/api';
 import UserProfile from '../UserProfile';
 import NotificationBadge from '../NotificationBadge';
+import IssueAttachment from '../IssueAttachment';
 import '../../styles/Dashboard.css';
 import '../../styles/Lecturer.css';
 
@@ -62,6 +63,7 @@ const LecturerIssueDetail = () => {
 
   const handleLogout = () => {
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     localStorage.removeItem('user');
     navigate('/login');
   };
@@ -147,12 +149,14 @@ const LecturerIssueDetail = () => {
                   <p>{issue.description}</p>
                 </div>
 
-                {issue.attachment && (
+                {issue.attachment_url && (
                   <div className="issue-attachment-section">
                     <h2>Attachments</h2>
-                    <a href={issue.attachment} target="_blank" rel="noopener noreferrer" className="attachment-link">
-                      📎 View Attachment
-                    </a>
+                    <IssueAttachment
+                      url={issue.attachment_url}
+                      name={issue.attachment_name}
+                      linkText="📎 View Attachment"
+                    />
                   </div>
                 )}
 
@@ -11,10 +11,50 @@ const api = axios.create({
   withCredentials: true,
 });
 
+// Seconds before expiry at which the access token is renewed
+const REFRESH_MARGIN = 60;
+let refreshing = null;
+
+const tokenExpiresSoon = (token) => {
+  try {
+    const payload = JSON.parse(atob(token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/')));
+    return payload.exp * 1000 - Date.now() < REFRESH_MARGIN * 1000;
+  } catch {
+    return false;
+  }
+};
+
+// Swap the refresh token for a new token pair, sharing one request between callers
+const refreshAccessToken = () => {
+  const refresh = localStorage.getItem('refreshToken');
+  if (!refresh) {
+    return Promise.resolve(null);
+  }
+  if (!refreshing) {
+    refreshing = axios.post(`${API_URL}/token/refresh`, { refresh })
+      .then((response) => {
+        localStorage.setItem('token', response.data.token);
+        localStorage.setItem('refreshToken', response.data.refresh);
+        return response.data.token;
+      })
+      .catch(() => {
+        localStorage.removeItem('refreshToken');
+        return null;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
 // Add request interceptor to include token
 api.interceptors.request.use(
-  (config) => {
-    const token = localStorage.getItem('token');
+  async (config) => {
+    let token = localStorage.getItem('token');
+    if (token && tokenExpiresSoon(token)) {
+      token = (await refreshAccessToken()) || token;
+    }
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
@@ -28,7 +68,16 @@ api.interceptors.request.use(
 // Add response interceptor for better error handling
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    // Retry once with a renewed access token before giving up
+    if (error.response?.status === 401 && error.config && !error.config._retried) {
+      const token = await refreshAccessToken();
+      if (token) {
+        error.config._retried = true;
+        error.config.headers.Authorization = `Bearer ${token}`;
+        return api(error.config);
+      }
+    }
     if (error.response?.status === 401 || error.response?.status === 403) {
       // Instead of redirecting, we'll throw an error that components can handle
       localStorage.removeItem('token');
@@ -50,6 +99,7 @@ export const loginUser = async (credentials) => {
     
     if (response.data.token) {
       localStorage.setItem('token', response.data.token);
+      localStorage.setItem('refreshToken', response.data.refresh);
       localStorage.setItem('user', JSON.stringify(response.data.user));
     }
     
@@ -230,6 +280,18 @@ export const updateIssue = async (issueId, issueData) => {
   }
 };
 
+// Attachments are only served with the Authorization header, so they are
+// fetched through the api client rather than linked to directly
+export const getAttachment = async (url) => {
+  const response = await api.get(url, {
+    responseType: 'blob',
+    headers: {
+      'Accept': '*/*'
+    }
+  });
+  return response.data;
+};
+
 export const getNotifications = async () => {
   try {
     console.log('Fetching notifications');
@@ -290,6 +352,24 @@ export const markNotificationRead = async (notificationId) => {
   }
 };
 
+export const deleteNotification = async (notificationId) => {
+  try {
+    const response = await api.delete(`/notifications/${notificationId}/delete`);
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error;
+  }
+};
+
+export const clearAllNotifications = async () => {
+  try {
+    const response = await api.delete('/notifications/clear-all');
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error;
+  }
+};
+
 export const getStudents = async (filters = {}) => {
   try {
     console.log('Fetching all students');